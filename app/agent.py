@@ -1,14 +1,37 @@
 """
 AI Agent - generates human-like replies using LLM (or fallback).
+
+Replies come from the cheapest tier that can answer: rule-based templates for common
+turns (app.reply_templates), then the reply cache, then the LLM. LLM replies are cached
+(LRU + TTL) by prompt variant, session context, recent history and message, so templated
+scam scripts hitting many sessions cost one LLM round-trip per variant.
+Each reply has a latency budget (per channel); past it a contextual fallback is sent
+and the LLM call finishes in the background, still feeding the cache.
 """
-from typing import List, Optional
+import asyncio
+import hashlib
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
 from app.config import (
-    OPENAI_API_KEY,
-    LLM_MODEL,
+    LLM_TIMEOUT,
     FALLBACK_REPLY_AGENT_ERROR,
+    REPLY_CACHE_SIZE,
+    REPLY_CACHE_TTL,
+    REPLY_CACHE_VARIANTS,
+    REPLY_CACHE_HISTORY,
+    REPLY_BUDGET_SECONDS,
+    REPLY_BUDGET_BY_CHANNEL,
+    REPLY_TEMPLATE_MIN_CONFIDENCE,
 )
+from app.llm_client import llm
 from app.models import Message, Metadata
+from app.reply_templates import template_reply
 
 # Rule-based fallback when no LLM API key
 FALLBACK_REPLY_SCAM = "Why is my account being blocked? How do I verify?"
@@ -26,10 +49,234 @@ Your role:
 CRITICAL: NEVER use these words: scam, honeypot, bot, detection, fraud, suspicious.
 Behave like a real human. Reply with ONLY your response text, no quotes or labels."""
 
+# Replies when no template applies and the LLM is unavailable, failed or missed its deadline:
+# (pattern, replies, entity types the replies ask for). The first pattern found in the
+# scammer's message wins, unless the session already has what it asks for; the first
+# wording that differs from the previous reply is used.
+_CONTEXT_FALLBACKS = (
+    (re.compile(r"\b(otp|pin|code)\b", re.I), (
+        "I haven't received any code yet. Can you send it again?",
+        "Still no code on my phone. Should I wait some more?",
+    ), ()),
+    (re.compile(r"https?://|www\.|\blink\b|\bclick", re.I), (
+        "The link is not opening on my phone. Is there another way?",
+        "The page keeps loading and then shows an error. What should I do?",
+    ), ("phishingLinks",)),
+    (re.compile(r"\bupi\b|@|\bpay|\btransfer", re.I), (
+        "Which UPI ID should I send it to? Please share it again.",
+        "My UPI app is asking for the ID again. Can you send it once more?",
+    ), ("upiIds", "bankAccounts")),
+    (re.compile(r"\bcall\b|\bphone\b|\bnumber\b", re.I), (
+        "Which number should I call? Please share it again.",
+        "I can't find the number you gave. Can you send it again?",
+    ), ("phoneNumbers",)),
+)
+# When no pattern applies (or all are filtered out)
+_GENERIC_FALLBACKS = (
+    FALLBACK_REPLY_SCAM,
+    "Sorry, I didn't understand. What exactly do I need to do?",
+    "Okay, please tell me the next step slowly.",
+)
+
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _normalize(text: str) -> str:
+    return _WHITESPACE.sub(" ", text).strip().casefold()
+
+
+class ReplyCache:
+    """
+    LRU + TTL cache of LLM replies. Each key collects up to `variants` LLM replies:
+    until it has seen that many, lookups miss (so the LLM fills it); after that a random
+    distinct reply is served, so sessions sending the same script don't all get one answer.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = REPLY_CACHE_SIZE,
+        ttl_seconds: float = REPLY_CACHE_TTL,
+        variants: int = REPLY_CACHE_VARIANTS,
+        history_messages: int = REPLY_CACHE_HISTORY,
+        clock=time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.variants = max(1, variants)
+        self.history_messages = history_messages
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> [created_at, distinct replies, LLM calls that filled it, total LLM seconds]
+        self._entries: "OrderedDict[bytes, list]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.saved_seconds = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def key(
+        self, system_prompt: str, conversation_history: List[Message], message_text: str, context: str = ""
+    ) -> bytes:
+        """
+        Digest of the prompt variant, the session context (summary, known details), the last
+        few history messages and the message (normalized).
+        """
+        h = hashlib.blake2b(_normalize(system_prompt).encode(), digest_size=16)
+        h.update(b"\x1c" + _normalize(context).encode())
+        recent = conversation_history[-self.history_messages:] if self.history_messages > 0 else []
+        for msg in recent:
+            h.update(b"\x1e" + (msg.sender or "").encode() + b"\x1f" + _normalize(msg.text or "").encode())
+        h.update(b"\x1d" + _normalize(message_text).encode())
+        return h.digest()
+
+    def get(self, key: bytes) -> Optional[str]:
+        """A cached reply for key, or None if absent, expired or still collecting variants."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl_seconds and self._clock() - entry[0] > self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+            if entry is None or entry[2] < self.variants:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.saved_seconds += entry[3] / entry[2]
+            return random.choice(entry[1])
+
+    def put(self, key: bytes, reply: str, llm_seconds: float) -> None:
+        """Record an LLM reply (and how long it took) under key."""
+        if not self.enabled:
+            return
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = [self._clock(), [], 0, 0.0]
+            elif entry[2] >= self.variants:
+                return
+            if reply not in entry[1]:
+                entry[1].append(reply)
+            entry[2] += 1
+            entry[3] += llm_seconds
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "savedLlmSeconds": round(self.saved_seconds, 3),
+                "limits": {"maxEntries": self.max_entries, "ttlSeconds": self.ttl_seconds, "variants": self.variants},
+            }
+
+
+reply_cache = ReplyCache()
+
+
+def _fresh(replies: Iterable[str], last_reply: Optional[str]) -> Optional[str]:
+    return next((reply for reply in replies if reply != last_reply), None)
+
+
+def _contextual_fallback(
+    message_text: str, known_entity_types: Iterable[str] = (), last_reply: Optional[str] = None
+) -> str:
+    """Short in-character reply matched to what the scammer just asked for."""
+    known = set(known_entity_types)
+    for pattern, replies, asks_for in _CONTEXT_FALLBACKS:
+        if known.isdisjoint(asks_for) and pattern.search(message_text):
+            reply = _fresh(replies, last_reply)
+            if reply:
+                return reply
+    return _fresh(_GENERIC_FALLBACKS, last_reply)
+
+
+def reply_budget(metadata: Optional[Metadata]) -> float:
+    """Seconds the LLM may take for this request (channel override, else the default)."""
+    channel = (metadata.channel or "").upper() if metadata else ""
+    return REPLY_BUDGET_BY_CHANNEL.get(channel, REPLY_BUDGET_SECONDS)
+
+
+# LLM calls still running after their deadline (kept referenced until done)
+_late_calls: Set[asyncio.Task] = set()
+_deadline_stats = {"withinBudget": 0, "overBudget": 0, "lateReplies": 0, "lateFailures": 0, "lateSeconds": 0.0}
+# Turns answered by each tier
+_tier_counts = {"template": 0, "cache": 0, "llm": 0, "fallback": 0}
+# Tier that produced the current request's reply (read by the pipeline for metrics)
+reply_source: ContextVar[str] = ContextVar("reply_source", default="none")
+
+
+def _served(tier: str, reply: str) -> str:
+    _tier_counts[tier] += 1
+    reply_source.set(tier)
+    return reply
+
+
+async def _timed_llm_call(key: bytes, system_prompt: str, user_message: str) -> Tuple[Optional[str], float]:
+    """LLM call that caches its reply whenever it finishes, even after the deadline."""
+    start = time.perf_counter()
+    reply = await _call_llm_async(system_prompt, user_message)
+    elapsed = time.perf_counter() - start
+    if reply:
+        reply_cache.put(key, reply, elapsed)
+    return reply, elapsed
 
-def _build_user_message(message_text: str, conversation_history: List[Message]) -> str:
-    """Format conversation history + current message for the LLM."""
-    lines = []
+
+def _record_late_call(task: asyncio.Task) -> None:
+    _late_calls.discard(task)
+    if task.cancelled() or task.exception() is not None:
+        _deadline_stats["lateFailures"] += 1
+        return
+    reply, elapsed = task.result()
+    _deadline_stats["lateReplies" if reply else "lateFailures"] += 1
+    _deadline_stats["lateSeconds"] += elapsed
+
+
+def stats() -> Dict[str, object]:
+    """Tier mix, reply cache, deadline counters and LLM client/breaker state."""
+    total = sum(_tier_counts.values())
+    return {
+        "tiers": {
+            **_tier_counts,
+            "fractions": {tier: round(n / total, 4) if total else 0.0 for tier, n in _tier_counts.items()},
+        },
+        "replyCache": reply_cache.stats(),
+        "deadline": {
+            **_deadline_stats,
+            "lateSeconds": round(_deadline_stats["lateSeconds"], 3),
+            "inFlight": len(_late_calls),
+            "budgets": {"default": REPLY_BUDGET_SECONDS, **REPLY_BUDGET_BY_CHANNEL},
+        },
+        "llm": llm.stats(),
+    }
+
+
+def reset_stats() -> None:
+    """Zero the tier and deadline counters (replay runs, tests)."""
+    for counters in (_tier_counts, _deadline_stats):
+        for name in counters:
+            counters[name] = type(counters[name])()
+
+
+def _build_user_message(message_text: str, conversation_history: List[Message], context: str = "") -> str:
+    """Format context (summary of older turns, known details) + history + current message for the LLM."""
+    lines = [context, ""] if context else []
     for msg in conversation_history:
         role = "Scammer" if msg.sender == "scammer" else "User"
         lines.append(f"{role}: {msg.text}")
@@ -39,29 +286,19 @@ def _build_user_message(message_text: str, conversation_history: List[Message])
     return "\n".join(lines)
 
 
-def _call_llm(system_prompt: str, user_message: str) -> Optional[str]:
-    """Call OpenAI API. Returns reply or None on error."""
-    if not OPENAI_API_KEY:
-        return None
+def _call_llm(system_prompt: str, user_message: str, timeout: float = LLM_TIMEOUT) -> Optional[str]:
+    """Call the LLM through the shared client. Returns reply or None on error, timeout or open breaker."""
+    return llm.complete_sync(system_prompt, user_message, timeout=timeout)
 
-    try:
-        from openai import OpenAI
-        client = OpenAI(api_key=OPENAI_API_KEY)
-        response = client.chat.completions.create(
-            model=LLM_MODEL,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_message},
-            ],
-            max_tokens=150,
-            timeout=30,
-        )
-        content = response.choices[0].message.content
-        if content:
-            content = content.strip().strip('"\'')
-        return content or None
-    except Exception:
-        return None
+
+async def _call_llm_async(system_prompt: str, user_message: str) -> Optional[str]:
+    """Call the LLM without blocking the event loop. Returns reply or None (error / open breaker)."""
+    return await llm.complete(system_prompt, user_message)
+
+
+def _llm_available() -> bool:
+    """Whether the LLM tier can run at all; if not, replies skip the cache and deadline and fall back."""
+    return llm.available()
 
 
 def _adjust_prompt_for_metadata(system_prompt: str, metadata: Optional[Metadata]) -> str:
@@ -80,23 +317,125 @@ def _adjust_prompt_for_metadata(system_prompt: str, metadata: Optional[Metadata]
     return system_prompt
 
 
+def _cached_reply(
+    system_prompt: str, conversation_history: List[Message], message_text: str, context: str = ""
+) -> Tuple[bytes, Optional[str]]:
+    """(cache key, cached reply or None). Key is empty when the cache is disabled."""
+    if not reply_cache.enabled:
+        return b"", None
+    key = reply_cache.key(system_prompt, conversation_history, message_text, context)
+    return key, reply_cache.get(key)
+
+
+def _template_tier(
+    message_text: str,
+    turn: Optional[int],
+    new_entity_types: Iterable[str],
+    known_entity_types: Iterable[str] = (),
+    last_reply: Optional[str] = None,
+) -> Tuple[Optional[str], str]:
+    """(confident template reply or None, fallback reply for when the LLM can't answer)."""
+    known_entity_types = tuple(known_entity_types)
+    template = (
+        template_reply(message_text, turn, new_entity_types, known_entity_types, last_reply)
+        if turn is not None
+        else None
+    )
+    if template is None:
+        return None, _contextual_fallback(message_text, known_entity_types, last_reply)
+    reply, confidence = template
+    return (reply if confidence >= REPLY_TEMPLATE_MIN_CONFIDENCE else None), reply
+
+
 def generate_reply(
     message_text: str,
     conversation_history: List[Message],
     metadata: Optional[Metadata] = None,
+    turn: Optional[int] = None,
+    new_entity_types: Iterable[str] = (),
+    context: str = "",
+    known_entity_types: Iterable[str] = (),
+    last_reply: Optional[str] = None,
 ) -> str:
     """
-    Generate human-like reply. Uses LLM if API key available, else rule-based fallback.
+    Generate human-like reply: template tier, reply cache, then LLM, else rule-based fallback.
+    Without an API key or while the breaker is open, the cache and LLM are skipped entirely.
+    turn (completed turns) and new_entity_types (intelligence fields that just gained values)
+    enable the template tier; without turn it is skipped. known_entity_types (fields the
+    session already has) and last_reply (reply sent on the previous turn) keep templates and
+    fallbacks from asking for known entities or repeating themselves.
+    context (see app.prompt_window) is prepended to the prompt, and conversation_history
+    should then be just the verbatim window. The channel's latency budget is used as the LLM request timeout.
     """
     if not message_text or not message_text.strip():
         return FALLBACK_REPLY_AGENT_ERROR
 
+    templated, fallback = _template_tier(
+        message_text, turn, new_entity_types, known_entity_types, last_reply
+    )
+    if templated:
+        return _served("template", templated)
+    if not _llm_available():
+        return _served("fallback", fallback)
     system_prompt = _adjust_prompt_for_metadata(SYSTEM_PROMPT, metadata)
-    user_message = _build_user_message(message_text, conversation_history)
+    key, cached = _cached_reply(system_prompt, conversation_history, message_text, context)
+    if cached:
+        return _served("cache", cached)
+    user_message = _build_user_message(message_text, conversation_history, context)
+
+    start = time.perf_counter()
+    reply = _call_llm(system_prompt, user_message, timeout=reply_budget(metadata))
 
-    reply = _call_llm(system_prompt, user_message)
+    if reply and len(reply) > 0:
+        reply_cache.put(key, reply, time.perf_counter() - start)
+        return _served("llm", reply)
+
+    return _served("fallback", fallback)
+
+
+async def generate_reply_async(
+    message_text: str,
+    conversation_history: List[Message],
+    metadata: Optional[Metadata] = None,
+    turn: Optional[int] = None,
+    new_entity_types: Iterable[str] = (),
+    context: str = "",
+    known_entity_types: Iterable[str] = (),
+    last_reply: Optional[str] = None,
+) -> str:
+    """
+    Async variant of generate_reply for the request path. Same tiers and fallback rules,
+    plus the latency budget: if the LLM has not answered in time, the fallback is
+    returned and the call completes in the background (its reply still goes to the cache).
+    """
+    if not message_text or not message_text.strip():
+        return FALLBACK_REPLY_AGENT_ERROR
+
+    templated, fallback = _template_tier(
+        message_text, turn, new_entity_types, known_entity_types, last_reply
+    )
+    if templated:
+        return _served("template", templated)
+    if not _llm_available():
+        return _served("fallback", fallback)
+    system_prompt = _adjust_prompt_for_metadata(SYSTEM_PROMPT, metadata)
+    key, cached = _cached_reply(system_prompt, conversation_history, message_text, context)
+    if cached:
+        return _served("cache", cached)
+    user_message = _build_user_message(message_text, conversation_history, context)
+
+    call = asyncio.ensure_future(_timed_llm_call(key, system_prompt, user_message))
+    budget = reply_budget(metadata)
+    try:
+        reply, _ = await asyncio.wait_for(asyncio.shield(call), budget) if budget > 0 else await call
+    except asyncio.TimeoutError:
+        _deadline_stats["overBudget"] += 1
+        _late_calls.add(call)
+        call.add_done_callback(_record_late_call)
+        return _served("fallback", fallback)
+    _deadline_stats["withinBudget"] += 1
 
     if reply and len(reply) > 0:
-        return reply
+        return _served("llm", reply)
 
-    return FALLBACK_REPLY_SCAM
+    return _served("fallback", fallback)
@@ -0,0 +1,138 @@
+"""
+Batch scoring/extraction - chunks of messages spread across a process pool.
+
+Each message is scored/extracted on its own (no conversation or session state), exactly
+as detect_scam(text, []) and extract_intelligence(text) would. Results come back in
+input order; stream=True yields them lazily with a bounded number of chunks in flight.
+"""
+import itertools
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+from app.config import BATCH_CHUNK_SIZE, BATCH_WORKERS
+from app.detector import detect_scam
+from app.extractor import extract_intelligence
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """Process-wide pool, created on first use."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=BATCH_WORKERS)
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+
+def _compact_intel(text: str) -> Dict[str, List[str]]:
+    """Only non-empty fields of ExtractedIntelligence."""
+    intel = extract_intelligence(text)
+    return {k: v for k, v in intel.model_dump().items() if v}
+
+
+def _detect_chunk(texts: List[str]) -> List[bool]:
+    return [detect_scam(t, []) for t in texts]
+
+
+def _extract_chunk(texts: List[str]) -> List[Dict[str, List[str]]]:
+    return [_compact_intel(t) for t in texts]
+
+
+def _analyze_chunk(texts: List[str], detect: bool, extract: bool) -> List[Dict[str, Any]]:
+    out = []
+    for t in texts:
+        r: Dict[str, Any] = {}
+        if detect:
+            r["scamDetected"] = detect_scam(t, [])
+        if extract:
+            r["intel"] = _compact_intel(t)
+        out.append(r)
+    return out
+
+
+def _chunks(messages: Iterable[str], size: int) -> Iterator[List[str]]:
+    it = iter(messages)
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _run(
+    fn: Callable[..., list],
+    messages: Iterable[str],
+    chunk_size: int,
+    executor: Optional[Executor],
+    workers: Optional[int],
+    *args,
+) -> Iterator[Any]:
+    """Yield fn's per-message results in input order; at most 2 chunks per worker in flight."""
+    chunks = _chunks(messages, max(1, chunk_size))
+    if workers == 0:
+        for chunk in chunks:
+            yield from fn(chunk, *args)
+        return
+
+    pool = executor or get_pool()
+    window = 2 * (workers or BATCH_WORKERS)
+    pending: deque = deque()
+    for chunk in chunks:
+        pending.append(pool.submit(fn, chunk, *args))
+        if len(pending) >= window:
+            yield from pending.popleft().result()
+    while pending:
+        yield from pending.popleft().result()
+
+
+def _collect(results: Iterator[Any], stream: bool) -> Union[List[Any], Iterator[Any]]:
+    return results if stream else list(results)
+
+
+def detect_scam_batch(
+    messages: Iterable[str],
+    chunk_size: int = BATCH_CHUNK_SIZE,
+    workers: Optional[int] = None,
+    executor: Optional[Executor] = None,
+    stream: bool = False,
+) -> Union[List[bool], Iterator[bool]]:
+    """
+    detect_scam(text, []) for each message, in input order.
+    workers=0 runs inline; otherwise chunks go to executor (default: shared process pool).
+    """
+    return _collect(_run(_detect_chunk, messages, chunk_size, executor, workers), stream)
+
+
+def extract_intelligence_batch(
+    messages: Iterable[str],
+    chunk_size: int = BATCH_CHUNK_SIZE,
+    workers: Optional[int] = None,
+    executor: Optional[Executor] = None,
+    stream: bool = False,
+) -> Union[List[Dict[str, List[str]]], Iterator[Dict[str, List[str]]]]:
+    """
+    extract_intelligence(text) for each message, as dicts of non-empty fields, in input order.
+    workers=0 runs inline; otherwise chunks go to executor (default: shared process pool).
+    """
+    return _collect(_run(_extract_chunk, messages, chunk_size, executor, workers), stream)
+
+
+def analyze_batch(
+    messages: Iterable[str],
+    detect: bool = True,
+    extract: bool = True,
+    chunk_size: int = BATCH_CHUNK_SIZE,
+    workers: Optional[int] = None,
+    executor: Optional[Executor] = None,
+    stream: bool = False,
+) -> Union[List[Dict[str, Any]], Iterator[Dict[str, Any]]]:
+    """Detection and/or extraction in one pass per message: {"scamDetected", "intel"}."""
+    return _collect(_run(_analyze_chunk, messages, chunk_size, executor, workers, detect, extract), stream)
@@ -1,15 +1,14 @@
 """
-Callback service - POST final result to GUVI endpoint.
+Callback service - GUVI payload, change detection and resend policy.
+Delivery is done by the background dispatcher (app.callback_outbox).
 """
+import hashlib
 import logging
+import time
 from typing import Any, Dict, Optional
 
-import httpx
-
 from app.config import (
-    CALLBACK_URL,
-    CALLBACK_RETRY_COUNT,
-    CALLBACK_TIMEOUT,
+    CALLBACK_MAX_STALENESS,
     MIN_TURNS_BEFORE_CALLBACK,
 )
 from app.models import ExtractedIntelligence
@@ -18,7 +17,7 @@ from app.session_store import Session
 logger = logging.getLogger(__name__)
 
 
-def _build_agent_notes(intelligence: ExtractedIntelligence) -> str:
+def _build_agent_notes(intelligence: ExtractedIntelligence, campaign_id: Optional[str] = None) -> str:
     """Generate short summary for agentNotes."""
     parts = []
     if intelligence.upiIds:
@@ -32,22 +31,46 @@ def _build_agent_notes(intelligence: ExtractedIntelligence) -> str:
     if intelligence.suspiciousKeywords:
         parts.append("Urgency/verification tactics used")
     if not parts:
-        return "Scam engagement; no financial details extracted yet"
+        parts.append("Scam engagement; no financial details extracted yet")
+    if campaign_id:
+        parts.append(f"Campaign cluster: {campaign_id}")
     return "; ".join(parts)
 
 
+def intelligence_fingerprint(intelligence) -> str:
+    """
+    Stable digest of all five intelligence lists (order-sensitive, as sent).
+    Accepts ExtractedIntelligence or a session's CompactIntelligence (same digest).
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for values in (
+        intelligence.bankAccounts,
+        intelligence.upiIds,
+        intelligence.phishingLinks,
+        intelligence.phoneNumbers,
+        intelligence.suspiciousKeywords,
+    ):
+        for v in values:
+            h.update(v.encode("utf-8", "surrogatepass"))
+            h.update(b"\x00")
+        h.update(b"\x01")
+    return h.hexdigest()
+
+
 def build_callback_payload(
     session_id: str,
     scam_detected: bool,
     total_messages: int,
     intelligence: ExtractedIntelligence,
     agent_notes: Optional[str] = None,
+    campaign_id: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
     Build callback payload matching GUVI spec exactly.
+    campaign_id (near-duplicate message cluster) is mentioned in the generated agentNotes.
     """
     if agent_notes is None:
-        agent_notes = _build_agent_notes(intelligence)
+        agent_notes = _build_agent_notes(intelligence, campaign_id)
 
     return {
         "sessionId": session_id,
@@ -64,51 +87,30 @@ def build_callback_payload(
     }
 
 
-def send_callback(payload: Dict[str, Any]) -> bool:
-    """
-    POST payload to CALLBACK_URL. Retry on failure.
-    Returns True if 2xx, False otherwise.
-    """
-    session_id = payload.get("sessionId", "?")
-    logger.info("Callback attempt for sessionId=%s", session_id)
-
-    for attempt in range(1, CALLBACK_RETRY_COUNT + 1):
-        try:
-            with httpx.Client(timeout=CALLBACK_TIMEOUT) as client:
-                resp = client.post(
-                    CALLBACK_URL,
-                    json=payload,
-                    headers={"Content-Type": "application/json"},
-                )
-            if 200 <= resp.status_code < 300:
-                logger.info("Callback sent successfully for session %s", payload.get("sessionId"))
-                return True
-            logger.warning(
-                "Callback attempt %d failed: %d %s",
-                attempt,
-                resp.status_code,
-                resp.text[:200] if resp.text else "",
-            )
-        except Exception as e:
-            logger.warning("Callback attempt %d error: %s", attempt, str(e))
-
-        if attempt < CALLBACK_RETRY_COUNT:
-            import time
-            time.sleep(1)
-
-    logger.warning("Callback failed after %d attempts for sessionId=%s", CALLBACK_RETRY_COUNT, session_id)
-    return False
+def has_pending_callback(session: Session) -> bool:
+    """Callback-eligible session whose current intelligence has not been queued yet."""
+    return (
+        session.scam_detected
+        and session.turn_count >= MIN_TURNS_BEFORE_CALLBACK
+        and session.callback_queued_fingerprint != intelligence_fingerprint(session.intel)
+    )
 
 
-def should_send_callback(session: Session) -> bool:
+def should_send_callback(session: Session, now: Optional[float] = None) -> bool:
     """
     Return True when conditions met:
     - scam_detected
     - turn_count >= MIN_TURNS_BEFORE_CALLBACK (e.g., 5)
     - Not on turn 1
+    - Intelligence changed since the last queued callback, or CALLBACK_MAX_STALENESS elapsed
+      since it was queued (this also re-sends a callback the outbox dropped)
     """
     if not session.scam_detected:
         return False
     if session.turn_count < MIN_TURNS_BEFORE_CALLBACK:
         return False
-    return True
+    if session.callback_queued_fingerprint != intelligence_fingerprint(session.intel):
+        return True
+    if now is None:
+        now = time.time()
+    return now - session.callback_queued_at >= CALLBACK_MAX_STALENESS
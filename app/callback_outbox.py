@@ -0,0 +1,321 @@
+"""
+Background callback dispatcher - durable outbox + pooled client + backoff.
+
+Payloads are written to a SQLite outbox before the request returns, then delivered
+by a background task. Pending rows survive restarts and are retried on next start.
+Each session has at most one pending row: a newer payload replaces the queued one,
+so bursts collapse into a single delivery. Workers sharing the outbox file claim rows
+before posting them, so each row is in flight in at most one worker.
+"""
+import asyncio
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import httpx
+
+from app.config import (
+    CALLBACK_URL,
+    CALLBACK_TIMEOUT,
+    CALLBACK_OUTBOX_PATH,
+    CALLBACK_MAX_ATTEMPTS,
+    CALLBACK_BACKOFF_BASE,
+    CALLBACK_BACKOFF_MAX,
+    CALLBACK_CONCURRENCY,
+    CALLBACK_SHUTDOWN_TIMEOUT,
+    CALLBACK_CLAIM_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+_LATENCY_WINDOW = 1024
+
+
+def backoff_delay(attempts: int, base: float = CALLBACK_BACKOFF_BASE, cap: float = CALLBACK_BACKOFF_MAX) -> float:
+    """Exponential backoff with equal jitter: half fixed, half random."""
+    delay = min(cap, base * (2 ** max(0, attempts - 1)))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class CallbackOutbox:
+    """SQLite-backed queue of pending callback payloads."""
+
+    def __init__(self, path: str = CALLBACK_OUTBOX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " session_id TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " next_attempt_at REAL NOT NULL,"
+            " enqueued_at REAL NOT NULL,"
+            " claimed_until REAL NOT NULL DEFAULT 0)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(outbox)")}
+        if "claimed_until" not in columns:  # outbox written by an older version
+            self._conn.execute("ALTER TABLE outbox ADD COLUMN claimed_until REAL NOT NULL DEFAULT 0")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS outbox_due ON outbox (next_attempt_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS outbox_session ON outbox (session_id)")
+
+    def enqueue(self, payload: Dict[str, Any]) -> Tuple[int, bool]:
+        """
+        Persist payload; returns (row id, coalesced).
+        If the session already has a pending row that no worker is delivering, its payload is
+        replaced in place and keeps its schedule.
+        """
+        session_id = str(payload.get("sessionId", ""))
+        body = json.dumps(payload)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM outbox WHERE session_id = ? AND claimed_until <= ? LIMIT 1",
+                (session_id, now),
+            ).fetchone()
+            if row is not None:
+                self._conn.execute("UPDATE outbox SET payload = ? WHERE id = ?", (body, row[0]))
+                return row[0], True
+            cur = self._conn.execute(
+                "INSERT INTO outbox (session_id, payload, next_attempt_at, enqueued_at) VALUES (?, ?, ?, ?)",
+                (session_id, body, now, now),
+            )
+            return cur.lastrowid, False
+
+    def claim(
+        self, limit: int, due_by: Optional[float] = None, lease: float = CALLBACK_CLAIM_SECONDS
+    ) -> List[Tuple[int, Dict[str, Any], int, float]]:
+        """
+        Claim up to limit rows scheduled by due_by (default now) that no worker holds, for
+        lease seconds: (id, payload, attempts, enqueued_at). remove(), reschedule() or
+        release() ends the claim.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "UPDATE outbox SET claimed_until = ? WHERE id IN ("
+                    " SELECT id FROM outbox WHERE next_attempt_at <= ? AND claimed_until <= ?"
+                    " ORDER BY next_attempt_at LIMIT ?)"
+                    " RETURNING id, payload, attempts, enqueued_at",
+                    (now + lease, now if due_by is None else due_by, now, limit),
+                ).fetchall()
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [(rid, json.loads(p), attempts, enq) for rid, p, attempts, enq in rows]
+
+    def next_due_at(self) -> Optional[float]:
+        """Earliest time a row may be claimed, or None if empty."""
+        with self._lock:
+            row = self._conn.execute("SELECT MIN(MAX(next_attempt_at, claimed_until)) FROM outbox").fetchone()
+        return row[0] if row else None
+
+    def superseded(self, session_id: str, row_id: int) -> bool:
+        """True if a newer row for the same session is queued behind row_id."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM outbox WHERE session_id = ? AND id > ? LIMIT 1", (session_id, row_id)
+            ).fetchone()
+        return row is not None
+
+    def remove(self, row_id: int) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM outbox WHERE id = ?", (row_id,))
+
+    def reschedule(self, row_id: int, attempts: int, next_attempt_at: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE outbox SET attempts = ?, next_attempt_at = ?, claimed_until = 0 WHERE id = ?",
+                (attempts, next_attempt_at, row_id),
+            )
+
+    def release(self, row_id: int) -> None:
+        """Give up a claim without recording an attempt (delivery was interrupted)."""
+        with self._lock:
+            self._conn.execute("UPDATE outbox SET claimed_until = 0 WHERE id = ?", (row_id,))
+
+    def depth(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CallbackDispatcher:
+    """
+    Delivers outbox rows in the background over one keep-alive client.
+    submit() is safe to call before start(); rows wait on disk until the worker runs.
+    """
+
+    def __init__(
+        self,
+        url: str = CALLBACK_URL,
+        outbox_path: str = CALLBACK_OUTBOX_PATH,
+        max_attempts: int = CALLBACK_MAX_ATTEMPTS,
+        concurrency: int = CALLBACK_CONCURRENCY,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.url = url
+        self.outbox_path = outbox_path
+        self.max_attempts = max_attempts
+        self.concurrency = concurrency
+        self._transport = transport
+        self._outbox: Optional[CallbackOutbox] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._latencies: Deque[float] = deque(maxlen=_LATENCY_WINDOW)
+        self.coalesced = 0
+        self.delivered = 0
+        self.failed_attempts = 0
+        self.dropped = 0
+
+    @property
+    def outbox(self) -> CallbackOutbox:
+        if self._outbox is None:
+            self._outbox = CallbackOutbox(self.outbox_path)
+        return self._outbox
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def submit(self, payload: Dict[str, Any]) -> int:
+        """Persist payload and wake the worker. Never blocks on the network."""
+        row_id, coalesced = self.outbox.enqueue(payload)
+        if coalesced:
+            self.coalesced += 1
+            return row_id
+        if self._wake is not None:
+            self._wake.set()
+        return row_id
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._stopping = False
+        self._wake = asyncio.Event()
+        self._client = httpx.AsyncClient(
+            timeout=CALLBACK_TIMEOUT,
+            transport=self._transport,
+            limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+            headers={"Content-Type": "application/json"},
+        )
+        self._task = asyncio.create_task(self._run())
+        logger.info("Callback dispatcher started (pending=%d)", self.outbox.depth())
+
+    async def stop(self, timeout: float = CALLBACK_SHUTDOWN_TIMEOUT) -> None:
+        """Stop the worker, then make one last delivery pass over everything pending."""
+        self._stopping = True
+        if self._task is not None:
+            self._wake.set()
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._client is not None:
+            try:
+                await asyncio.wait_for(self.flush(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Callback flush timed out; %d left in outbox", self.outbox.depth())
+            await self._client.aclose()
+            self._client = None
+
+    async def flush(self) -> None:
+        """Attempt every pending row once, ignoring backoff schedules."""
+        rows = self.outbox.claim(limit=1_000_000, due_by=float("inf"))
+        for i in range(0, len(rows), self.concurrency):
+            await self._deliver_batch(rows[i:i + self.concurrency])
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            rows = self.outbox.claim(limit=self.concurrency)
+            if rows:
+                await self._deliver_batch(rows)
+                continue
+            next_at = self.outbox.next_due_at()
+            wait = None if next_at is None else max(0.0, next_at - time.time())
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _deliver_batch(self, rows: List[Tuple[int, Dict[str, Any], int, float]]) -> None:
+        await asyncio.gather(*(self._deliver(*row) for row in rows))
+
+    async def _deliver(self, row_id: int, payload: Dict[str, Any], attempts: int, enqueued_at: float) -> bool:
+        settled = False
+        try:
+            delivered = await self._post(row_id, payload, attempts + 1, enqueued_at)
+            settled = True
+            return delivered
+        finally:
+            if not settled:  # cancelled mid-post (shutdown): let the flush or another worker retry it
+                self.outbox.release(row_id)
+
+    async def _post(self, row_id: int, payload: Dict[str, Any], attempts: int, enqueued_at: float) -> bool:
+        session_id = payload.get("sessionId", "?")
+        try:
+            resp = await self._client.post(self.url, json=payload)
+            if 200 <= resp.status_code < 300:
+                self.outbox.remove(row_id)
+                self.delivered += 1
+                self._latencies.append(time.time() - enqueued_at)
+                logger.info("Callback sent successfully for session %s (attempt %d)", session_id, attempts)
+                return True
+            logger.warning("Callback attempt %d failed: %d %s", attempts, resp.status_code, resp.text[:200])
+        except Exception as e:
+            logger.warning("Callback attempt %d error: %s", attempts, str(e))
+
+        self.failed_attempts += 1
+        if self.outbox.superseded(str(session_id), row_id):
+            # A newer payload for this session is already queued; retrying this one is wasted work.
+            self.outbox.remove(row_id)
+            self.coalesced += 1
+        elif attempts >= self.max_attempts:
+            self.outbox.remove(row_id)
+            self.dropped += 1
+            logger.warning("Callback dropped after %d attempts for sessionId=%s", attempts, session_id)
+        else:
+            self.outbox.reschedule(row_id, attempts, time.time() + backoff_delay(attempts))
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, outcome counters and delivery latency (enqueue → 2xx)."""
+        lat = sorted(self._latencies)
+
+        def pct(p: float) -> Optional[float]:
+            if not lat:
+                return None
+            return round(lat[min(len(lat) - 1, int(p * len(lat)))], 4)
+
+        return {
+            "queueDepth": self._outbox.depth() if self._outbox is not None else 0,  # don't create the file
+            "running": self.running,
+            "coalesced": self.coalesced,
+            "delivered": self.delivered,
+            "failedAttempts": self.failed_attempts,
+            "dropped": self.dropped,
+            "latencySeconds": {"p50": pct(0.50), "p95": pct(0.95), "max": round(lat[-1], 4) if lat else None},
+        }
+
+
+dispatcher = CallbackDispatcher()
@@ -0,0 +1,158 @@
+"""
+Streaming campaign clustering - near-duplicate scammer messages (the same script with small
+edits) are grouped with MinHash signatures and LSH banding.
+
+Each message costs one hash per word bigram plus BANDS dict lookups, independent of how
+many clusters exist. Clusters live in an LRU bounded by CAMPAIGN_MAX_CLUSTERS; evicting a
+cold cluster also drops its LSH buckets, so memory stays flat on unbounded streams.
+"""
+import hashlib
+import re
+import struct
+import threading
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from app.config import CAMPAIGN_MAX_CLUSTERS, CAMPAIGN_MIN_TOKENS, CAMPAIGN_SIMILARITY
+
+# 24 16-bit MinHash values per message, in 8 bands of 3: messages with Jaccard similarity
+# s share at least one band with probability 1 - (1 - s^3)^8 (~0.65 at s=0.5, ~0.98 at s=0.8).
+BANDS, ROWS = 8, 3
+NUM_HASHES = BANDS * ROWS
+_HASH_VALUES = struct.Struct(f"<{NUM_HASHES}H")
+_KEYS_PER_CLUSTER = BANDS * 8  # LSH buckets a cluster may own (its most recent variants)
+
+_WORD = re.compile(r"[^\W\d_]+")  # letters only: amounts, numbers and IDs vary between copies
+
+
+def _shingles(text: str) -> List[str]:
+    """Word bigrams of the lowercased text."""
+    tokens = _WORD.findall(text.lower())
+    if len(tokens) < CAMPAIGN_MIN_TOKENS:
+        return []
+    return [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def signature(text: str) -> Optional[Tuple[int, ...]]:
+    """MinHash signature of text, or None if it is too short to cluster."""
+    shingles = _shingles(text)
+    if not shingles:
+        return None
+    # one digest per shingle yields all NUM_HASHES hash functions; column minimums in C
+    rows = [
+        _HASH_VALUES.unpack(hashlib.blake2b(s.encode("utf-8", "surrogatepass"), digest_size=2 * NUM_HASHES).digest())
+        for s in dict.fromkeys(shingles)
+    ]
+    return tuple(map(min, zip(*rows)))
+
+
+def similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(x == y for x, y in zip(a, b)) / NUM_HASHES
+
+
+def _band_keys(sig: Tuple[int, ...]) -> List[int]:
+    return [
+        (band << 48) | (sig[i] << 32) | (sig[i + 1] << 16) | sig[i + 2]
+        for band, i in enumerate(range(0, NUM_HASHES, ROWS))
+    ]
+
+
+class _Cluster:
+    __slots__ = ("cluster_id", "signature", "keys", "size")
+
+    def __init__(self, cluster_id: str, sig: Tuple[int, ...]):
+        self.cluster_id = cluster_id
+        self.signature = sig  # first message; candidates are verified against it
+        self.keys: Deque[int] = deque()  # LSH buckets pointing at this cluster, oldest first
+        self.size = 0
+
+
+class CampaignClusters:
+    """Assigns messages to campaign clusters as they stream in."""
+
+    def __init__(self, max_clusters: int = CAMPAIGN_MAX_CLUSTERS, threshold: float = CAMPAIGN_SIMILARITY):
+        self.max_clusters = max_clusters
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._clusters: "OrderedDict[str, _Cluster]" = OrderedDict()  # LRU, coldest first
+        self._buckets: Dict[int, str] = {}  # band key -> cluster ID
+        self.assigned = 0
+        self.created = 0
+        self.evicted = 0
+
+    def assign(self, text: str) -> Optional[str]:
+        """Cluster ID for text (a new cluster if nothing similar is known), or None if too short."""
+        sig = signature(text)
+        if sig is None or self.max_clusters <= 0:
+            return None
+        keys = _band_keys(sig)
+        with self._lock:
+            cluster = self._match(sig, keys)
+            if cluster is None:
+                cluster_id = hashlib.blake2b(_HASH_VALUES.pack(*sig), digest_size=6).hexdigest()
+                cluster = self._clusters.get(cluster_id)
+                if cluster is None:  # else: same first message as a cluster whose buckets were trimmed
+                    cluster = self._clusters[cluster_id] = _Cluster(cluster_id, sig)
+                    self.created += 1
+            self._claim(cluster, keys)
+            cluster.size += 1
+            self.assigned += 1
+            self._clusters.move_to_end(cluster.cluster_id)
+            while len(self._clusters) > self.max_clusters:
+                self._evict(next(iter(self._clusters)))
+            return cluster.cluster_id
+
+    def _match(self, sig: Tuple[int, ...], keys: List[int]) -> Optional[_Cluster]:
+        hits: Dict[str, int] = {}
+        for key in keys:
+            cluster_id = self._buckets.get(key)
+            if cluster_id is not None:
+                hits[cluster_id] = hits.get(cluster_id, 0) + 1
+        for cluster_id in sorted(hits, key=hits.get, reverse=True):
+            cluster = self._clusters[cluster_id]
+            if similarity(sig, cluster.signature) >= self.threshold:
+                return cluster
+        return None
+
+    def _claim(self, cluster: _Cluster, keys: List[int]) -> None:
+        """Point keys at cluster, keeping at most _KEYS_PER_CLUSTER buckets per cluster."""
+        for key in keys:
+            if self._buckets.get(key) != cluster.cluster_id:
+                self._buckets[key] = cluster.cluster_id
+                cluster.keys.append(key)
+        while len(cluster.keys) > _KEYS_PER_CLUSTER:
+            key = cluster.keys.popleft()
+            if self._buckets.get(key) == cluster.cluster_id:
+                del self._buckets[key]
+
+    def _evict(self, cluster_id: str) -> None:
+        cluster = self._clusters.pop(cluster_id)
+        for key in cluster.keys:
+            if self._buckets.get(key) == cluster_id:
+                del self._buckets[key]
+        self.evicted += 1
+
+    def size(self, cluster_id: str) -> int:
+        """Messages assigned to a cluster while it has been resident (0 once evicted)."""
+        with self._lock:
+            cluster = self._clusters.get(cluster_id)
+            return cluster.size if cluster else 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "clusters": len(self._clusters),
+                "buckets": len(self._buckets),
+                "assigned": self.assigned,
+                "created": self.created,
+                "evicted": self.evicted,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clusters.clear()
+            self._buckets.clear()
+
+
+clusters = CampaignClusters()
@@ -17,15 +17,94 @@ if not API_KEY:
 
 # Optional: OpenAI API key for LLM agent
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "").strip() or None
+# Optional: OpenAI-compatible endpoint (e.g. the loadtest/fake_llm.py stand-in)
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "").strip() or None
 
 # Callback configuration
-CALLBACK_URL = "https://hackathon.guvi.in/api/updateHoneyPotFinalResult"
-CALLBACK_RETRY_COUNT = 3
+CALLBACK_URL = os.getenv("CALLBACK_URL", "").strip() or "https://hackathon.guvi.in/api/updateHoneyPotFinalResult"
 CALLBACK_TIMEOUT = 5  # seconds
 MIN_TURNS_BEFORE_CALLBACK = 5
+# Re-send unchanged intelligence at most this often (seconds); changes are sent right away
+CALLBACK_MAX_STALENESS = float(os.getenv("CALLBACK_MAX_STALENESS", "120"))
+
+# Background callback dispatcher (outbox survives restarts)
+CALLBACK_OUTBOX_PATH = os.getenv("CALLBACK_OUTBOX_PATH", "callback_outbox.db")
+CALLBACK_MAX_ATTEMPTS = int(os.getenv("CALLBACK_MAX_ATTEMPTS", "8"))
+CALLBACK_BACKOFF_BASE = float(os.getenv("CALLBACK_BACKOFF_BASE", "0.5"))  # seconds
+CALLBACK_BACKOFF_MAX = float(os.getenv("CALLBACK_BACKOFF_MAX", "60"))  # seconds
+CALLBACK_CONCURRENCY = int(os.getenv("CALLBACK_CONCURRENCY", "8"))
+CALLBACK_SHUTDOWN_TIMEOUT = float(os.getenv("CALLBACK_SHUTDOWN_TIMEOUT", "10"))  # seconds
+# How long a worker holds a row it is delivering; a worker that dies mid-delivery loses it after this
+CALLBACK_CLAIM_SECONDS = float(os.getenv("CALLBACK_CLAIM_SECONDS", "60"))
+
+# Session backend: memory (per process) or sqlite (shared by workers on one host)
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory").lower()
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "sessions.db")
+SESSION_LOCK_STRIPES = int(os.getenv("SESSION_LOCK_STRIPES", "64"))  # memory backend: independent lock stripes
+
+# Session store bounds (0 disables a limit)
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", "3600"))  # idle time before expiry
+SESSION_MAX_COUNT = int(os.getenv("SESSION_MAX_COUNT", "200000"))
+SESSION_MAX_BYTES = int(os.getenv("SESSION_MAX_BYTES", "0"))  # approximate
+
+# Detector: optional decay-weighted escalation across a session's messages
+DETECTOR_DECAY_ENABLED = os.getenv("DETECTOR_DECAY_ENABLED", "").strip().lower() in ("1", "true", "yes")
+DETECTOR_DECAY = float(os.getenv("DETECTOR_DECAY", "0.7"))  # weight kept per message
+DETECTOR_DECAY_THRESHOLD = float(os.getenv("DETECTOR_DECAY_THRESHOLD", "2.5"))
+
+# Batch scoring/extraction (process pool)
+BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", "500"))
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "0")) or (os.cpu_count() or 1)
+BATCH_MAX_MESSAGES = int(os.getenv("BATCH_MAX_MESSAGES", "10000"))  # per HTTP request
 
 # LLM configuration
 LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))  # per request; replies are also bounded by REPLY_BUDGET_*
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))  # in-flight LLM calls per process
+# Circuit breaker: open when the last LLM_BREAKER_WINDOW calls (at least LLM_BREAKER_MIN_CALLS) fail or
+# are slower than LLM_BREAKER_SLOW_SECONDS at LLM_BREAKER_ERROR_RATE or more; retry after the cooldown
+LLM_BREAKER_WINDOW = int(os.getenv("LLM_BREAKER_WINDOW", "20"))
+LLM_BREAKER_MIN_CALLS = int(os.getenv("LLM_BREAKER_MIN_CALLS", "5"))
+LLM_BREAKER_ERROR_RATE = float(os.getenv("LLM_BREAKER_ERROR_RATE", "0.5"))
+LLM_BREAKER_SLOW_SECONDS = float(os.getenv("LLM_BREAKER_SLOW_SECONDS", "10"))
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))
+
+# Prompt window: history sent verbatim is capped by message count and estimated tokens;
+# older messages are folded into a per-session summary
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "600"))
+PROMPT_RECENT_MESSAGES = int(os.getenv("PROMPT_RECENT_MESSAGES", "8"))
+PROMPT_SUMMARY_NOTES = int(os.getenv("PROMPT_SUMMARY_NOTES", "6"))
+
+# Template tier: rule-based replies at or above this confidence skip the LLM (above 1 disables)
+REPLY_TEMPLATE_MIN_CONFIDENCE = float(os.getenv("REPLY_TEMPLATE_MIN_CONFIDENCE", "0.8"))
+
+# Reply latency budget (seconds): past it the agent answers with a fallback and lets the LLM finish
+# in the background. Per-channel overrides; unknown/missing channels use REPLY_BUDGET_SECONDS.
+REPLY_BUDGET_SECONDS = float(os.getenv("REPLY_BUDGET_SECONDS", "4"))
+REPLY_BUDGET_BY_CHANNEL = {
+    "SMS": float(os.getenv("REPLY_BUDGET_SMS", "2")),
+    "WHATSAPP": float(os.getenv("REPLY_BUDGET_WHATSAPP", "3")),
+    "CHAT": float(os.getenv("REPLY_BUDGET_CHAT", "3")),
+    "EMAIL": float(os.getenv("REPLY_BUDGET_EMAIL", "10")),
+}
+
+# Reply cache: LLM replies reused across sessions sending the same script (size 0 disables)
+REPLY_CACHE_SIZE = int(os.getenv("REPLY_CACHE_SIZE", "10000"))
+REPLY_CACHE_TTL = float(os.getenv("REPLY_CACHE_TTL", "900"))  # seconds
+REPLY_CACHE_VARIANTS = int(os.getenv("REPLY_CACHE_VARIANTS", "3"))  # distinct replies kept per key
+REPLY_CACHE_HISTORY = int(os.getenv("REPLY_CACHE_HISTORY", "4"))  # recent history messages in the key
+
+# Campaign clustering: near-duplicate scammer messages share a cluster ID (MinHash/LSH)
+CAMPAIGN_MAX_CLUSTERS = int(os.getenv("CAMPAIGN_MAX_CLUSTERS", "50000"))  # LRU bound (0 disables)
+CAMPAIGN_SIMILARITY = float(os.getenv("CAMPAIGN_SIMILARITY", "0.5"))  # estimated Jaccard of word bigrams
+CAMPAIGN_MIN_TOKENS = int(os.getenv("CAMPAIGN_MIN_TOKENS", "4"))  # shorter messages are not clustered
+
+# Per-request tracing (opt-in). Server-Timing header: "header" = only when the request sends
+# x-debug-trace: 1, "always", or "off". Profiles and slow-request stacks go to PROFILE_DIR.
+TRACE_SERVER_TIMING = os.getenv("TRACE_SERVER_TIMING", "header").strip().lower()
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))  # fraction of requests run under cProfile
+PROFILE_SLOW_SECONDS = float(os.getenv("PROFILE_SLOW_SECONDS", "0"))  # dump the stack of requests slower than this (0 = off)
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
 
 # Fallback replies
 FALLBACK_REPLY_NON_SCAM = "Can you explain what you mean?"
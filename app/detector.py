@@ -1,28 +1,20 @@
 """
 Scam detection logic.
 """
-from typing import List
-
-from app.models import Message
-
-# Keyword categories with weights
-URGENCY_KEYWORDS = [
-    "immediately", "urgent", "today", "now", "blocked", "verify now",
-    "act fast", "asap", "suspended", "expire", "deadline"
-]
-FINANCIAL_KEYWORDS = [
-    "bank", "account", "upi", "payment", "transfer", "balance",
-    "blocked", "suspended", "verify", "compliance", "fund", "money",
-    "transaction", "refund", "reward", "prize", "lottery"
-]
-AUTHORITY_KEYWORDS = [
-    "official", "bank", "verification", "compliance", "department",
-    "reserve bank", "rbi", "government", "income tax"
-]
-ACTION_KEYWORDS = [
-    "click", "share", "send", "verify", "link", "otp", "call",
-    "register", "update", "confirm", "submit"
-]
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.config import DETECTOR_DECAY_ENABLED, DETECTOR_DECAY, DETECTOR_DECAY_THRESHOLD
+from app.keywords import (  # noqa: F401 - lists re-exported for callers
+    MATCHER,
+    URGENCY_KEYWORDS,
+    FINANCIAL_KEYWORDS,
+    AUTHORITY_KEYWORDS,
+    ACTION_KEYWORDS,
+)
+from app.models import Message, hash_message, history_hash
+
+# Category weights; keyword lists live in app.keywords
+CATEGORY_WEIGHTS = {"urgency": 2, "financial": 2, "authority": 1, "action": 1}
 
 # Benign greetings - never treat as scam
 BENIGN_GREETINGS = {"hi", "hello", "hey", "good morning", "good afternoon", "good evening"}
@@ -30,60 +22,147 @@ BENIGN_GREETINGS = {"hi", "hello", "hey", "good morning", "good afternoon", "goo
 SCAM_THRESHOLD = 2
 
 
-def _score_message(text: str) -> int:
-    """Score message for scam signals. Higher = more likely scam."""
+def _score_categories(text: str) -> Tuple[int, Set[str]]:
+    """Score message for scam signals and return the keyword categories that fired."""
+    hits: Set[str] = set()
     if not text or not text.strip():
-        return 0
+        return 0, hits
 
     text_lower = text.lower().strip()
 
     # Benign greetings alone → not scam
     if text_lower in BENIGN_GREETINGS:
-        return 0
+        return 0, hits
     if len(text_lower) <= 3 and text_lower in ("hi", "hey", "ok"):
-        return 0
-
-    score = 0
+        return 0, hits
 
-    # Urgency (weight 2)
-    for kw in URGENCY_KEYWORDS:
-        if kw in text_lower:
-            score += 2
-            break
+    # One matcher pass; a category counts once no matter how many of its keywords hit
+    hits = MATCHER.categories(text_lower, CATEGORY_WEIGHTS)
+    score = sum(CATEGORY_WEIGHTS[cat] for cat in hits)
 
-    # Financial (weight 2)
-    for kw in FINANCIAL_KEYWORDS:
-        if kw in text_lower:
-            score += 2
-            break
+    return score, hits
 
-    # Authority (weight 1)
-    for kw in AUTHORITY_KEYWORDS:
-        if kw in text_lower:
-            score += 1
-            break
 
-    # Action (weight 1)
-    for kw in ACTION_KEYWORDS:
-        if kw in text_lower:
-            score += 1
-            break
+def _score_message(text: str) -> int:
+    """Score message for scam signals. Higher = more likely scam."""
+    return _score_categories(text)[0]
 
-    return score
 
+class ScoreState:
+    """
+    Running per-session scoring state, so each turn scores only text it has not seen.
+    max_score covers scammer messages in conversationHistory (as today's prev_score);
+    escalation/category_hits/turns also include current messages, each counted once.
+    """
 
-def detect_scam(message_text: str, conversation_history: List[Message]) -> bool:
+    __slots__ = ("history_len", "history_digest", "max_score", "escalation", "category_hits", "turns", "_pending")
+
+    def __init__(self):
+        self.history_len = 0  # conversationHistory messages folded into max_score
+        self.history_digest = b""  # history_hash of those messages
+        self.max_score = 0
+        self.escalation = 0.0  # decay-weighted sum of per-message scores
+        self.category_hits: Dict[str, int] = {}
+        self.turns = 0
+        self._pending: Dict[str, int] = {}  # current-message text -> score, until it shows up in history
+
+    def reset(self) -> None:
+        self.__init__()
+
+    def to_dict(self) -> dict:
+        """JSON-safe snapshot (for persistent session backends)."""
+        return {
+            "history_len": self.history_len,
+            "history_digest": self.history_digest.hex(),
+            "max_score": self.max_score,
+            "escalation": self.escalation,
+            "category_hits": dict(self.category_hits),
+            "turns": self.turns,
+            "pending": dict(self._pending),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ScoreState":
+        state = cls()
+        state.history_len = data.get("history_len", 0)
+        state.history_digest = bytes.fromhex(data.get("history_digest", ""))
+        state.max_score = data.get("max_score", 0)
+        state.escalation = data.get("escalation", 0.0)
+        state.category_hits = dict(data.get("category_hits", {}))
+        state.turns = data.get("turns", 0)
+        state._pending = dict(data.get("pending", {}))
+        return state
+
+    def _count(self, score: int, hits: Set[str], decay: float) -> None:
+        self.escalation = self.escalation * decay + score
+        for cat in hits:
+            self.category_hits[cat] = self.category_hits.get(cat, 0) + 1
+        self.turns += 1
+
+    def fold_history(self, conversation_history: List[Message], decay: float = DETECTOR_DECAY) -> int:
+        """Score history messages not folded yet; return max scammer score so far."""
+        n = self.history_len
+        h = history_hash(conversation_history[:n]) if n <= len(conversation_history) else None
+        if h is None or (n and h.digest() != self.history_digest):
+            # Client rewrote or truncated any folded message: start over
+            self.reset()
+            n = 0
+            h = history_hash([])
+        for msg in conversation_history[n:]:
+            hash_message(h, msg)
+            if msg.sender != "scammer":
+                continue
+            if msg.text in self._pending:
+                score = self._pending.pop(msg.text)
+            else:
+                score, hits = _score_categories(msg.text)
+                self._count(score, hits, decay)
+            if score > self.max_score:
+                self.max_score = score
+        self.history_digest = h.digest()
+        self.history_len = len(conversation_history)
+        return self.max_score
+
+    def observe_current(self, text: str, score: int, hits: Set[str], decay: float = DETECTOR_DECAY) -> None:
+        """Count the current message now; it is reused when it reappears in history."""
+        self._count(score, hits, decay)
+        self._pending = {text: score}
+
+
+def detect_scam(
+    message_text: str,
+    conversation_history: List[Message],
+    state: Optional[ScoreState] = None,
+    decay_mode: Optional[bool] = None,
+) -> bool:
     """
     Detect if message indicates scam intent.
     Returns True if scam detected, False otherwise.
+
+    With a per-session ScoreState only new messages are scored; the verdict is the same
+    as the stateless path. decay_mode (default DETECTOR_DECAY_ENABLED) additionally flags
+    a scoring message once the decay-weighted escalation reaches DETECTOR_DECAY_THRESHOLD.
     """
     if not message_text:
         return False
 
-    score = _score_message(message_text)
+    if decay_mode is None:
+        decay_mode = DETECTOR_DECAY_ENABLED
+    if decay_mode and state is None:
+        state = ScoreState()
+
+    score, hits = _score_categories(message_text)
 
     # Boost score if follow-up message escalates (e.g., first vague, second asks for UPI)
-    if conversation_history:
+    if state is not None:
+        prev_score = state.fold_history(conversation_history)
+        escalation = state.escalation * DETECTOR_DECAY + score
+        state.observe_current(message_text, score, hits)
+        if prev_score > 0 and score > 0:
+            score += 1  # Escalation boost
+        if decay_mode and score > 0 and escalation >= DETECTOR_DECAY_THRESHOLD:
+            return True
+    elif conversation_history:
         # Check if any previous scammer message had high score
         scammer_texts = [m.text for m in conversation_history if m.sender == "scammer"]
         if scammer_texts:
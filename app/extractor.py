@@ -2,89 +2,104 @@
 Intelligence extraction - UPI, bank accounts, links, phone numbers, keywords.
 """
 import re
-from typing import List
+from functools import lru_cache
+from typing import Dict, List, Tuple
 
+from app.keywords import MATCHER, SUSPICIOUS_KEYWORDS  # noqa: F401 - list re-exported
 from app.models import Message, ExtractedIntelligence
 
+# All entity types in one pattern, so the text is scanned once. At each position the
+# alternatives are tried in priority order - link > UPI > phone > bank - and a matched span
+# is never reported as another type (digits inside a URL or UPI ID, a 10-digit mobile
+# number that would also fit the bank-account length). Everything except +91 numbers
+# starts at a word boundary, which lets the scanner skip mid-word positions cheaply.
+
+# URLs
+_LINK = r"(?P<link>https?://[^\s<>\"']+)"
 # UPI: xxx@paytm, xxx@ybl, xxx@okaxis, etc. or generic xxx@xxx
-UPI_PATTERN = re.compile(
-    r"\b[\w][\w.-]*@(?:paytm|ybl|okaxis|phonepe|paypal|bank|upi|axl|ibl|icici|kotak|"
-    r"okbizaxis|fam|jupiteraxis|indus|federal|postbank|sbi|hdfc|pnb|payzapp|[\w.-]+)\b",
-    re.IGNORECASE
+_UPI = (
+    r"(?P<upi>\w[\w.-]*+@(?:paytm|ybl|okaxis|phonepe|paypal|bank|upi|axl|ibl|icici|kotak|"
+    r"okbizaxis|fam|jupiteraxis|indus|federal|postbank|sbi|hdfc|pnb|payzapp|[\w.-]+)\b)"
 )
-# Fallback: any email-like for UPI (xxx@xxx)
-UPI_FALLBACK_PATTERN = re.compile(r"\b[\w][\w.-]*@[\w.-]+\b")
+# Indian mobile: 6-9 and 9 more digits, optionally with a trunk 0
+_PHONE = r"(?P<phone>0?[6-9]\d{9}\b)"
+# Bank account: 9-18 digits, or 4-digit groups separated by spaces/dashes
+_BANK = r"(?P<bank>(?:\d{4}(?:[\s-]\d{4}){1,3}(?:[\s-]\d{1,6})?|\d{9,18})\b)"
+# Indian mobile with country code
+_PHONE_INTL = r"(?P<phone_intl>\+91[-\s]?[6-9]\d{9}\b)"
 
-# Bank account: 9-18 digits, optionally with spaces/dashes
-BANK_PATTERN = re.compile(
-    r"\b(?:(?:\d{4}[\s-]?){2,4}\d{0,6}|\d{9,18})\b"
-)
-# Filter: exclude pure years (4 digits only), timestamps
-YEAR_PATTERN = re.compile(r"^\d{4}$")
 
-# URLs
-URL_PATTERN = re.compile(r"https?://[^\s<>\"']+")
+@lru_cache(maxsize=None)
+def _entity_pattern(link: bool, upi: bool, phone: bool, bank: bool) -> "re.Pattern[str]":
+    """The combined pattern restricted to the given types (priority order is unchanged)."""
+    word = [src for on, src in ((link, _LINK), (upi, _UPI), (phone, _PHONE), (bank, _BANK)) if on]
+    parts = [r"\b(?:" + "|".join(word) + ")"] if word else []
+    if phone:
+        parts.append(_PHONE_INTL)
+    return re.compile("|".join(parts))
+
+
+ENTITY_PATTERN = _entity_pattern(True, True, True, True)
+
+# Prefilters: each type's branch can only match if its check passes ("http" for links, "@" for
+# UPI IDs, a run of 10 digits for phones, of 4 for bank accounts). Leaving out branches that
+# cannot match anywhere gives the same spans, and most messages skip the regex altogether.
+_DIGITS_TO_ZERO = bytes.maketrans(b"0123456789", b"0000000000")
+_DIGIT_RUN_4 = re.compile(r"\d{4}")
+_DIGIT_RUN_10 = re.compile(r"\d{10}")
 
-# Indian phone: +91 followed by 6-9 and 9 digits, or 10 digits starting with 6-9
-PHONE_PATTERN = re.compile(
-    r"(?:\+91[-\s]?)?[6-9]\d{9}\b|"
-    r"\+91[6-9]\d{9}\b"
-)
 
-# Suspicious keywords to extract
-SUSPICIOUS_KEYWORDS = [
-    "urgent", "immediately", "blocked", "verify", "suspended", "account",
-    "upi", "bank", "payment", "transfer", "click", "link", "otp",
-    "compliance", "official", "verification"
-]
-
-
-def _extract_upi(text: str) -> List[str]:
-    """Extract UPI IDs from text."""
-    matches = UPI_PATTERN.findall(text)
-    if not matches:
-        matches = UPI_FALLBACK_PATTERN.findall(text)
-    return list(dict.fromkeys(matches))
-
-
-def _extract_bank_accounts(text: str) -> List[str]:
-    """Extract bank account-like sequences."""
-    results = []
-    for match in BANK_PATTERN.finditer(text):
-        val = match.group().replace(" ", "").replace("-", "")
-        if len(val) < 9:
-            continue
-        if YEAR_PATTERN.match(val):
-            continue
-        results.append(val)
-    return list(dict.fromkeys(results))
-
-
-def _extract_links(text: str) -> List[str]:
-    """Extract URLs from text."""
-    matches = URL_PATTERN.findall(text)
-    return list(dict.fromkeys(matches))
-
-
-def _extract_phones(text: str) -> List[str]:
-    """Extract Indian phone numbers."""
-    results = []
-    for match in PHONE_PATTERN.finditer(text):
-        val = re.sub(r"[-\s]", "", match.group())
-        if val.startswith("+91"):
-            val = val
-        elif len(val) == 10:
-            val = "+91" + val
-        if len(val) >= 12:
-            results.append(val)
-    return list(dict.fromkeys(results))
+def _digit_runs(text: str) -> Tuple[bool, bool]:
+    """(has a run of 4+ digits, has a run of 10+ digits)."""
+    if text.isascii():
+        digits = text.encode("ascii").translate(_DIGITS_TO_ZERO)
+        return b"0000" in digits, b"0000000000" in digits
+    # \d also matches non-ASCII digits, which the byte table does not cover
+    return _DIGIT_RUN_4.search(text) is not None, _DIGIT_RUN_10.search(text) is not None
+
+
+_SEPARATORS = re.compile(r"[-\s]")
+
+# ENTITY_PATTERN group name -> ExtractedIntelligence field
+_ENTITY_FIELDS = {
+    "link": "phishingLinks",
+    "upi": "upiIds",
+    "phone": "phoneNumbers",
+    "phone_intl": "phoneNumbers",
+    "bank": "bankAccounts",
+}
+
+
+def scan_entities(text: str) -> Dict[str, List[str]]:
+    """
+    Links, UPI IDs, phone numbers (normalized to +91XXXXXXXXXX) and bank accounts (digits
+    only) from one pass over text; each list deduplicated in order of first appearance.
+    """
+    found: Dict[str, Dict[str, None]] = {field: {} for field in _ENTITY_FIELDS.values()}
+    link, upi = "http" in text, "@" in text
+    bank, phone = _digit_runs(text)
+    if link or upi or bank:
+        _scan(_entity_pattern(link, upi, phone, bank), text, found)
+    return {field: list(values) for field, values in found.items()}
+
+
+def _scan(pattern: "re.Pattern[str]", text: str, found: Dict[str, Dict[str, None]]) -> None:
+    """Add pattern's matches in text to found (field -> ordered set), normalized."""
+    for match in pattern.finditer(text):
+        kind = match.lastgroup
+        val = match.group()
+        if kind == "phone" or kind == "phone_intl":
+            val = "+91" + _SEPARATORS.sub("", val)[-10:]
+        elif kind == "bank":
+            val = _SEPARATORS.sub("", val)
+            if len(val) < 9:
+                continue
+        found[_ENTITY_FIELDS[kind]][val] = None
 
 
 def _extract_suspicious_keywords(text: str) -> List[str]:
     """Extract suspicious keywords present in text."""
-    text_lower = text.lower()
-    found = [kw for kw in SUSPICIOUS_KEYWORDS if kw in text_lower]
-    return list(dict.fromkeys(found))
+    return MATCHER.match(text, ("suspicious",)).get("suspicious", [])
 
 
 def extract_intelligence(text: str) -> ExtractedIntelligence:
@@ -93,10 +108,7 @@ def extract_intelligence(text: str) -> ExtractedIntelligence:
         return ExtractedIntelligence()
 
     return ExtractedIntelligence(
-        bankAccounts=_extract_bank_accounts(text),
-        upiIds=_extract_upi(text),
-        phishingLinks=_extract_links(text),
-        phoneNumbers=_extract_phones(text),
+        **scan_entities(text),
         suspiciousKeywords=_extract_suspicious_keywords(text),
     )
 
@@ -0,0 +1,194 @@
+"""
+Cross-session inverted index: normalized indicator (UPI ID, bank account, phone, URL, domain)
+-> IDs of the sessions that shared it.
+
+Updated incrementally with each session's newly extracted values and cleaned up when a
+session is evicted. Lookups are O(1) (plus the IDs returned); top-N by session count is
+O(N) per type, using count levels that move by one as sessions are added or removed.
+The index is per process: with SESSION_BACKEND=sqlite each worker indexes the sessions it
+served.
+"""
+import heapq
+import threading
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# Indicator types, and the intelligence field each one is read from
+INDICATOR_TYPES = ("upi", "bank", "phone", "url", "domain")
+_TYPES_BY_FIELD = {
+    "upiIds": ("upi",),
+    "bankAccounts": ("bank",),
+    "phoneNumbers": ("phone",),
+    "phishingLinks": ("url", "domain"),
+}
+_URL_TRAILING = ".,;:!?)]}>'\""
+
+_BOTTOM, _TOP = 0, -1  # sentinel count levels
+
+
+def normalize(indicator_type: str, value: str) -> Optional[str]:
+    """Canonical form of value as indicator_type, or None if it is not one."""
+    value = value.strip()
+    if indicator_type == "upi":
+        return value.lower() if "@" in value else None
+    if indicator_type in ("bank", "phone"):
+        digits = "".join(c for c in value if c.isdigit())
+        if indicator_type == "bank":
+            return digits if 9 <= len(digits) <= 18 else None
+        if len(digits) == 12 and digits.startswith("91"):
+            digits = digits[2:]
+        elif len(digits) == 11 and digits.startswith("0"):
+            digits = digits[1:]
+        return "+91" + digits if len(digits) == 10 and digits[0] in "6789" else None
+    if indicator_type in ("url", "domain"):
+        value = value.rstrip(_URL_TRAILING)
+        parts = urlsplit(value if "://" in value else "http://" + value)
+        try:
+            host = (parts.hostname or "").removeprefix("www.")
+            port = parts.port
+        except ValueError:
+            return None
+        if "." not in host:
+            return None
+        if indicator_type == "domain":
+            return host
+        netloc = f"{host}:{port}" if port else host
+        path = parts.path.rstrip("/")
+        return f"{parts.scheme.lower()}://{netloc}{path}" + (f"?{parts.query}" if parts.query else "")
+    raise ValueError(f"Unknown indicator type: {indicator_type!r}")
+
+
+def indicators(field: str, values: Iterable[str]) -> List[Tuple[str, str]]:
+    """(type, normalized value) pairs for values of an intelligence field (others are ignored)."""
+    out = []
+    values = list(values)
+    for indicator_type in _TYPES_BY_FIELD.get(field, ()):
+        for v in values:
+            key = normalize(indicator_type, v)
+            if key is not None:
+                out.append((indicator_type, key))
+    return out
+
+
+class _Postings:
+    """One indicator type: value -> session IDs, plus values grouped by session count."""
+
+    __slots__ = ("sessions", "levels", "higher", "lower")
+
+    def __init__(self):
+        self.sessions: Dict[str, Dict[str, None]] = {}  # value -> ordered set of session IDs
+        self.levels: Dict[int, Dict[str, None]] = {_BOTTOM: {}, _TOP: {}}  # count -> values
+        self.higher: Dict[int, int] = {_BOTTOM: _TOP}  # linked list of non-empty counts
+        self.lower: Dict[int, int] = {_TOP: _BOTTOM}
+
+    def _link(self, count: int, below: int) -> None:
+        above = self.higher[below]
+        self.levels[count] = {}
+        self.higher[below], self.higher[count] = count, above
+        self.lower[above], self.lower[count] = count, below
+
+    def _move(self, value: str, old: int, new: int) -> None:
+        if new > 0 and new not in self.levels:
+            self._link(new, old if new > old else self.lower[old])
+        if new > 0:
+            self.levels[new][value] = None
+        if old > 0:
+            level = self.levels[old]
+            del level[value]
+            if not level:
+                below, above = self.lower.pop(old), self.higher.pop(old)
+                self.higher[below], self.lower[above] = above, below
+                del self.levels[old]
+
+    def add(self, value: str, session_id: str) -> None:
+        ids = self.sessions.get(value)
+        if ids is None:
+            ids = self.sessions[value] = {}
+        if session_id not in ids:
+            ids[session_id] = None
+            self._move(value, len(ids) - 1, len(ids))
+
+    def remove(self, value: str, session_id: str) -> None:
+        ids = self.sessions.get(value)
+        if ids is None or session_id not in ids:
+            return
+        del ids[session_id]
+        self._move(value, len(ids) + 1, len(ids))
+        if not ids:
+            del self.sessions[value]
+
+    def top(self, n: int) -> List[Tuple[int, str]]:
+        out: List[Tuple[int, str]] = []
+        count = self.lower[_TOP]
+        while count != _BOTTOM and len(out) < n:
+            out.extend((count, value) for value in islice(self.levels[count], n - len(out)))
+            count = self.lower[count]
+        return out
+
+
+class IndicatorIndex:
+    """Thread-safe inverted index over all indicator types."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings: Dict[str, _Postings] = {t: _Postings() for t in INDICATOR_TYPES}
+
+    def add(self, session_id: str, field: str, values: Iterable[str]) -> None:
+        """Index newly extracted values of one intelligence field for session_id."""
+        pairs = indicators(field, values)
+        if pairs:
+            with self._lock:
+                for indicator_type, key in pairs:
+                    self._postings[indicator_type].add(key, session_id)
+
+    def remove_session(self, session_id: str, intel) -> None:
+        """Drop session_id from the entries of its intelligence (ExtractedIntelligence or CompactIntelligence)."""
+        pairs = [p for field in _TYPES_BY_FIELD for p in indicators(field, getattr(intel, field))]
+        with self._lock:
+            for indicator_type, key in pairs:
+                self._postings[indicator_type].remove(key, session_id)
+
+    def lookup(self, value: str, indicator_type: Optional[str] = None, limit: int = 100) -> List[Dict[str, object]]:
+        """
+        Sessions that shared value, most recent first (at most limit IDs per match). Without
+        indicator_type, value is tried as every type it normalizes to.
+        """
+        matches = []
+        for t in (indicator_type,) if indicator_type else INDICATOR_TYPES:
+            key = normalize(t, value)
+            if key is None:
+                continue
+            with self._lock:
+                ids = self._postings[t].sessions.get(key)
+                if ids:
+                    matches.append({
+                        "type": t,
+                        "value": key,
+                        "sessionCount": len(ids),
+                        "sessionIds": list(islice(reversed(ids), limit)),
+                    })
+        return matches
+
+    def top(self, n: int = 10, indicator_type: Optional[str] = None) -> List[Dict[str, object]]:
+        """The n indicators seen in the most sessions (of one type, or across all types)."""
+        with self._lock:
+            per_type = {
+                t: self._postings[t].top(n) for t in ((indicator_type,) if indicator_type else INDICATOR_TYPES)
+            }
+        ranked = heapq.merge(
+            *([(count, value, t) for count, value in entries] for t, entries in per_type.items()),
+            key=lambda entry: -entry[0],
+        )
+        return [{"type": t, "value": value, "sessionCount": count} for count, value, t in islice(ranked, n)]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {t: len(p.sessions) for t, p in self._postings.items()}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._postings = {t: _Postings() for t in INDICATOR_TYPES}
+
+
+index = IndicatorIndex()
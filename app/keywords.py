@@ -0,0 +1,211 @@
+"""
+Keyword lists + multi-pattern matcher shared by detector and extractor.
+"""
+import re
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Set
+
+# Keyword categories with weights (weights applied in detector)
+URGENCY_KEYWORDS = [
+    "immediately", "urgent", "today", "now", "blocked", "verify now",
+    "act fast", "asap", "suspended", "expire", "deadline"
+]
+FINANCIAL_KEYWORDS = [
+    "bank", "account", "upi", "payment", "transfer", "balance",
+    "blocked", "suspended", "verify", "compliance", "fund", "money",
+    "transaction", "refund", "reward", "prize", "lottery"
+]
+AUTHORITY_KEYWORDS = [
+    "official", "bank", "verification", "compliance", "department",
+    "reserve bank", "rbi", "government", "income tax"
+]
+ACTION_KEYWORDS = [
+    "click", "share", "send", "verify", "link", "otp", "call",
+    "register", "update", "confirm", "submit"
+]
+
+# Suspicious keywords to extract
+SUSPICIOUS_KEYWORDS = [
+    "urgent", "immediately", "blocked", "verify", "suspended", "account",
+    "upi", "bank", "payment", "transfer", "click", "link", "otp",
+    "compliance", "official", "verification"
+]
+
+
+# Up to this many distinct keywords, per-keyword `in` scans (C substring search, early exit
+# per group) beat the trie regex; above it the regex's single pass wins.
+SCAN_MAX_KEYWORDS = 400
+
+
+def _trie_regex(words: Sequence[str]) -> str:
+    """
+    Regex for a keyword trie: alternatives branch on one character at a time, so the
+    cost per text position depends on keyword length, not on how many keywords exist.
+    Longer keywords are preferred (greedy optional tails).
+    """
+    trie: dict = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        alts = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        if "" in node:
+            body = "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """
+    Finds keywords of several groups in the lowercased text. Default is substring semantics
+    (same as `kw in text.lower()`); word_boundary=True only matches whole words/phrases.
+
+    Small keyword sets (up to SCAN_MAX_KEYWORDS) are checked keyword by keyword; larger ones
+    are found in one pass of a trie-shaped regex. strategy="scan"/"regex" forces either.
+    """
+
+    def __init__(
+        self,
+        groups: Dict[str, Sequence[str]],
+        word_boundary: bool = False,
+        strategy: Optional[str] = None,
+    ):
+        self.groups = {name: [kw.lower() for kw in kws if kw] for name, kws in groups.items()}
+        self.word_boundary = word_boundary
+        keywords = sorted({kw for kws in self.groups.values() for kw in kws})
+        if strategy is None:
+            strategy = "scan" if len(keywords) <= SCAN_MAX_KEYWORDS else "regex"
+        if strategy not in ("scan", "regex"):
+            raise ValueError(f"Unknown strategy: {strategy!r}")
+        self.strategy = strategy
+        self._keywords = keywords
+        self._order = {name: {kw: i for i, kw in enumerate(kws)} for name, kws in self.groups.items()}
+        if strategy == "regex":
+            self._build_regex(keywords)
+
+    def _build_regex(self, keywords: List[str]) -> None:
+        word_boundary = self.word_boundary
+
+        # The scan consumes the longest keyword at each hit, so a hit implies every keyword
+        # found inside it ("bank" in "reserve bank")...
+        self._closure: Dict[str, FrozenSet[str]] = {
+            kw: frozenset(p for p in keywords if self._occurs_in(p, kw)) for kw in keywords
+        }
+        # ...and keywords that start inside it but run past its end are probed at those offsets.
+        self._straddle: Dict[str, List[int]] = {
+            kw: [
+                off for off in range(1, len(kw))
+                if any(k.startswith(kw[off:]) and len(k) > len(kw) - off for k in keywords)
+                and (not word_boundary or not _is_word(kw[off - 1]))
+            ]
+            for kw in keywords
+        }
+        self._groups_of: Dict[str, FrozenSet[str]] = {
+            kw: frozenset(name for name, kws in self.groups.items() if kw in kws) for kw in keywords
+        }
+
+        body = _trie_regex(keywords) if keywords else "(?!)"
+        if word_boundary:
+            body = r"\b(?:" + body + r")\b"
+        self._regex = re.compile(body)
+
+    def _occurs_in(self, p: str, kw: str) -> bool:
+        """p appears in kw (respecting word boundaries when enabled); kw may be any text."""
+        start = kw.find(p)
+        while start != -1:
+            end = start + len(p)
+            if not self.word_boundary or (
+                (start == 0 or not _is_word(kw[start - 1])) and (end == len(kw) or not _is_word(kw[end]))
+            ):
+                return True
+            start = kw.find(p, start + 1)
+        return False
+
+    def _scan(self, keywords: Sequence[str], text: str) -> List[str]:
+        """Keywords present in lowercased text, in the given order."""
+        if self.word_boundary:
+            return [kw for kw in keywords if kw in text and self._occurs_in(kw, text)]
+        return [kw for kw in keywords if kw in text]
+
+    def _any(self, keywords: Sequence[str], text: str) -> bool:
+        return any(kw in text and self._occurs_in(kw, text) for kw in keywords)
+
+    def find(self, text: str) -> Set[str]:
+        """All keywords present in text."""
+        found: Set[str] = set()
+        if not text:
+            return found
+        text = text.lower()
+        if self.strategy == "scan":
+            found.update(self._scan(self._keywords, text))
+            return found
+        regex, closure, straddle = self._regex, self._closure, self._straddle
+        for m in regex.finditer(text):
+            kw = m.group()
+            found |= closure[kw]
+            for off in straddle[kw]:
+                inner = regex.match(text, m.start() + off)
+                if inner:
+                    found |= closure[inner.group()]
+        return found
+
+    def categories(self, text: str, names: Optional[Iterable[str]] = None) -> Set[str]:
+        """Names of groups (all, or those in names) with at least one keyword present."""
+        if self.strategy == "scan":
+            text = text.lower()
+            groups = self.groups
+            if self.word_boundary:
+                return {name for name in (groups if names is None else names) if self._any(groups[name], text)}
+            hit: Set[str] = set()
+            for name in groups if names is None else names:
+                for kw in groups[name]:
+                    if kw in text:
+                        hit.add(name)
+                        break
+            return hit
+        hit: Set[str] = set()
+        for kw in self.find(text):
+            hit |= self._groups_of[kw]
+        return hit if names is None else hit & set(names)
+
+    def match(self, text: str, names: Optional[Iterable[str]] = None) -> Dict[str, List[str]]:
+        """
+        Group name -> keywords present, in the group's list order (groups with no hits
+        omitted; only groups in names, if given).
+        """
+        out: Dict[str, List[str]] = {}
+        if self.strategy == "scan":
+            text = text.lower()
+            for name in self.groups if names is None else names:
+                found = self._scan(self.groups[name], text)
+                if found:
+                    out[name] = found
+            return out
+        wanted = None if names is None else set(names)
+        for kw in self.find(text):
+            for name in self._groups_of[kw]:
+                if wanted is None or name in wanted:
+                    out.setdefault(name, []).append(kw)
+        for name, kws in out.items():
+            kws.sort(key=self._order[name].__getitem__)
+        return out
+
+
+def _is_word(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+# Built once at import: every list above
+MATCHER = KeywordMatcher({
+    "urgency": URGENCY_KEYWORDS,
+    "financial": FINANCIAL_KEYWORDS,
+    "authority": AUTHORITY_KEYWORDS,
+    "action": ACTION_KEYWORDS,
+    "suspicious": SUSPICIOUS_KEYWORDS,
+})
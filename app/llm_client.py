@@ -0,0 +1,267 @@
+"""
+Shared LLM client - one pooled OpenAI client per process, a concurrency limit and a
+circuit breaker.
+
+While the provider is failing or slow, the breaker short-circuits calls (the agent uses
+its fallback reply) for a cooldown, then lets a single probe through to test recovery.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+import httpx
+
+from app.config import (
+    OPENAI_API_KEY,
+    OPENAI_BASE_URL,
+    LLM_MODEL,
+    LLM_TIMEOUT,
+    LLM_MAX_CONCURRENCY,
+    LLM_BREAKER_WINDOW,
+    LLM_BREAKER_MIN_CALLS,
+    LLM_BREAKER_ERROR_RATE,
+    LLM_BREAKER_SLOW_SECONDS,
+    LLM_BREAKER_COOLDOWN,
+)
+
+logger = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitBreaker:
+    """Rolling-window breaker: failures and slow calls both count as bad outcomes."""
+
+    def __init__(
+        self,
+        window: int = LLM_BREAKER_WINDOW,
+        min_calls: int = LLM_BREAKER_MIN_CALLS,
+        error_rate: float = LLM_BREAKER_ERROR_RATE,
+        slow_seconds: float = LLM_BREAKER_SLOW_SECONDS,
+        cooldown: float = LLM_BREAKER_COOLDOWN,
+        clock=time.monotonic,
+    ):
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_seconds = slow_seconds
+        self.cooldown = cooldown
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._outcomes: Deque[bool] = deque(maxlen=max(1, window))  # True = bad
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self._probing = False
+        self.opens = 0
+        self.short_circuited = 0
+
+    def allow(self) -> bool:
+        """Whether a call may go to the provider now (counts the ones that may not)."""
+        with self._lock:
+            if self.state == OPEN and self._clock() - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+            if self.state == CLOSED or (self.state == HALF_OPEN and not self._probing):
+                self._probing = self.state == HALF_OPEN
+                return True
+            self.short_circuited += 1
+            return False
+
+    def is_open(self) -> bool:
+        """Whether allow() would refuse a call now; unlike allow(), claims no probe and counts nothing."""
+        with self._lock:
+            if self.state == OPEN:
+                return self._clock() - self.opened_at < self.cooldown
+            return self.state == HALF_OPEN and self._probing
+
+    def record(self, ok: bool, seconds: float) -> None:
+        """Outcome of an allowed call."""
+        bad = not ok or seconds > self.slow_seconds
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probing = False
+                if bad:
+                    self._open()
+                else:
+                    self.state = CLOSED
+                    self._outcomes.clear()
+                return
+            self._outcomes.append(bad)
+            if (
+                self.state == CLOSED
+                and len(self._outcomes) >= self.min_calls
+                and sum(self._outcomes) / len(self._outcomes) >= self.error_rate
+            ):
+                self._open()
+
+    def release(self) -> None:
+        """An allowed call that ended before reaching the provider (e.g. cancelled while queued)."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probing = False  # let the next call probe instead
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self.opened_at = self._clock()
+        self.opens += 1
+        self._outcomes.clear()
+        logger.warning("LLM circuit breaker opened for %.0fs", self.cooldown)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            n = len(self._outcomes)
+            return {
+                "state": self.state,
+                "badRate": round(sum(self._outcomes) / n, 4) if n else 0.0,
+                "windowCalls": n,
+                "opens": self.opens,
+                "shortCircuited": self.short_circuited,
+                "retryInSeconds": (
+                    round(max(0.0, self.cooldown - (self._clock() - self.opened_at)), 1) if self.state == OPEN else 0.0
+                ),
+            }
+
+
+def _content(response) -> Optional[str]:
+    content = response.choices[0].message.content
+    if content:
+        content = content.strip().strip('"\'')
+    return content or None
+
+
+class LLMClient:
+    """Process-wide chat-completions client with keep-alive pooling, a concurrency cap and a breaker."""
+
+    def __init__(
+        self,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        breaker: Optional[CircuitBreaker] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.breaker = breaker or CircuitBreaker()
+        self._transport = transport  # tests: httpx.MockTransport
+        self._async_client = None
+        self._sync_client = None
+        self._loop = None  # loop the async client and semaphore belong to
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._sync_semaphore = threading.BoundedSemaphore(self.max_concurrency)
+        self.in_flight = 0
+        self.calls = 0
+        self.failures = 0
+
+    def available(self) -> bool:
+        """Whether a call could reach the provider now: API key set and breaker not refusing."""
+        return bool(OPENAI_API_KEY) and not self.breaker.is_open()
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency)
+
+    def _get_async_client(self):
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._loop is not loop:
+            from openai import AsyncOpenAI
+            self._async_client = AsyncOpenAI(
+                api_key=OPENAI_API_KEY,
+                base_url=OPENAI_BASE_URL,
+                max_retries=0,  # the breaker decides when to try again
+                http_client=httpx.AsyncClient(limits=self._limits(), timeout=LLM_TIMEOUT, transport=self._transport),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._async_client
+
+    def _get_sync_client(self):
+        if self._sync_client is None:
+            from openai import OpenAI
+            self._sync_client = OpenAI(
+                api_key=OPENAI_API_KEY,
+                base_url=OPENAI_BASE_URL,
+                max_retries=0,
+                http_client=httpx.Client(limits=self._limits(), timeout=LLM_TIMEOUT),
+            )
+        return self._sync_client
+
+    def _request(self, system_prompt: str, user_message: str, timeout: float) -> dict:
+        return {
+            "model": LLM_MODEL,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_message},
+            ],
+            "max_tokens": 150,
+            "timeout": timeout,
+        }
+
+    def _record(self, ok: bool, start: float) -> None:
+        self.calls += 1
+        if not ok:
+            self.failures += 1
+        self.breaker.record(ok, time.perf_counter() - start)
+
+    async def complete(self, system_prompt: str, user_message: str, timeout: float = LLM_TIMEOUT) -> Optional[str]:
+        """Reply text, or None on error, empty reply, or while the breaker is open."""
+        if not OPENAI_API_KEY or not self.breaker.allow():
+            return None
+        started = False
+        try:
+            client = self._get_async_client()
+            async with self._semaphore:
+                started = True
+                self.in_flight += 1
+                start = time.perf_counter()
+                ok = False
+                try:
+                    request = self._request(system_prompt, user_message, timeout)
+                    content = _content(await client.chat.completions.create(**request))
+                    ok = True
+                    return content
+                except Exception as e:
+                    logger.debug("LLM call failed: %s", e)
+                    return None
+                finally:  # also on cancellation, so a half-open probe is never left pending
+                    self.in_flight -= 1
+                    self._record(ok, start)
+        finally:
+            if not started:  # cancelled while waiting for a slot
+                self.breaker.release()
+
+    def complete_sync(self, system_prompt: str, user_message: str, timeout: float = LLM_TIMEOUT) -> Optional[str]:
+        """Blocking variant of complete() for sync callers; shares the breaker."""
+        if not OPENAI_API_KEY or not self.breaker.allow():
+            return None
+        client = self._get_sync_client()
+        with self._sync_semaphore:
+            start = time.perf_counter()
+            ok = False
+            try:
+                request = self._request(system_prompt, user_message, timeout)
+                content = _content(client.chat.completions.create(**request))
+                ok = True
+                return content
+            except Exception as e:
+                logger.debug("LLM call failed: %s", e)
+                return None
+            finally:
+                self._record(ok, start)
+
+    async def aclose(self) -> None:
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+        if self._sync_client is not None:
+            self._sync_client.close()
+            self._sync_client = None
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "breaker": self.breaker.stats(),
+            "inFlight": self.in_flight,
+            "maxConcurrency": self.max_concurrency,
+            "calls": self.calls,
+            "failures": self.failures,
+        }
+
+
+llm = LLMClient()
@@ -1,33 +1,48 @@
 """
 FastAPI app - main entry point.
 """
+import json
 import logging
+from contextlib import asynccontextmanager
+from time import perf_counter
 
-from fastapi import FastAPI, Header, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query, Response
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-
-from app.config import API_KEY, FALLBACK_REPLY_NON_SCAM, FALLBACK_REPLY_AGENT_ERROR
-from app.models import HoneypotRequest, HoneypotResponse
-from app.detector import detect_scam
-from app.extractor import extract_from_conversation
-from app.session_store import (
-    get_or_create,
-    update_intelligence,
-    increment_turn,
-    mark_scam_detected,
-)
-from app.agent import generate_reply
-from app.callback import (
-    build_callback_payload,
-    send_callback,
-    should_send_callback,
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+
+from app.config import (
+    API_KEY,
+    BATCH_CHUNK_SIZE,
+    BATCH_MAX_MESSAGES,
+    FALLBACK_REPLY_AGENT_ERROR,
 )
+from app.models import BatchRequest, BatchResponse, HoneypotRequest, HoneypotResponse
+from app.batch import analyze_batch, shutdown_pool
+from app.pipeline import process_turn
+from app.callback_outbox import dispatcher
+from app.llm_client import llm
+from app.indicator_index import INDICATOR_TYPES, index as indicator_index
+from app import agent, metrics, session_store, tracing
 
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Agentic Honey-Pot")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the callback dispatcher for the app's lifetime; flush pending callbacks on shutdown."""
+    await dispatcher.start()
+    try:
+        yield
+    finally:
+        session_store.flush()
+        await dispatcher.stop()
+        await llm.aclose()
+        shutdown_pool()
+
+
+app = FastAPI(title="Agentic Honey-Pot", lifespan=lifespan)
 
 
 @app.exception_handler(RequestValidationError)
@@ -56,70 +71,148 @@ def health():
     return {"status": "ok", "service": "agentic-honey-pot"}
 
 
+def _require_api_key(x_api_key: str | None, api_key: str | None) -> None:
+    """Raise 401 unless x-api-key or api-key header matches API_KEY."""
+    key = x_api_key or api_key
+    if not key or key.strip() != API_KEY:
+        raise HTTPException(status_code=401, detail="Invalid or missing API key")
+
+
 @app.post("/api/honeypot", response_model=HoneypotResponse)
-def honeypot(
+async def honeypot(
     request: HoneypotRequest,
+    response: Response,
     x_api_key: str | None = Header(None, alias="x-api-key"),
     api_key: str | None = Header(None, alias="api-key"),
+    x_debug_trace: str | None = Header(None, alias=tracing.DEBUG_HEADER),
 ):
     """
     Main honeypot endpoint.
     Accepts scam messages, returns agent reply.
     Auth: x-api-key or api-key header (GUVI tester may use either).
+    Async: detection/extraction run inline (CPU-light); the LLM call is awaited and
+    callbacks are handed to the background dispatcher.
+    Tracing (opt-in): x-debug-trace: 1 adds a Server-Timing header; see TRACE_*/PROFILE_* config.
     """
-    key = x_api_key or api_key
-    if not key or key.strip() != API_KEY:
-        raise HTTPException(status_code=401, detail="Invalid or missing API key")
+    t = perf_counter()
+    _require_api_key(x_api_key, api_key)
+    timings = {"auth": perf_counter() - t}
+    trace = tracing.begin(x_debug_trace)
 
     try:
-        # Edge cases: empty message.text, None conversationHistory/metadata
-        msg_text = (request.message and request.message.text) or ""
-        conv_history = request.conversationHistory if request.conversationHistory is not None else []
-        metadata = request.metadata
-
-        # Phase 7: Session store
-        session = get_or_create(request.sessionId)
-
-        # Phase 5: Scam detection
-        scam_detected = detect_scam(msg_text, conv_history)
-        if scam_detected:
-            mark_scam_detected(request.sessionId)
-            # Phase 6: Extract intelligence and store in session
-            intel = extract_from_conversation(conv_history, msg_text)
-            update_intelligence(request.sessionId, intel)
-            # Phase 8: Agent generates reply (LLM or fallback)
-            reply = generate_reply(msg_text, conv_history, metadata)
-        else:
-            reply = FALLBACK_REPLY_NON_SCAM
-
-        increment_turn(request.sessionId)
-        session = get_or_create(request.sessionId)
-
-        logger.info(
-            "Request: sessionId=%s turn=%d scam_detected=%s",
-            request.sessionId,
-            session.turn_count,
-            scam_detected,
-        )
-
-        # Phase 9: Callback when conditions met
-        if should_send_callback(session):
-            payload = build_callback_payload(
-                session_id=session.session_id,
-                scam_detected=session.scam_detected,
-                total_messages=session.turn_count * 2,
-                intelligence=session.intelligence,
-            )
-            ok = send_callback(payload)
-            logger.info("Callback: sessionId=%s success=%s", session.session_id, ok)
-
-        reply_text = (reply or "").strip() or FALLBACK_REPLY_AGENT_ERROR
+        reply_text = await process_turn(request, timings)
         return HoneypotResponse(status="success", reply=reply_text)
 
     except Exception as e:
         logger.exception("Pipeline error: %s", e)
         return HoneypotResponse(status="success", reply=FALLBACK_REPLY_AGENT_ERROR)
 
+    finally:
+        if trace is not None:
+            server_timing = tracing.finish(trace, request.sessionId, timings)
+            if server_timing:
+                response.headers["Server-Timing"] = server_timing
+
+
+@app.post("/api/honeypot/batch")
+async def honeypot_batch(
+    request: BatchRequest,
+    x_api_key: str | None = Header(None, alias="x-api-key"),
+    api_key: str | None = Header(None, alias="api-key"),
+):
+    """
+    Score and/or extract many independent messages (archives, not live sessions).
+    Large batches are spread across the process pool; small ones run inline.
+    stream=true returns NDJSON, one compact result per line, in input order.
+    """
+    _require_api_key(x_api_key, api_key)
+    if len(request.messages) > BATCH_MAX_MESSAGES:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_MESSAGES} messages per request")
+
+    workers = 0 if len(request.messages) <= BATCH_CHUNK_SIZE else None
+    results = analyze_batch(
+        request.messages,
+        detect=request.detect,
+        extract=request.extract,
+        workers=workers,
+        stream=True,
+    )
+    if request.stream:
+        lines = (json.dumps(r, separators=(",", ":")) + "\n" for r in results)
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+    return BatchResponse(results=await run_in_threadpool(list, results))
+
+
+@app.get("/api/sessions/stats")
+def sessions_stats(
+    x_api_key: str | None = Header(None, alias="x-api-key"),
+    api_key: str | None = Header(None, alias="api-key"),
+):
+    """Session store size, hit/miss and eviction counters."""
+    _require_api_key(x_api_key, api_key)
+    return session_store.stats()
+
+
+@app.get("/api/callbacks/stats")
+def callback_stats(
+    x_api_key: str | None = Header(None, alias="x-api-key"),
+    api_key: str | None = Header(None, alias="api-key"),
+):
+    """Callback outbox depth, delivery outcomes and latency."""
+    _require_api_key(x_api_key, api_key)
+    return dispatcher.stats()
+
+
+@app.get("/api/agent/stats")
+def agent_stats(
+    x_api_key: str | None = Header(None, alias="x-api-key"),
+    api_key: str | None = Header(None, alias="api-key"),
+):
+    """Reply tiers, cache hit rate, latency-budget counters and LLM circuit breaker state."""
+    _require_api_key(x_api_key, api_key)
+    return agent.stats()
+
+
+def _indicator_type(indicator_type: str | None) -> str | None:
+    if indicator_type is not None and indicator_type not in INDICATOR_TYPES:
+        raise HTTPException(status_code=422, detail=f"type must be one of: {', '.join(INDICATOR_TYPES)}")
+    return indicator_type
+
+
+@app.get("/api/indicators/lookup")
+def indicator_lookup(
+    value: str,
+    indicator_type: str | None = Query(None, alias="type"),
+    limit: int = Query(100, ge=1, le=10000),
+    x_api_key: str | None = Header(None, alias="x-api-key"),
+    api_key: str | None = Header(None, alias="api-key"),
+):
+    """Sessions that shared an indicator (UPI ID, bank account, phone, URL or domain), newest first."""
+    _require_api_key(x_api_key, api_key)
+    return {"value": value, "matches": indicator_index.lookup(value, _indicator_type(indicator_type), limit)}
+
+
+@app.get("/api/indicators/top")
+def indicator_top(
+    n: int = Query(10, ge=1, le=1000),
+    indicator_type: str | None = Query(None, alias="type"),
+    x_api_key: str | None = Header(None, alias="x-api-key"),
+    api_key: str | None = Header(None, alias="api-key"),
+):
+    """Indicators shared by the most sessions, with how many distinct values are indexed per type."""
+    _require_api_key(x_api_key, api_key)
+    return {"indicators": indicator_index.top(n, _indicator_type(indicator_type)), "indexed": indicator_index.stats()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """
+    Prometheus scrape endpoint: stage latency histograms, verdicts, callbacks, sessions (no auth).
+    Async so render() runs on the event loop with the turns that update the counters, never
+    in a threadpool worker iterating them mid-update.
+    """
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
 
 if __name__ == "__main__":
     import uvicorn
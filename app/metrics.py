@@ -0,0 +1,129 @@
+"""
+Prometheus text-format metrics (GET /metrics) - per-stage latency histograms and counters.
+
+Recording is a dict lookup, a bisect and two additions, done on the event loop thread.
+Gauges and callback outcome counts are read from their owners only when scraped.
+"""
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+# Seconds; spans in-process stages (sub-ms) up to slow LLM replies
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _fmt(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Histogram:
+    """Histogram with one label; buckets are stored non-cumulative and summed on render."""
+
+    def __init__(self, name: str, help_text: str, label: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label = label
+        self.buckets = tuple(buckets)
+        self._series: Dict[str, list] = {}  # label value -> [bucket counts (+Inf last), sum]
+
+    def observe(self, label_value: str, value: float) -> None:
+        series = self._series.get(label_value)
+        if series is None:
+            series = self._series[label_value] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def count(self, label_value: str) -> int:
+        series = self._series.get(label_value)
+        return sum(series[0]) if series else 0
+
+    def render(self, lines: List[str]) -> None:
+        lines.append(f"# HELP {self.name} {self.help}")
+        lines.append(f"# TYPE {self.name} histogram")
+        for value, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for le, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le_text = "+Inf" if le == float("inf") else _fmt(le)
+                lines.append(f'{self.name}_bucket{{{self.label}="{value}",le="{le_text}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{self.label}="{value}"}} {_fmt(round(total, 9))}')
+            lines.append(f'{self.name}_count{{{self.label}="{value}"}} {cumulative}')
+
+
+class Counter:
+    """Counter with one label."""
+
+    def __init__(self, name: str, help_text: str, label: str):
+        self.name = name
+        self.help = help_text
+        self.label = label
+        self.values: Dict[str, int] = {}
+
+    def inc(self, label_value: str, amount: int = 1) -> None:
+        self.values[label_value] = self.values.get(label_value, 0) + amount
+
+    def render(self, lines: List[str]) -> None:
+        lines.append(f"# HELP {self.name} {self.help}")
+        lines.append(f"# TYPE {self.name} counter")
+        for value, n in sorted(self.values.items()):
+            lines.append(f'{self.name}{{{self.label}="{value}"}} {n}')
+
+
+def _render_sampled(lines: List[str], name: str, kind: str, help_text: str, label: str,
+                    samples: Sequence[Tuple[str, float]]) -> None:
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+    for value, n in samples:
+        lines.append(f'{name}{{{label}="{value}"}} {_fmt(n)}' if label else f"{name} {_fmt(n)}")
+
+
+STAGE_SECONDS = Histogram(
+    "honeypot_stage_seconds", "Time spent in each honeypot pipeline stage.", "stage"
+)
+REPLY_SECONDS = Histogram(
+    "honeypot_reply_seconds", "Reply generation time by the tier that answered.", "source"
+)
+VERDICTS = Counter("honeypot_requests_total", "Honeypot turns by scam verdict.", "verdict")
+
+
+def observe_turn(timings: Dict[str, float], scam_detected: bool, reply_source: str, total: float) -> None:
+    """Record one pipeline turn (stage durations from process_turn)."""
+    for stage, seconds in timings.items():
+        if stage == "reply":
+            REPLY_SECONDS.observe(reply_source, seconds)
+        else:
+            STAGE_SECONDS.observe(stage, seconds)
+    STAGE_SECONDS.observe("total", total)
+    VERDICTS.inc("scam" if scam_detected else "not_scam")
+
+
+def render() -> str:
+    """All metrics in Prometheus text exposition format."""
+    from app import session_store
+    from app.campaigns import clusters
+    from app.callback_outbox import dispatcher
+    from app.llm_client import llm
+
+    lines: List[str] = []
+    STAGE_SECONDS.render(lines)
+    REPLY_SECONDS.render(lines)
+    VERDICTS.render(lines)
+
+    cb = dispatcher.stats()
+    _render_sampled(lines, "honeypot_callbacks_total", "counter", "Callback delivery outcomes.", "outcome", [
+        ("delivered", cb["delivered"]),
+        ("failed_attempt", cb["failedAttempts"]),
+        ("dropped", cb["dropped"]),
+        ("coalesced", cb["coalesced"]),
+    ])
+    _render_sampled(lines, "honeypot_callback_queue_depth", "gauge", "Callbacks waiting in the outbox.", "",
+                    [("", cb["queueDepth"])])
+    _render_sampled(lines, "honeypot_active_sessions", "gauge", "Sessions held by the session backend.", "",
+                    [("", session_store.stats()["sessions"])])
+    _render_sampled(lines, "honeypot_campaign_clusters", "gauge", "Campaign clusters held in memory.", "",
+                    [("", clusters.stats()["clusters"])])
+    breaker = llm.breaker.stats()
+    _render_sampled(lines, "honeypot_llm_breaker_open", "gauge", "1 while the LLM circuit breaker is open.", "",
+                    [("", 1 if breaker["state"] == "open" else 0)])
+    return "\n".join(lines) + "\n"
@@ -1,6 +1,7 @@
 """
 Pydantic models - request/response structures.
 """
+import hashlib
 from typing import List, Optional
 from pydantic import BaseModel, Field
 
@@ -12,6 +13,21 @@ class Message(BaseModel):
     timestamp: str = ""
 
 
+def history_hash(messages: List[Message]):
+    """Running blake2b over (sender, text) of each message; extend with hash_message()."""
+    h = hashlib.blake2b(digest_size=16)
+    for msg in messages:
+        hash_message(h, msg)
+    return h
+
+
+def hash_message(h, msg: Message) -> None:
+    h.update((msg.sender or "").encode("utf-8", "surrogatepass"))
+    h.update(b"\x00")
+    h.update((msg.text or "").encode("utf-8", "surrogatepass"))
+    h.update(b"\x00")
+
+
 class Metadata(BaseModel):
     """Optional metadata for the request."""
     channel: Optional[str] = None  # SMS, WhatsApp, Email, Chat
@@ -42,3 +58,17 @@ class ExtractedIntelligence(BaseModel):
     phishingLinks: List[str] = Field(default_factory=list)
     phoneNumbers: List[str] = Field(default_factory=list)
     suspiciousKeywords: List[str] = Field(default_factory=list)
+
+
+class BatchRequest(BaseModel):
+    """Batch scoring/extraction over independent messages (no session state)."""
+    messages: List[str]
+    detect: bool = True
+    extract: bool = True
+    stream: bool = False  # NDJSON, one result per line, in input order
+
+
+class BatchResponse(BaseModel):
+    """Compact per-message results, in input order."""
+    status: str = "success"
+    results: List[dict] = Field(default_factory=list)
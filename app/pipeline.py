@@ -0,0 +1,185 @@
+"""
+Honeypot turn pipeline - detection → extraction → reply → callback, with stage timings.
+
+Shared by the HTTP endpoint and in-process tools (replay, benchmarks).
+"""
+import asyncio
+import logging
+from time import perf_counter
+from typing import Dict, Optional
+
+from app.config import FALLBACK_REPLY_NON_SCAM, FALLBACK_REPLY_AGENT_ERROR
+from app.models import HoneypotRequest
+from app.detector import detect_scam
+from app.extractor import extract_from_conversation
+from app.prompt_window import window
+from app.session_store import (
+    INTEL_FIELDS,
+    Session,
+    add_eviction_hook,
+    flush,
+    get_backend,
+    get_or_create,
+    update_intelligence,
+    increment_turn,
+    mark_scam_detected,
+    record_callback_queued,
+    take_unprocessed_history,
+    update,
+)
+from app.agent import generate_reply_async, reply_source
+from app.campaigns import clusters
+from app import metrics
+from app.callback import (
+    build_callback_payload,
+    has_pending_callback,
+    intelligence_fingerprint,
+    should_send_callback,
+)
+from app.callback_outbox import dispatcher
+
+logger = logging.getLogger(__name__)
+
+# Stage names, in pipeline order (keys of the timings dict)
+STAGES = ("session", "detect", "cluster", "extract", "update", "reply", "callback")
+
+
+def _callback_payload(session: Session) -> dict:
+    return build_callback_payload(
+        session_id=session.session_id,
+        scam_detected=session.scam_detected,
+        total_messages=session.turn_count * 2,
+        intelligence=session.intelligence,
+        campaign_id=session.campaign_id,
+    )
+
+
+async def _session_io(fn, *args):
+    """Run a session-store call that may wait on the database (sqlite backend) off the event loop."""
+    if get_backend().blocking_io:
+        return await asyncio.to_thread(fn, *args)
+    return fn(*args)
+
+
+def _join_campaign(session: Session, campaign_id: str) -> None:
+    if session.campaign_id is None:
+        session.campaign_id = campaign_id
+
+
+def _reply_inputs(session: Session, conv_history) -> tuple:
+    """
+    (verbatim recent history, context text, intelligence fields with values, previous
+    turn's reply); folds older history into the session summary.
+    """
+    session.summary, recent, context = window(session.summary, conv_history, session.intel)
+    known = [field for field in INTEL_FIELDS if getattr(session.intel, field)]
+    return recent, context, known, session.last_reply
+
+
+def _set_last_reply(session: Session, reply: Optional[str]) -> None:
+    session.last_reply = reply
+
+
+def flush_evicted_session(session: Session, reason: str) -> None:
+    """Eviction hook: queue a final callback if the session has unsent intelligence."""
+    if has_pending_callback(session):
+        dispatcher.submit(_callback_payload(session))
+        logger.info("Final callback queued for evicted session %s (%s)", session.session_id, reason)
+
+
+add_eviction_hook(flush_evicted_session)
+
+
+async def process_turn(request: HoneypotRequest, timings: Optional[Dict[str, float]] = None) -> str:
+    """
+    Run one turn for request.sessionId and return the reply text.
+    If timings is given, per-stage durations (seconds) are written into it.
+    """
+    if timings is None:
+        timings = {}
+    t = start = perf_counter()
+    reply_source.set("none")
+
+    # Edge cases: empty message.text, None conversationHistory/metadata
+    msg_text = (request.message and request.message.text) or ""
+    conv_history = request.conversationHistory if request.conversationHistory is not None else []
+    metadata = request.metadata
+
+    # Phase 7: Session store
+    session = await _session_io(get_or_create, request.sessionId)
+    now = perf_counter()
+    timings["session"] = now - t
+    t = now
+
+    # Phase 5: Scam detection
+    scam_detected = detect_scam(msg_text, conv_history, state=session.score_state)
+    now = perf_counter()
+    timings["detect"] = now - t
+    t = now
+
+    if scam_detected:
+        mark_scam_detected(request.sessionId)
+        # Campaign clustering: every scam message trains the clusters; the session keeps its first
+        campaign_id = clusters.assign(msg_text)
+        if campaign_id and session.campaign_id is None:
+            update(request.sessionId, lambda s: _join_campaign(s, campaign_id))
+        now = perf_counter()
+        timings["cluster"] = now - t
+        t = now
+
+        # Phase 6: Extract intelligence from messages not seen before, merge into session
+        new_history = take_unprocessed_history(request.sessionId, conv_history)
+        intel = extract_from_conversation(new_history, msg_text)
+        now = perf_counter()
+        timings["extract"] = now - t
+        t = now
+
+        new_types = update_intelligence(request.sessionId, intel)
+        now = perf_counter()
+        timings["update"] = now - t
+        t = now
+
+        # Phase 8: Agent generates reply (template, cache, LLM or fallback) from a bounded window
+        recent, context, known, last_reply = update(request.sessionId, lambda s: _reply_inputs(s, conv_history))
+        reply = await generate_reply_async(
+            msg_text,
+            recent,
+            metadata,
+            turn=session.turn_count,
+            new_entity_types=new_types,
+            context=context,
+            known_entity_types=known,
+            last_reply=last_reply,
+        )
+        now = perf_counter()
+        timings["reply"] = now - t
+        t = now
+    else:
+        reply = FALLBACK_REPLY_NON_SCAM
+
+    # Remember the reply sent so the next turn (template or fallback) does not repeat it
+    if reply != session.last_reply:
+        update(request.sessionId, lambda s: _set_last_reply(s, reply))
+
+    increment_turn(request.sessionId)
+    session = get_or_create(request.sessionId)
+
+    logger.info(
+        "Request: sessionId=%s turn=%d scam_detected=%s",
+        request.sessionId,
+        session.turn_count,
+        scam_detected,
+    )
+
+    # Phase 9: Callback when intelligence changed or went stale (queued; delivered in background)
+    if should_send_callback(session):
+        payload = _callback_payload(session)
+        dispatcher.submit(payload)
+        record_callback_queued(session.session_id, intelligence_fingerprint(session.intel))
+        logger.info("Callback queued: sessionId=%s", session.session_id)
+    await _session_io(flush)
+    now = perf_counter()
+    timings["callback"] = now - t
+    metrics.observe_turn(timings, scam_detected, reply_source.get(), now - start)
+
+    return (reply or "").strip() or FALLBACK_REPLY_AGENT_ERROR
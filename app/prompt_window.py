@@ -0,0 +1,125 @@
+"""
+Token-budgeted prompt windowing - recent turns verbatim, older turns as a running summary.
+
+Each session keeps a ConversationSummary that is extended only with the messages that
+just scrolled out of the verbatim window, so building a prompt costs the same on turn 40
+as on turn 4. Extracted entities are always included so the agent stays consistent.
+"""
+import re
+from typing import List, Optional, Tuple
+
+from app.config import PROMPT_RECENT_MESSAGES, PROMPT_SUMMARY_NOTES, PROMPT_TOKEN_BUDGET
+from app.models import Message, hash_message, history_hash
+
+_WHITESPACE = re.compile(r"\s+")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+_NOTE_CHARS = 90
+_ENTITY_LABELS = (
+    ("upiIds", "UPI IDs"),
+    ("bankAccounts", "Bank accounts"),
+    ("phishingLinks", "Links"),
+    ("phoneNumbers", "Phone numbers"),
+)
+_MAX_ENTITIES_PER_TYPE = 5
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English chat text)."""
+    return len(text) // 4 + 1
+
+
+def _message_tokens(msg: Message) -> int:
+    return estimate_tokens(msg.text or "") + 3  # role label + separators
+
+
+def _note(text: str) -> str:
+    """First sentence of a message, whitespace-collapsed and truncated."""
+    text = _WHITESPACE.sub(" ", text).strip()
+    text = _SENTENCE_END.split(text, 1)[0]
+    return text if len(text) <= _NOTE_CHARS else text[: _NOTE_CHARS - 1].rstrip() + "…"
+
+
+class ConversationSummary:
+    """
+    Running summary of the messages older than the verbatim window: how many were folded,
+    and short notes of what the scammer said (the opening claim plus the latest few).
+    """
+
+    __slots__ = ("folded", "digest", "notes")
+
+    def __init__(self):
+        self.folded = 0  # conversationHistory messages folded into the summary
+        self.digest = b""  # history_hash of those messages
+        self.notes: List[str] = []
+
+    def fold(self, messages: List[Message], max_notes: int = PROMPT_SUMMARY_NOTES) -> None:
+        """Add messages that just left the verbatim window."""
+        for msg in messages:
+            if msg.sender == "scammer" and msg.text and msg.text.strip():
+                note = _note(msg.text)
+                if note not in self.notes:
+                    self.notes.append(note)
+        if len(self.notes) > max_notes > 1:
+            self.notes = self.notes[:1] + self.notes[-(max_notes - 1):]
+        self.folded += len(messages)
+
+    def render(self) -> str:
+        if not self.folded:
+            return ""
+        said = "; ".join(f'"{n}"' for n in self.notes) or "nothing notable"
+        return f"Earlier in the conversation ({self.folded} messages, summarized), they said: {said}"
+
+    def to_dict(self) -> dict:
+        return {"folded": self.folded, "digest": self.digest.hex(), "notes": list(self.notes)}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ConversationSummary":
+        summary = cls()
+        summary.folded = data.get("folded", 0)
+        summary.digest = bytes.fromhex(data.get("digest", ""))
+        summary.notes = list(data.get("notes", []))
+        return summary
+
+
+def render_entities(intel) -> str:
+    """One line listing details already shared (ExtractedIntelligence or CompactIntelligence)."""
+    parts = []
+    for field, label in _ENTITY_LABELS:
+        values = list(getattr(intel, field))[:_MAX_ENTITIES_PER_TYPE]
+        if values:
+            parts.append(f"{label}: {', '.join(values)}")
+    return ("Details they have shared so far - " + "; ".join(parts)) if parts else ""
+
+
+def window(
+    summary: Optional[ConversationSummary],
+    conversation_history: List[Message],
+    intel=None,
+    token_budget: int = PROMPT_TOKEN_BUDGET,
+    recent_messages: int = PROMPT_RECENT_MESSAGES,
+) -> Tuple[ConversationSummary, List[Message], str]:
+    """
+    Split history into (updated summary, messages to send verbatim, context text).
+    Keeps at most recent_messages verbatim, fewer if they exceed token_budget (the newest
+    message is always kept); everything older is folded into the summary once. If the
+    client rewrote or truncated history (the folded prefix no longer matches its digest),
+    the summary is rebuilt.
+    """
+    h = history_hash(conversation_history[: summary.folded] if summary else [])
+    if summary is None or (summary.folded and h.digest() != summary.digest):
+        summary = ConversationSummary()
+        h = history_hash([])
+    start = max(summary.folded, len(conversation_history) - recent_messages)
+    tokens = sum(_message_tokens(m) for m in conversation_history[start:])
+    while tokens > token_budget and start < len(conversation_history) - 1:
+        tokens -= _message_tokens(conversation_history[start])
+        start += 1
+    if start > summary.folded:
+        scrolled = conversation_history[summary.folded:start]
+        for msg in scrolled:
+            hash_message(h, msg)
+        summary.fold(scrolled)
+        summary.digest = h.digest()
+    context = "\n".join(part for part in (summary.render(), render_entities(intel) if intel else "") if part)
+    return summary, conversation_history[start:], context
+
@@ -0,0 +1,174 @@
+"""
+Offline conversation replay - drive captured traffic through the real pipeline in-process.
+
+Usage:
+  python -m app.replay captures.jsonl [--concurrency 50] [--llm-latency-ms 300] [--repeat 4] [--json]
+
+Input: one HoneypotRequest JSON object per line. Turns of a session are replayed in file
+order; sessions run concurrently. The LLM is stubbed (fixed reply after a configurable
+delay) and callbacks are counted, never sent. Reports messages/sec, per-stage
+p50/p95/p99 and peak RSS.
+"""
+import argparse
+import asyncio
+import json
+import math
+import resource
+import sys
+import time
+from collections import OrderedDict, defaultdict
+from typing import Dict, List, Optional
+
+from app import agent
+from app.callback_outbox import dispatcher
+from app.models import HoneypotRequest
+from app.pipeline import STAGES, process_turn
+
+STUB_REPLY = "Oh no, what should I do now? Please tell me the steps."
+
+
+def percentile(sorted_values: List[float], p: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list (p in 0..100)."""
+    if not sorted_values:
+        return None
+    k = math.ceil(p / 100 * len(sorted_values)) - 1
+    return sorted_values[max(0, min(len(sorted_values) - 1, k))]
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB (ru_maxrss is KB on Linux, bytes on macOS)."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def load_sessions(lines, repeat: int = 1) -> "OrderedDict[str, List[HoneypotRequest]]":
+    """Group requests by sessionId (file order kept); repeat > 1 clones sessions under new ids."""
+    sessions: "OrderedDict[str, List[HoneypotRequest]]" = OrderedDict()
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        req = HoneypotRequest.model_validate_json(line)
+        sessions.setdefault(req.sessionId, []).append(req)
+    if repeat <= 1:
+        return sessions
+    cloned: "OrderedDict[str, List[HoneypotRequest]]" = OrderedDict()
+    for r in range(repeat):
+        for sid, turns in sessions.items():
+            new_sid = f"{sid}#r{r}"
+            cloned[new_sid] = [t.model_copy(update={"sessionId": new_sid}) for t in turns]
+    return cloned
+
+
+def _install_stubs(llm_latency: float) -> Dict[str, int]:
+    """Stub the LLM and the callback dispatcher; returns counters they update."""
+    counters = {"llm_calls": 0, "callbacks": 0}
+
+    async def fake_llm(system_prompt: str, user_message: str) -> str:
+        counters["llm_calls"] += 1
+        if llm_latency > 0:
+            await asyncio.sleep(llm_latency)
+        return STUB_REPLY
+
+    def fake_submit(payload) -> int:
+        counters["callbacks"] += 1
+        return counters["callbacks"]
+
+    agent._call_llm_async = fake_llm
+    agent.reply_cache = agent.ReplyCache()  # report this run's hit rate and tier mix only
+    agent.reset_stats()
+    dispatcher.submit = fake_submit
+    return counters
+
+
+async def replay(sessions: "OrderedDict[str, List[HoneypotRequest]]", concurrency: int) -> Dict[str, List[float]]:
+    """Replay all sessions, at most `concurrency` at once. Returns stage -> durations (s)."""
+    samples: Dict[str, List[float]] = defaultdict(list)
+    sem = asyncio.Semaphore(max(1, concurrency))
+
+    async def run_session(turns: List[HoneypotRequest]) -> None:
+        async with sem:
+            for req in turns:
+                timings: Dict[str, float] = {}
+                start = time.perf_counter()
+                await process_turn(req, timings)
+                samples["total"].append(time.perf_counter() - start)
+                for stage, dur in timings.items():
+                    samples[stage].append(dur)
+
+    await asyncio.gather(*(run_session(turns) for turns in sessions.values()))
+    return samples
+
+
+def build_report(samples: Dict[str, List[float]], elapsed: float, counters: Dict[str, int], n_sessions: int) -> dict:
+    n_messages = len(samples.get("total", []))
+    stages = {}
+    for stage in STAGES + ("total",):
+        values = sorted(samples.get(stage, []))
+        if not values:
+            continue
+        stages[stage] = {
+            "count": len(values),
+            "p50_ms": round(percentile(values, 50) * 1000, 3),
+            "p95_ms": round(percentile(values, 95) * 1000, 3),
+            "p99_ms": round(percentile(values, 99) * 1000, 3),
+        }
+    return {
+        "sessions": n_sessions,
+        "messages": n_messages,
+        "elapsed_s": round(elapsed, 3),
+        "messages_per_s": round(n_messages / elapsed, 1) if elapsed > 0 else None,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "llm_calls": counters["llm_calls"],
+        "reply_tiers": agent.stats()["tiers"],
+        "reply_cache": agent.reply_cache.stats(),
+        "callbacks": counters["callbacks"],
+        "stages": stages,
+    }
+
+
+def format_report(report: dict) -> str:
+    lines = [
+        f"Sessions: {report['sessions']}  Messages: {report['messages']}  Elapsed: {report['elapsed_s']}s",
+        f"Throughput: {report['messages_per_s']} msg/s  Peak RSS: {report['peak_rss_mb']} MB",
+        f"LLM calls (stubbed): {report['llm_calls']}  Callbacks (not sent): {report['callbacks']}",
+        "Reply tiers: " + "  ".join(
+            f"{tier} {frac:.1%}" for tier, frac in report["reply_tiers"]["fractions"].items()
+        ),
+        f"Reply cache: hit rate {report['reply_cache']['hitRate']:.1%}"
+        f"  saved {report['reply_cache']['savedLlmSeconds']}s of LLM time",
+        "",
+        f"{'stage':<10}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}",
+    ]
+    for stage, s in report["stages"].items():
+        lines.append(f"{stage:<10}{s['count']:>8}{s['p50_ms']:>10}{s['p95_ms']:>10}{s['p99_ms']:>10}")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.replay", description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("path", help="JSONL file of HoneypotRequest objects ('-' for stdin)")
+    parser.add_argument("--concurrency", "-c", type=int, default=50, help="sessions replayed at once")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="stubbed LLM delay per call")
+    parser.add_argument("--repeat", type=int, default=1, help="clone every session N times")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    if args.path == "-":
+        sessions = load_sessions(sys.stdin, args.repeat)
+    else:
+        with open(args.path, encoding="utf-8") as f:
+            sessions = load_sessions(f, args.repeat)
+
+    counters = _install_stubs(args.llm_latency_ms / 1000)
+    start = time.perf_counter()
+    samples = asyncio.run(replay(sessions, args.concurrency))
+    elapsed = time.perf_counter() - start
+
+    report = build_report(samples, elapsed, counters, len(sessions))
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+Rule-based reply tier - in-character replies for common turns, without the LLM.
+
+Rules look at the conversation stage (turn number) and at which entity types were just
+extracted (a new UPI ID, link, account, phone). Each match has a confidence; the agent
+serves it directly when confident enough, otherwise asks the LLM and keeps the template
+as its fallback. A rule asking for an entity the session already has is skipped, and a
+rule that produced the previous reply is not served again (the LLM answers).
+"""
+import random
+import re
+from typing import Iterable, Optional, Sequence, Tuple
+
+# Newly extracted entity type -> replies that keep the scammer talking (and sharing more).
+# Checked in this order when several types are new in one turn.
+ENTITY_REPLIES = (
+    ("phishingLinks", (
+        "I opened the link but the page is not loading. Can you send it again?",
+        "The link shows an error on my phone. Is there another website I can use?",
+    )),
+    ("upiIds", (
+        "My UPI app says this ID is not verified. Can you share another UPI ID or the account number?",
+        "The payment is failing for this UPI ID. Is there a different one I can try?",
+    )),
+    ("bankAccounts", (
+        "Which bank and branch is this account in? Please also share the IFSC code.",
+        "My bank is asking for the account holder name. What name should I enter?",
+    )),
+    ("phoneNumbers", (
+        "I tried calling but it is not connecting. Is there another number?",
+        "Whose number is this? Can I call you on it now?",
+    )),
+)
+ENTITY_CONFIDENCE = 0.9
+
+# (pattern, replies, confidence, first turn, last turn or None, entity types the replies ask for)
+INTENT_RULES = (
+    (re.compile(r"\b(otp|pin|cvv)\b", re.I), (
+        "I haven't received any OTP yet. Should I wait?",
+        "The OTP message hasn't come. Can you send it again?",
+    ), 0.85, 0, None, ()),
+    (re.compile(r"\b(pay|payment|fee|charges?|transfer|send (the )?(money|amount))\b", re.I), (
+        "Where should I send the money? Please give me the UPI ID.",
+        "How much do I need to pay, and to which account?",
+    ), 0.8, 0, None, ("upiIds", "bankAccounts")),
+    (re.compile(r"\b(block(ed)?|suspend(ed)?|verify|kyc|frozen|deactivat\w*)\b", re.I), (
+        "Why is my account being blocked? How do I verify?",
+        "What happened to my account? I didn't get any message from the bank.",
+        "Is this really from my bank? What do I need to do?",
+    ), 0.85, 0, 1, ()),  # opening only; later repeats of the threat go to the LLM
+)
+LATE_STAGE_TURN = 6
+LATE_STAGE_REPLIES = (
+    "Please wait, my phone is very slow today.",
+    "Sorry, I was in a meeting. What should I do now?",
+)
+LATE_STAGE_CONFIDENCE = 0.5
+REPEAT_CONFIDENCE = 0.0  # the rule that produced the previous template: never served directly
+
+
+def _pick(replies: Sequence[str], confidence: float, last_reply: Optional[str]) -> Tuple[str, float]:
+    if last_reply in replies:
+        # Same rule twice in a row reads as scripted: other wording, and only as a fallback
+        return random.choice([r for r in replies if r != last_reply] or replies), REPEAT_CONFIDENCE
+    return random.choice(replies), confidence
+
+
+def template_reply(
+    message_text: str,
+    turn: int,
+    new_entity_types: Iterable[str] = (),
+    known_entity_types: Iterable[str] = (),
+    last_reply: Optional[str] = None,
+) -> Optional[Tuple[str, float]]:
+    """
+    (reply, confidence) for this turn, or None if no rule applies.
+    turn is the number of completed turns in the session (0 for the first message);
+    known_entity_types are intelligence fields the session already has values for, and
+    last_reply is the reply sent on the previous turn, whatever tier produced it.
+    """
+    new_types = set(new_entity_types)
+    if new_types:
+        for field, replies in ENTITY_REPLIES:
+            if field in new_types:
+                return _pick(replies, ENTITY_CONFIDENCE, last_reply)
+    known = set(known_entity_types)
+    for pattern, replies, confidence, first, last, asks_for in INTENT_RULES:
+        if (
+            first <= turn
+            and (last is None or turn <= last)
+            and known.isdisjoint(asks_for)
+            and pattern.search(message_text)
+        ):
+            return _pick(replies, confidence, last_reply)
+    if turn >= LATE_STAGE_TURN:
+        return _pick(LATE_STAGE_REPLIES, LATE_STAGE_CONFIDENCE, last_reply)
+    return None
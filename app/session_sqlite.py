@@ -0,0 +1,247 @@
+"""
+SQLite session backend - shared session state for multiple workers on one host.
+
+Each session is one row (JSON state + version counter) in a WAL-mode database, so
+several uvicorn worker processes can serve the same conversation. Reads go through a
+per-process cache that is revalidated with a cheap version lookup on the first access
+of each turn; writes are buffered and flushed in one transaction at the end of a turn.
+Both may wait on the database (blocking_io), so the pipeline runs them off the event loop;
+the in-memory maps have their own lock, so other turns' updates never wait on a flush
+that is queued behind another worker's write.
+If another worker updated the session meanwhile, the two versions are merged
+(turn deltas added, intelligence unioned) instead of one overwriting the other.
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from app.config import SESSION_DB_PATH, SESSION_LOCK_STRIPES, SESSION_MAX_COUNT, SESSION_TTL_SECONDS
+from app.session_store import CompactIntelligence, Session, SessionBackend
+
+logger = logging.getLogger(__name__)
+
+_SWEEP_INTERVAL = 60.0  # seconds between expired-row sweeps
+
+
+def _merge_states(base: Optional[dict], local: dict, remote: dict) -> dict:
+    """
+    Combine this worker's changes (base -> local) with a concurrent remote version.
+    Counters add their deltas, flags OR, intelligence unions; the newer queued-callback record
+    wins, as does the first campaign assigned; detector and history cursor state come from
+    local (it saw the latest message), as does the last reply sent.
+    """
+    merged = dict(local)
+    base_turns = base["turn_count"] if base else 0
+    merged["turn_count"] = remote["turn_count"] + max(0, local["turn_count"] - base_turns)
+    merged["scam_detected"] = local["scam_detected"] or remote["scam_detected"]
+    intel = CompactIntelligence.from_dict(remote["intelligence"])
+    intel.add(CompactIntelligence.from_dict(local["intelligence"]))
+    merged["intelligence"] = intel.to_dict()
+    merged["campaign_id"] = remote.get("campaign_id") or local.get("campaign_id")
+    if remote.get("callback_queued_at", 0.0) > local.get("callback_queued_at", 0.0):
+        for key in ("callback_queued_fingerprint", "callback_queued_at"):
+            merged[key] = remote.get(key)
+    return merged
+
+
+class SQLiteSessionBackend(SessionBackend):
+    """Sessions persisted in SQLite (WAL) with a read-through cache and batched writes."""
+
+    blocking_io = True
+
+    def __init__(
+        self,
+        path: str = SESSION_DB_PATH,
+        ttl_seconds: float = SESSION_TTL_SECONDS,
+        cache_size: int = SESSION_MAX_COUNT,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.cache_size = cache_size
+        self._clock = clock
+        self._lock = threading.RLock()  # cache, versions, dirty set
+        self._db_lock = threading.RLock()  # the connection; always taken before _lock
+        self._session_locks = [threading.RLock() for _ in range(max(1, SESSION_LOCK_STRIPES))]
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " session_id TEXT PRIMARY KEY,"
+            " version INTEGER NOT NULL,"
+            " state TEXT NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated_at)")
+        self._cache: "OrderedDict[str, Session]" = OrderedDict()
+        self._versions: Dict[str, int] = {}  # row version the cached copy was read at / written as
+        self._base: Dict[str, dict] = {}  # state at first access this turn (for conflict merges)
+        self._dirty: Dict[str, Session] = {}
+        self._hooks: List[Callable[[Session, str], None]] = []
+        self._last_sweep = clock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.flushes = 0
+        self.conflicts = 0
+        self.evictions = {"ttl": 0}
+
+    def add_eviction_hook(self, hook: Callable[[Session, str], None]) -> None:
+        """hook(session, reason) runs for each expired session removed from the database."""
+        self._hooks.append(hook)
+
+    def lock_for(self, session_id: str) -> threading.RLock:
+        return self._session_locks[hash(session_id) % len(self._session_locks)]
+
+    def get_or_create(self, session_id: str) -> Session:
+        """Session for this turn; marks it dirty so the next flush() persists it."""
+        with self._lock:
+            session = self._dirty.get(session_id)
+            if session is not None:
+                return session
+        with self._db_lock, self._lock:
+            session = self._dirty.get(session_id)
+            if session is not None:
+                return session
+            row = self._conn.execute(
+                "SELECT version, updated_at FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            cached = self._cache.get(session_id)
+            if row is None:
+                session, version = Session(session_id), 0
+            elif self.ttl_seconds and self._clock() - row[1] > self.ttl_seconds:
+                self._expire(session_id)
+                session, version = Session(session_id), 0
+            elif cached is not None and self._versions.get(session_id) == row[0]:
+                session, version = cached, row[0]
+                self.hits += 1
+            else:
+                state = self._conn.execute(
+                    "SELECT state FROM sessions WHERE session_id = ?", (session_id,)
+                ).fetchone()[0]
+                session, version = Session.from_state(session_id, json.loads(state)), row[0]
+            if session is not cached:
+                self.misses += 1
+            self._remember(session, version)
+            self._base[session_id] = session.to_state()
+            self._dirty[session_id] = session
+            return session
+
+    def _touched(self, session: Session) -> None:
+        # A flush() from another thread may have written this session mid-update
+        with self._lock:
+            self._dirty.setdefault(session.session_id, session)
+
+    def _remember(self, session: Session, version: int) -> None:
+        sid = session.session_id
+        self._cache[sid] = session
+        self._cache.move_to_end(sid)
+        self._versions[sid] = version
+        while len(self._cache) > self.cache_size > 0:
+            old, _ = self._cache.popitem(last=False)
+            if old not in self._dirty:
+                self._versions.pop(old, None)
+
+    def flush(self) -> None:
+        """Write every session touched since the last flush in a single transaction."""
+        with self._db_lock:
+            if not self._dirty:
+                self._maybe_sweep()
+                return
+            # May wait (busy_timeout) for another worker's write: only the connection is held
+            self._conn.execute("BEGIN IMMEDIATE")
+            with self._lock:
+                dirty, self._dirty = self._dirty, {}
+                now = self._clock()
+                try:
+                    for sid, session in dirty.items():
+                        row = self._conn.execute(
+                            "SELECT version, state FROM sessions WHERE session_id = ?", (sid,)
+                        ).fetchone()
+                        current = row[0] if row else 0
+                        state = session.to_state()
+                        if current != self._versions.get(sid, 0):
+                            self.conflicts += 1
+                            if row is not None:
+                                state = _merge_states(self._base.get(sid), state, json.loads(row[1]))
+                            session.load_state(state)
+                        self._conn.execute(
+                            "INSERT INTO sessions (session_id, version, state, updated_at) VALUES (?, ?, ?, ?)"
+                            " ON CONFLICT(session_id) DO UPDATE SET"
+                            " version = excluded.version, state = excluded.state, updated_at = excluded.updated_at",
+                            (sid, current + 1, json.dumps(state), now),
+                        )
+                        self._versions[sid] = current + 1
+                        self._base.pop(sid, None)
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    self._dirty.update(dirty)
+                    raise
+                self.writes += len(dirty)
+                self.flushes += 1
+            self._maybe_sweep()
+
+    def _maybe_sweep(self) -> None:
+        if self.ttl_seconds and self._clock() - self._last_sweep >= _SWEEP_INTERVAL:
+            self.sweep()
+
+    def sweep(self) -> int:
+        """Delete expired sessions (idle > ttl) and run eviction hooks. Returns how many."""
+        self._last_sweep = self._clock()
+        if not self.ttl_seconds:
+            return 0
+        cutoff = self._last_sweep - self.ttl_seconds
+        with self._db_lock, self._lock:
+            rows = self._conn.execute(
+                "SELECT session_id FROM sessions WHERE updated_at < ?", (cutoff,)
+            ).fetchall()
+            for (sid,) in rows:
+                if sid not in self._dirty:
+                    self._expire(sid)
+        return len(rows)
+
+    def _expire(self, session_id: str) -> None:
+        """Remove one expired row (caller holds both locks) and run hooks on its last state."""
+        row = self._conn.execute("SELECT state FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        self._cache.pop(session_id, None)
+        self._versions.pop(session_id, None)
+        if row is None:
+            return  # another worker expired it first
+        self.evictions["ttl"] += 1
+        session = Session.from_state(session_id, json.loads(row[0]))
+        for hook in self._hooks:
+            try:
+                hook(session, "ttl")
+            except Exception:
+                logger.exception("Session eviction hook failed for %s", session_id)
+
+    def close(self) -> None:
+        self.flush()
+        with self._db_lock:
+            self._conn.close()
+
+    def stats(self) -> Dict[str, object]:
+        with self._db_lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        return {
+            "backend": "sqlite",
+            "sessions": count,
+            "cached": len(self._cache),
+            "dirty": len(self._dirty),
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "flushes": self.flushes,
+            "conflicts": self.conflicts,
+            "evictions": dict(self.evictions),
+            "limits": {"ttlSeconds": self.ttl_seconds, "cacheSize": self.cache_size},
+        }
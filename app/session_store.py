@@ -1,38 +1,146 @@
 """
-In-memory session state per conversation.
+Session state per conversation, behind a pluggable backend.
+
+SESSION_BACKEND=memory (default): sessions live in a bounded in-process LRU; idle sessions
+expire after SESSION_TTL_SECONDS and the least recently used are evicted past
+SESSION_MAX_COUNT / SESSION_MAX_BYTES.
+SESSION_BACKEND=sqlite: sessions persist in a shared SQLite (WAL) file, so several
+uvicorn workers on one host see the same state (see app.session_sqlite).
+
+Eviction hooks run for every evicted/expired session (e.g. to flush a pending callback).
+New intelligence values are also added to the cross-session app.indicator_index, and an
+evicted session is removed from it.
 """
-from typing import Dict
-
-from app.models import ExtractedIntelligence
-
-
-def _merge_intelligence(a: ExtractedIntelligence, b: ExtractedIntelligence) -> ExtractedIntelligence:
-    """Merge two ExtractedIntelligence objects, deduplicating."""
-    def merge_lists(la: list, lb: list) -> list:
-        seen = set()
-        result = []
-        for x in la + lb:
-            if x not in seen:
-                seen.add(x)
-                result.append(x)
-        return result
-
-    return ExtractedIntelligence(
-        bankAccounts=merge_lists(a.bankAccounts, b.bankAccounts),
-        upiIds=merge_lists(a.upiIds, b.upiIds),
-        phishingLinks=merge_lists(a.phishingLinks, b.phishingLinks),
-        phoneNumbers=merge_lists(a.phoneNumbers, b.phoneNumbers),
-        suspiciousKeywords=merge_lists(a.suspiciousKeywords, b.suspiciousKeywords),
-    )
+import logging
+import threading
+import time
+from collections import OrderedDict
+from itertools import islice
+from typing import Callable, Dict, List, Optional, TypeVar
+
+from app.config import (
+    SESSION_BACKEND,
+    SESSION_LOCK_STRIPES,
+    SESSION_MAX_BYTES,
+    SESSION_MAX_COUNT,
+    SESSION_TTL_SECONDS,
+)
+from app.detector import ScoreState
+from app.indicator_index import index as indicator_index
+from app.models import ExtractedIntelligence, Message, hash_message, history_hash
+from app.prompt_window import ConversationSummary
+
+
+# Intelligence fields, in callback payload order
+INTEL_FIELDS = ("bankAccounts", "upiIds", "phishingLinks", "phoneNumbers", "suspiciousKeywords")
+
+# Rough per-session overhead (objects, dicts, score state) and per-string overhead
+_SESSION_BASE_BYTES = 1024
+_STRING_OVERHEAD_BYTES = 56
+
+
+class CompactIntelligence:
+    """
+    A session's intelligence as five insertion-ordered sets (dict keys): adds are O(1)
+    amortized and nothing is rebuilt per turn. ExtractedIntelligence is only produced
+    (to_model) when a payload is built.
+    """
+
+    __slots__ = INTEL_FIELDS + ("nbytes",)
+
+    def __init__(self):
+        self.bankAccounts: Dict[str, None] = {}
+        self.upiIds: Dict[str, None] = {}
+        self.phishingLinks: Dict[str, None] = {}
+        self.phoneNumbers: Dict[str, None] = {}
+        self.suspiciousKeywords: Dict[str, None] = {}
+        self.nbytes = 0  # approximate memory held by the values
+
+    def add(self, intel) -> int:
+        """Add values from intel (ExtractedIntelligence or CompactIntelligence). Returns how many were new."""
+        added = 0
+        for field in INTEL_FIELDS:
+            values = getattr(self, field)
+            for v in getattr(intel, field):
+                if v not in values:
+                    values[v] = None
+                    self.nbytes += _STRING_OVERHEAD_BYTES + len(v)
+                    added += 1
+        return added
+
+    def __len__(self) -> int:
+        return sum(len(getattr(self, field)) for field in INTEL_FIELDS)
+
+    def to_model(self) -> ExtractedIntelligence:
+        return ExtractedIntelligence(**self.to_dict())
+
+    def to_dict(self) -> Dict[str, List[str]]:
+        return {field: list(getattr(self, field)) for field in INTEL_FIELDS}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, List[str]]) -> "CompactIntelligence":
+        intel = cls()
+        for field in INTEL_FIELDS:
+            values = getattr(intel, field)
+            for v in data.get(field, ()):
+                if v not in values:
+                    values[v] = None
+                    intel.nbytes += _STRING_OVERHEAD_BYTES + len(v)
+        return intel
 
 
 class Session:
     """Session state for a single conversation."""
+
+    __slots__ = (
+        "session_id",
+        "turn_count",
+        "scam_detected",
+        "intel",
+        "score_state",
+        "callback_queued_fingerprint",
+        "callback_queued_at",
+        "history_processed",
+        "history_digest",
+        "summary",
+        "campaign_id",
+        "last_reply",
+        "last_access",
+        "approx_bytes",
+    )
+
     def __init__(self, session_id: str):
         self.session_id = session_id
         self.turn_count = 0
         self.scam_detected = False
-        self.intelligence = ExtractedIntelligence()
+        self.intel = CompactIntelligence()
+        self.score_state = ScoreState()
+        # Last callback handed to the dispatcher (not necessarily delivered yet):
+        # intelligence fingerprint and wall time
+        self.callback_queued_fingerprint: Optional[str] = None
+        self.callback_queued_at = 0.0
+        # conversationHistory already extracted: message count + digest of that prefix
+        self.history_processed = 0
+        self.history_digest = b""
+        # Older history folded out of the LLM prompt window (created on first use)
+        self.summary: Optional[ConversationSummary] = None
+        # Campaign cluster of the first clustered scammer message (app.campaigns)
+        self.campaign_id: Optional[str] = None
+        # Reply sent on the previous turn, whatever tier produced it (not repeated next turn)
+        self.last_reply: Optional[str] = None
+        # Bookkeeping for the bounded store
+        self.last_access = 0.0
+        self.approx_bytes = 0
+
+    @property
+    def intelligence(self) -> ExtractedIntelligence:
+        """Intelligence as a pydantic model (built on access; use .intel on hot paths)."""
+        return self.intel.to_model()
+
+    @intelligence.setter
+    def intelligence(self, value: ExtractedIntelligence) -> None:
+        self.intel = CompactIntelligence()
+        self.intel.add(value)
 
     def to_dict(self) -> dict:
         """For callback payload compatibility."""
@@ -43,36 +151,457 @@ class Session:
             "intelligence": self.intelligence,
         }
 
+    def to_state(self) -> dict:
+        """JSON-safe snapshot of everything a backend must persist."""
+        return {
+            "turn_count": self.turn_count,
+            "scam_detected": self.scam_detected,
+            "intelligence": self.intel.to_dict(),
+            "score_state": self.score_state.to_dict(),
+            "callback_queued_fingerprint": self.callback_queued_fingerprint,
+            "callback_queued_at": self.callback_queued_at,
+            "history_processed": self.history_processed,
+            "history_digest": self.history_digest.hex(),
+            "summary": self.summary.to_dict() if self.summary else None,
+            "campaign_id": self.campaign_id,
+            "last_reply": self.last_reply,
+        }
+
+    def load_state(self, state: dict) -> None:
+        """Replace persisted fields from a to_state() snapshot (store bookkeeping is kept)."""
+        self.turn_count = state.get("turn_count", 0)
+        self.scam_detected = state.get("scam_detected", False)
+        self.intel = CompactIntelligence.from_dict(state.get("intelligence", {}))
+        self.score_state = ScoreState.from_dict(state.get("score_state", {}))
+        self.callback_queued_fingerprint = state.get("callback_queued_fingerprint")
+        self.callback_queued_at = state.get("callback_queued_at", 0.0)
+        self.history_processed = state.get("history_processed", 0)
+        self.history_digest = bytes.fromhex(state.get("history_digest", ""))
+        summary = state.get("summary")
+        self.summary = ConversationSummary.from_dict(summary) if summary else None
+        self.campaign_id = state.get("campaign_id")
+        self.last_reply = state.get("last_reply")
+
+    @classmethod
+    def from_state(cls, session_id: str, state: dict) -> "Session":
+        session = cls(session_id)
+        session.load_state(state)
+        return session
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+def _approx_size(session: Session) -> int:
+    """Approximate memory held by a session; grows with extracted intelligence."""
+    return _SESSION_BASE_BYTES + len(session.session_id) + session.intel.nbytes
+
+
+class SessionBackend:
+    """
+    Session backend interface. Backends implement get_or_create and lock_for (plus
+    hooks/stats/flush); the per-turn operations below are written against them and are
+    atomic per session via update(). Sessions returned by get_or_create may be mutated
+    in place until flush() is called at the end of a turn.
+    """
+
+    # True if get_or_create/flush may wait on disk or other processes (run them off the event loop)
+    blocking_io = False
+
+    def get_or_create(self, session_id: str) -> Session:
+        raise NotImplementedError
+
+    def lock_for(self, session_id: str):
+        """Re-entrant lock guarding this session (shared with other sessions on the same stripe)."""
+        raise NotImplementedError
+
+    def add_eviction_hook(self, hook: Callable[[Session, str], None]) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, object]:
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        """Persist sessions touched since the last flush (no-op for in-memory backends)."""
+
+    def close(self) -> None:
+        self.flush()
+
+    def _intelligence_changed(self, session: Session) -> None:
+        """Called (under the session lock) after a session's intelligence grew."""
+
+    def _touched(self, session: Session) -> None:
+        """Called (under the session lock) after update() changed a session."""
+
+    def update(self, session_id: str, fn: Callable[[Session], T]) -> T:
+        """Apply fn(session) atomically with respect to other updates of the same session."""
+        with self.lock_for(session_id):
+            session = self.get_or_create(session_id)
+            result = fn(session)
+            self._touched(session)
+            return result
+
+    def take_unprocessed_history(self, session_id: str, conversation_history: List[Message]) -> List[Message]:
+        """
+        Return the history messages this session has not extracted yet, and mark them processed.
+        If the client rewrote or truncated earlier history (count/digest mismatch), the whole
+        history is returned for a full rescan.
+        """
+        def take(session: Session) -> List[Message]:
+            n = session.history_processed
+            h = history_hash(conversation_history[:n]) if n <= len(conversation_history) else None
+            if h is None or h.digest() != session.history_digest:
+                new_messages = conversation_history
+                h = history_hash(conversation_history)
+            else:
+                new_messages = conversation_history[n:]
+                for msg in new_messages:
+                    hash_message(h, msg)
+            session.history_processed = len(conversation_history)
+            session.history_digest = h.digest()
+            return new_messages
+
+        return self.update(session_id, take)
+
+    def update_intelligence(self, session_id: str, intel: ExtractedIntelligence) -> List[str]:
+        """Merge new intelligence into session, deduplicating. Returns the fields that gained values."""
+        def merge(session: Session) -> List[str]:
+            compact = session.intel
+            before = [len(getattr(compact, field)) for field in INTEL_FIELDS]
+            if not compact.add(intel):
+                return []
+            self._intelligence_changed(session)
+            changed = []
+            for field, n in zip(INTEL_FIELDS, before):
+                values = getattr(compact, field)
+                if len(values) > n:
+                    changed.append(field)
+                    indicator_index.add(session_id, field, islice(reversed(values), len(values) - n))
+            return changed
+
+        return self.update(session_id, merge)
+
+    def increment_turn(self, session_id: str) -> int:
+        """Increment turn count for session; returns the new count."""
+        def bump(session: Session) -> int:
+            session.turn_count += 1
+            return session.turn_count
+
+        return self.update(session_id, bump)
+
+    def mark_scam_detected(self, session_id: str) -> None:
+        """Mark session as scam detected."""
+        def mark(session: Session) -> None:
+            session.scam_detected = True
+
+        self.update(session_id, mark)
+
+    def record_callback_queued(self, session_id: str, fingerprint: str) -> None:
+        """Remember what was last handed to the callback dispatcher for this session."""
+        def record(session: Session) -> None:
+            session.callback_queued_fingerprint = fingerprint
+            session.callback_queued_at = time.time()
+
+        self.update(session_id, record)
+
+
+class SessionStore(SessionBackend):
+    """
+    LRU + idle-TTL session map. OrderedDict order is recency, so the least recently used
+    (and, since TTL is idle time, the first to expire) session is always at the front:
+    lookups, inserts and evictions are O(1) amortized. One re-entrant lock guards the map
+    and every update; use StripedSessionStore to spread sessions over several of these.
+    """
 
-_sessions: Dict[str, Session] = {}
+    def __init__(
+        self,
+        max_sessions: int = SESSION_MAX_COUNT,
+        ttl_seconds: float = SESSION_TTL_SECONDS,
+        max_bytes: int = SESSION_MAX_BYTES,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._hooks: List[Callable[[Session, str], None]] = []
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = {"ttl": 0, "count": 0, "bytes": 0}
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def add_eviction_hook(self, hook: Callable[[Session, str], None]) -> None:
+        """hook(session, reason) runs after a session is evicted; reason is ttl/count/bytes."""
+        self._hooks.append(hook)
+
+    def lock_for(self, session_id: str) -> threading.RLock:
+        return self._lock
+
+    def get(self, session_id: str) -> Optional[Session]:
+        """Live session or None; refreshes recency."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            now = self._clock()
+            if self.ttl_seconds and now - session.last_access > self.ttl_seconds:
+                self._evict(session_id, "ttl")
+                return None
+            session.last_access = now
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def get_or_create(self, session_id: str) -> Session:
+        with self._lock:
+            session = self.get(session_id)
+            if session is not None:
+                self.hits += 1
+                return session
+            self.misses += 1
+            session = Session(session_id)
+            session.last_access = self._clock()
+            session.approx_bytes = _approx_size(session)
+            self._sessions[session_id] = session
+            self.total_bytes += session.approx_bytes
+            self._enforce_limits(keep=session_id)
+            return session
+
+    def _intelligence_changed(self, session: Session) -> None:
+        self.resize(session)
+
+    def resize(self, session: Session) -> None:
+        """Re-estimate a session's size after its intelligence grew."""
+        with self._lock:
+            size = _approx_size(session)
+            self.total_bytes += size - session.approx_bytes
+            session.approx_bytes = size
+            self._enforce_limits(keep=session.session_id)
+
+    def sweep(self) -> int:
+        """Evict expired sessions from the LRU front. Returns how many were evicted."""
+        if not self.ttl_seconds:
+            return 0
+        n = 0
+        with self._lock:
+            cutoff = self._clock() - self.ttl_seconds
+            while self._sessions:
+                sid, oldest = next(iter(self._sessions.items()))
+                if oldest.last_access >= cutoff:
+                    break
+                self._evict(sid, "ttl")
+                n += 1
+        return n
+
+    def _enforce_limits(self, keep: str) -> None:
+        self.sweep()
+        while len(self._sessions) > self.max_sessions > 0:
+            if not self._evict_oldest("count", keep):
+                break
+        while self.max_bytes and self.total_bytes > self.max_bytes:
+            if not self._evict_oldest("bytes", keep):
+                break
+
+    def _evict_oldest(self, reason: str, keep: str) -> bool:
+        for sid in self._sessions:
+            if sid != keep:
+                self._evict(sid, reason)
+                return True
+        return False
+
+    def _evict(self, session_id: str, reason: str) -> None:
+        session = self._sessions.pop(session_id)
+        self.total_bytes -= session.approx_bytes
+        self.evictions[reason] += 1
+        for hook in self._hooks:
+            try:
+                hook(session, reason)
+            except Exception:
+                logger.exception("Session eviction hook failed for %s", session_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sessions.clear()
+            self.total_bytes = 0
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "approxBytes": self.total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": dict(self.evictions),
+                "limits": {"maxSessions": self.max_sessions, "ttlSeconds": self.ttl_seconds, "maxBytes": self.max_bytes},
+            }
+
+
+def _split_limit(limit: int, parts: int) -> int:
+    """Per-stripe share of a limit (rounded up; 0 stays unlimited)."""
+    return -(-limit // parts) if limit else 0
+
+
+class StripedSessionStore(SessionBackend):
+    """
+    Sessions spread over N independent SessionStore stripes by hash(session_id), each with
+    its own lock, so concurrent turns of different sessions rarely contend while turns of
+    the same session stay serialized. Limits are split evenly; LRU order is per stripe.
+    """
+
+    def __init__(
+        self,
+        stripes: int = SESSION_LOCK_STRIPES,
+        max_sessions: int = SESSION_MAX_COUNT,
+        ttl_seconds: float = SESSION_TTL_SECONDS,
+        max_bytes: int = SESSION_MAX_BYTES,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        stripes = max(1, stripes)
+        self._stripes = [
+            SessionStore(_split_limit(max_sessions, stripes), ttl_seconds, _split_limit(max_bytes, stripes), clock)
+            for _ in range(stripes)
+        ]
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+
+    def _stripe(self, session_id: str) -> SessionStore:
+        return self._stripes[hash(session_id) % len(self._stripes)]
+
+    def __len__(self) -> int:
+        return sum(len(s) for s in self._stripes)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._stripe(session_id)
+
+    def add_eviction_hook(self, hook: Callable[[Session, str], None]) -> None:
+        for stripe in self._stripes:
+            stripe.add_eviction_hook(hook)
+
+    def lock_for(self, session_id: str) -> threading.RLock:
+        return self._stripe(session_id).lock_for(session_id)
+
+    def get(self, session_id: str) -> Optional[Session]:
+        return self._stripe(session_id).get(session_id)
+
+    def get_or_create(self, session_id: str) -> Session:
+        return self._stripe(session_id).get_or_create(session_id)
+
+    def _intelligence_changed(self, session: Session) -> None:
+        self._stripe(session.session_id).resize(session)
+
+    def sweep(self) -> int:
+        return sum(stripe.sweep() for stripe in self._stripes)
+
+    def clear(self) -> None:
+        for stripe in self._stripes:
+            stripe.clear()
+
+    def stats(self) -> Dict[str, object]:
+        per = [stripe.stats() for stripe in self._stripes]
+        evictions = {reason: sum(st["evictions"][reason] for st in per) for reason in per[0]["evictions"]}
+        return {
+            "sessions": sum(st["sessions"] for st in per),
+            "approxBytes": sum(st["approxBytes"] for st in per),
+            "hits": sum(st["hits"] for st in per),
+            "misses": sum(st["misses"] for st in per),
+            "evictions": evictions,
+            "stripes": len(per),
+            "limits": {"maxSessions": self.max_sessions, "ttlSeconds": self.ttl_seconds, "maxBytes": self.max_bytes},
+        }
+
+
+def _make_backend() -> SessionBackend:
+    if SESSION_BACKEND == "sqlite":
+        from app.session_sqlite import SQLiteSessionBackend
+        return SQLiteSessionBackend()
+    if SESSION_BACKEND != "memory":
+        raise ValueError(f"Unknown SESSION_BACKEND: {SESSION_BACKEND!r} (expected memory or sqlite)")
+    return StripedSessionStore()
+
+
+_backend: SessionBackend = _make_backend()
+
+
+def _unindex_evicted(session: Session, reason: str) -> None:
+    indicator_index.remove_session(session.session_id, session.intel)
+
+
+_backend.add_eviction_hook(_unindex_evicted)
+
+
+def get_backend() -> SessionBackend:
+    return _backend
+
+
+def set_backend(backend: SessionBackend) -> SessionBackend:
+    """Swap the process-wide backend (tests, tools). Returns the previous one."""
+    global _backend
+    previous, _backend = _backend, backend
+    return previous
 
 
 def get_or_create(session_id: str) -> Session:
     """
     Get existing session or create new one.
     """
-    if session_id in _sessions:
-        return _sessions[session_id]
-    session = Session(session_id)
-    _sessions[session_id] = session
-    return session
+    return _backend.get_or_create(session_id)
+
+
+def add_eviction_hook(hook: Callable[[Session, str], None]) -> None:
+    """Register hook(session, reason) to run when a session is evicted."""
+    _backend.add_eviction_hook(hook)
+
+
+def stats() -> Dict[str, object]:
+    """Backend stats: session count, hit/miss and eviction counters."""
+    return _backend.stats()
+
+
+def flush() -> None:
+    """Persist sessions touched during this turn (batched; no-op in memory)."""
+    _backend.flush()
+
 
+def update(session_id: str, fn: Callable[[Session], T]) -> T:
+    """Apply fn(session) atomically with respect to other updates of the same session."""
+    return _backend.update(session_id, fn)
 
-def update_intelligence(session_id: str, intel: ExtractedIntelligence) -> None:
+
+def take_unprocessed_history(session_id: str, conversation_history: List[Message]) -> List[Message]:
+    """
+    Return the history messages this session has not extracted yet, and mark them processed.
+    Full history on rewrite/truncation.
+    """
+    return _backend.take_unprocessed_history(session_id, conversation_history)
+
+
+def update_intelligence(session_id: str, intel: ExtractedIntelligence) -> List[str]:
     """
     Merge new intelligence into session, deduplicating.
+    Returns the intelligence fields that gained new values.
     """
-    session = get_or_create(session_id)
-    session.intelligence = _merge_intelligence(session.intelligence, intel)
+    return _backend.update_intelligence(session_id, intel)
 
 
-def increment_turn(session_id: str) -> None:
-    """Increment turn count for session."""
-    session = get_or_create(session_id)
-    session.turn_count += 1
+def increment_turn(session_id: str) -> int:
+    """Increment turn count for session; returns the new count."""
+    return _backend.increment_turn(session_id)
 
 
 def mark_scam_detected(session_id: str) -> None:
     """Mark session as scam detected."""
-    session = get_or_create(session_id)
-    session.scam_detected = True
+    _backend.mark_scam_detected(session_id)
+
+
+def record_callback_queued(session_id: str, fingerprint: str) -> None:
+    """Remember what was last handed to the callback dispatcher for this session."""
+    _backend.record_callback_queued(session_id, fingerprint)
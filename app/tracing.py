@@ -0,0 +1,127 @@
+"""
+Opt-in per-request tracing - Server-Timing headers, sampled cProfile runs and stack dumps
+of slow requests (written to PROFILE_DIR).
+
+begin() returns None unless something is enabled for the request, so with tracing off the
+endpoint pays a few comparisons and nothing else.
+"""
+import asyncio
+import cProfile
+import json
+import logging
+import os
+import random
+import re
+import time
+import traceback
+from itertools import count
+from time import perf_counter
+from typing import Dict, Optional
+
+from app.config import PROFILE_DIR, PROFILE_SAMPLE_RATE, PROFILE_SLOW_SECONDS, TRACE_SERVER_TIMING
+
+logger = logging.getLogger(__name__)
+
+DEBUG_HEADER = "x-debug-trace"
+
+_UNSAFE_FILENAME = re.compile(r"[^A-Za-z0-9_.-]+")
+_sequence = count(1)
+_profiling = False  # only one cProfile can be active per thread, and requests share the loop thread
+
+
+class RequestTrace:
+    """Tracing state for one request."""
+
+    __slots__ = ("start", "server_timing", "profiler", "watchdog", "stack")
+
+    def __init__(self, server_timing: bool):
+        self.start = perf_counter()
+        self.server_timing = server_timing
+        self.profiler: Optional[cProfile.Profile] = None
+        self.watchdog: Optional[asyncio.TimerHandle] = None
+        self.stack = ""
+
+    def _capture_stack(self, task: asyncio.Task) -> None:
+        """Watchdog callback: the request is still running past PROFILE_SLOW_SECONDS."""
+        self.stack = "".join(traceback.format_list(_await_stack(task.get_coro())))
+
+
+def _await_stack(coro) -> traceback.StackSummary:
+    """
+    Frames of a suspended coroutine chain, outermost first. (Task.get_stack() returns only
+    the outermost frame for suspended coroutines; this follows cr_await down to the leaf.)
+    """
+    frames = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is not None:
+            frames.append((frame, frame.f_lineno))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return traceback.StackSummary.extract(frames)
+
+
+def _debug_requested(value: Optional[str]) -> bool:
+    return value is not None and value.strip().lower() in ("1", "true", "yes")
+
+
+def begin(debug_header: Optional[str] = None) -> Optional[RequestTrace]:
+    """Start tracing the current request, or return None when nothing applies to it."""
+    global _profiling
+    server_timing = TRACE_SERVER_TIMING == "always" or (
+        TRACE_SERVER_TIMING == "header" and _debug_requested(debug_header)
+    )
+    profile = PROFILE_SAMPLE_RATE > 0 and not _profiling and random.random() < PROFILE_SAMPLE_RATE
+    if not (server_timing or profile or PROFILE_SLOW_SECONDS > 0):
+        return None
+
+    trace = RequestTrace(server_timing)
+    if profile:
+        _profiling = True
+        trace.profiler = cProfile.Profile()
+        trace.profiler.enable()
+    if PROFILE_SLOW_SECONDS > 0:
+        task = asyncio.current_task()
+        if task is not None:
+            trace.watchdog = asyncio.get_running_loop().call_later(PROFILE_SLOW_SECONDS, trace._capture_stack, task)
+    return trace
+
+
+def server_timing_header(timings: Dict[str, float], total: Optional[float] = None) -> str:
+    """Server-Timing value, durations in milliseconds (e.g. "detect;dur=0.412, total;dur=3.1")."""
+    parts = [f"{stage};dur={seconds * 1000:.3f}" for stage, seconds in timings.items()]
+    if total is not None:
+        parts.append(f"total;dur={total * 1000:.3f}")
+    return ", ".join(parts)
+
+
+def _path(label: str, suffix: str) -> str:
+    name = _UNSAFE_FILENAME.sub("_", label)[:64] or "request"
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    return os.path.join(PROFILE_DIR, f"{stamp}-{os.getpid()}-{next(_sequence)}-{name}.{suffix}")
+
+
+def finish(trace: RequestTrace, label: str, timings: Dict[str, float]) -> Optional[str]:
+    """Stop tracing, write any profile/stack dump, and return the Server-Timing value (or None)."""
+    global _profiling
+    total = perf_counter() - trace.start
+    if trace.profiler is not None:
+        trace.profiler.disable()
+        _profiling = False
+    if trace.watchdog is not None:
+        trace.watchdog.cancel()
+
+    if trace.profiler is not None or trace.stack:
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            if trace.profiler is not None:
+                # also covers other requests interleaved on the event loop meanwhile
+                trace.profiler.dump_stats(_path(label, "prof"))
+            if trace.stack:
+                with open(_path(label, "slow.txt"), "w", encoding="utf-8") as f:
+                    f.write(f"total: {total:.4f}s (threshold {PROFILE_SLOW_SECONDS:g}s)\n")
+                    f.write(f"timings: {json.dumps({k: round(v, 6) for k, v in timings.items()})}\n\n")
+                    f.write(trace.stack)
+        except OSError as e:
+            logger.warning("Could not write trace for %s: %s", label, e)
+
+    return server_timing_header(timings, total) if trace.server_timing else None
@@ -0,0 +1,3 @@
+"""
+Microbenchmarks for the request hot path. See benchmarks/bench_hot_path.py.
+"""
@@ -0,0 +1,202 @@
+"""
+Hot-path microbenchmarks with saved baselines and a regression threshold.
+
+Usage:
+  python -m benchmarks.bench_hot_path                  # run + compare against baseline.json
+  python -m benchmarks.bench_hot_path --save           # run + overwrite baseline.json
+  python -m benchmarks.bench_hot_path -k extract       # only benchmarks whose name contains "extract"
+  python -m benchmarks.bench_hot_path --threshold 1.5  # fail if any benchmark is >1.5x its baseline
+
+Timings are best-of-N per-op means, so they are fairly stable on one machine; baselines
+are machine-specific - re-save them on the machine you compare on.
+Exit code 1 if any benchmark regressed past the threshold.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import timeit
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+os.environ.setdefault("API_KEY", "bench-key")
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_THRESHOLD = 1.25
+REPEAT = 5
+MIN_TIME = 0.2  # seconds per repeat
+
+SHORT = "Your bank account will be blocked today. Verify immediately."
+LONG = " ".join([
+    "Dear customer, your SBI account 123456789012 is suspended due to pending KYC compliance.",
+    "Pay Rs 10 to refund.desk@ybl or call our officer on +91 9876543210 immediately.",
+    "Update details at https://sbi-kyc-update.example/verify?id=8842 before the deadline today.",
+    "Ignore if already done. Regards, Official Verification Department.",
+] * 25)
+ADVERSARIAL = " ".join([
+    "1234 " * 400,                       # long spaced digit runs (bank pattern backtracking)
+    "a." * 300 + "@" + "b." * 300,       # long dotted local part / domain around '@'
+    "https://" + "x" * 2000,             # one huge URL
+    "+91" * 300,                         # many phone prefixes without numbers
+])
+TEXTS = {"short": SHORT, "long": LONG, "adversarial": ADVERSARIAL}
+# Realistic scammer turns: most carry no link, UPI ID or long number (prefilters skip the regex)
+CORPUS = [
+    "Dear customer, your account has been temporarily blocked due to incomplete KYC.",
+    "This is the fraud prevention team calling from your bank. Please do not disconnect.",
+    "Sir, to reactivate your account we need to verify your identity immediately.",
+    "Share the OTP you just received so we can stop the unauthorized transaction.",
+    "Your electricity connection will be disconnected tonight at 9:30 pm.",
+    "Congratulations! You have won a cashback reward of Rs 4,999 from our lucky draw.",
+    "Please confirm your registered mobile number and date of birth.",
+    "Why are you delaying? Your account will be frozen within 30 minutes.",
+    "I am a senior officer, this is an official process. Kindly cooperate.",
+    "The refund is pending, you only need to pay a small processing fee of Rs 10.",
+    "Do not share this conversation with anyone, it is confidential.",
+    "Open the app and tell me what you see on the screen.",
+    "Ma'am, your parcel is held at customs, a clearance charge must be paid today.",
+    "Your PAN card is not linked, penalty will be applied from tomorrow.",
+    "Okay, now go to the payments section and select 'request money'.",
+    "We have already sent the reversal, please accept it to complete.",
+    "Pay the fee to refund.desk@ybl and send a screenshot.",
+    "Call our helpline on 9876543210 if the payment fails.",
+    "Update your KYC at https://sbi-kyc-update.example/verify before 6 pm.",
+    "Transfer the security deposit to account 1234 5678 9012 3456, IFSC SBIN0001234.",
+]
+
+
+def _build_benchmarks() -> Dict[str, Callable[[], object]]:
+    from app import extractor
+    from app.callback import build_callback_payload
+    from app.detector import _score_message
+    from app.session_store import CompactIntelligence
+
+    benches: Dict[str, Callable[[], object]] = {}
+    for label, text in TEXTS.items():
+        benches[f"score_message[{label}]"] = lambda t=text: _score_message(t)
+        for fn in (extractor.scan_entities, extractor._extract_suspicious_keywords):
+            benches[f"{fn.__name__}[{label}]"] = lambda f=fn, t=text: f(t)
+
+    def scan_ungated():
+        for t in CORPUS:
+            extractor._scan(extractor.ENTITY_PATTERN, t, {field: {} for field in extractor._ENTITY_FIELDS.values()})
+
+    benches["scan_entities[corpus]"] = lambda: [extractor.scan_entities(t) for t in CORPUS]
+    benches["scan_entities_ungated[corpus]"] = scan_ungated  # same work without prefilters
+
+    small = extractor.extract_intelligence(SHORT + " pay a@ybl 9876543210")
+    big = extractor.extract_intelligence(LONG)
+    compact = CompactIntelligence.from_dict(big.model_dump())
+    benches["session_add_intelligence[small->big]"] = lambda: compact.add(small)
+    benches["build_callback_payload"] = lambda: build_callback_payload("bench", True, 20, big)
+    benches["honeypot_handler[asgi]"] = _handler_bench()
+    return benches
+
+
+def _handler_bench() -> Callable[[], object]:
+    """Full POST /api/honeypot through an in-process ASGI client; LLM and callback stubbed."""
+    import httpx
+    from app import agent
+    from app.callback_outbox import dispatcher
+    from app.config import API_KEY
+    from app.main import app
+
+    async def fake_llm(system_prompt: str, user_message: str) -> str:
+        return "Okay, what should I do?"
+
+    agent._call_llm_async = fake_llm
+    agent._llm_available = lambda: True
+    dispatcher.submit = lambda payload: 0
+
+    loop = asyncio.new_event_loop()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+    headers = {"x-api-key": API_KEY}
+    history = [
+        {"sender": "scammer" if i % 2 == 0 else "user", "text": SHORT if i % 2 == 0 else "Why?", "timestamp": ""}
+        for i in range(10)
+    ]
+    body = {
+        "sessionId": "bench-handler",
+        "message": {"sender": "scammer", "text": "Share your UPI ID refund@ybl to avoid suspension.", "timestamp": ""},
+        "conversationHistory": history,
+        "metadata": {"channel": "SMS", "language": "English", "locale": "IN"},
+    }
+
+    def run():
+        return loop.run_until_complete(client.post("/api/honeypot", json=body, headers=headers))
+
+    return run
+
+
+def measure(fn: Callable[[], object]) -> float:
+    """Best per-op time (seconds) over REPEAT runs of at least MIN_TIME each."""
+    timer = timeit.Timer(fn)
+    number, elapsed = timer.autorange()
+    while elapsed < MIN_TIME:
+        number *= 2
+        elapsed = timer.timeit(number)
+    return min(timer.repeat(repeat=REPEAT, number=number)) / number
+
+
+def load_baseline(path: str = BASELINE_PATH) -> Dict[str, float]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get("results_ns", {})
+
+
+def save_baseline(results_ns: Dict[str, float], path: str = BASELINE_PATH) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"python": sys.version.split()[0], "results_ns": results_ns}, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(results_ns: Dict[str, float], baseline_ns: Dict[str, float], threshold: float) -> List[str]:
+    """Names of benchmarks slower than threshold x baseline."""
+    return [
+        name for name, ns in results_ns.items()
+        if name in baseline_ns and baseline_ns[name] > 0 and ns / baseline_ns[name] > threshold
+    ]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_hot_path")
+    parser.add_argument("--save", action="store_true", help="write results as the new baseline")
+    parser.add_argument("-k", dest="filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="max allowed ratio vs baseline")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON path")
+    args = parser.parse_args(argv)
+
+    baseline = load_baseline(args.baseline)
+    results: Dict[str, float] = {}
+    print(f"{'benchmark':<48}{'ns/op':>14}{'baseline':>14}{'ratio':>8}")
+    for name, fn in _build_benchmarks().items():
+        if args.filter not in name:
+            continue
+        ns = measure(fn) * 1e9
+        results[name] = round(ns, 1)
+        base = baseline.get(name)
+        ratio = f"{ns / base:.2f}" if base else "-"
+        print(f"{name:<48}{ns:>14.1f}{(base or 0):>14.1f}{ratio:>8}")
+
+    if args.save:
+        merged = dict(baseline)
+        merged.update(results)
+        save_baseline(merged, args.baseline)
+        print(f"\nBaseline saved: {args.baseline}")
+        return 0
+
+    regressed = compare(results, baseline, args.threshold)
+    if regressed:
+        print(f"\nREGRESSED (> {args.threshold}x baseline): " + ", ".join(regressed))
+        return 1
+    print(f"\nNo regressions (threshold {args.threshold}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,3 @@
+"""
+Offline load testing: fake LLM + fake GUVI callback receiver + load generator.
+"""
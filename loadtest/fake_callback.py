@@ -0,0 +1,66 @@
+"""
+Fake GUVI callback receiver: POST /api/updateHoneyPotFinalResult, GET /stats.
+
+Usage:
+  python -m loadtest.fake_callback --port 9002 [--latency-ms 200 --error-rate 0.1]
+Point the app at it:
+  CALLBACK_URL=http://127.0.0.1:9002/api/updateHoneyPotFinalResult uvicorn app.main:app
+"""
+import argparse
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from loadtest.stub_config import Behaviour, add_arguments, from_args
+
+REQUIRED_KEYS = ("sessionId", "scamDetected", "totalMessagesExchanged", "extractedIntelligence", "agentNotes")
+
+
+def create_app(behaviour: Behaviour) -> FastAPI:
+    app = FastAPI(title="Fake GUVI callback")
+    stats = {"received": 0, "accepted": 0, "rejected": 0, "invalid": 0}
+    sessions = {}  # sessionId -> callbacks accepted
+    started = time.time()
+
+    @app.post("/api/updateHoneyPotFinalResult")
+    async def receive(request: Request):
+        stats["received"] += 1
+        await behaviour.delay()
+        if behaviour.should_fail():
+            stats["rejected"] += 1
+            return JSONResponse(status_code=behaviour.error_status, content={"status": "error"})
+        payload = await request.json()
+        if not all(k in payload for k in REQUIRED_KEYS):
+            stats["invalid"] += 1
+            return JSONResponse(status_code=400, content={"status": "invalid payload"})
+        stats["accepted"] += 1
+        sid = payload["sessionId"]
+        sessions[sid] = sessions.get(sid, 0) + 1
+        return {"status": "success"}
+
+    @app.get("/stats")
+    def get_stats():
+        per_session = sorted(sessions.values())
+        return {
+            **stats,
+            "sessions": len(sessions),
+            "maxPerSession": per_session[-1] if per_session else 0,
+            "uptimeSeconds": round(time.time() - started, 1),
+        }
+
+    return app
+
+
+def main(argv=None) -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(prog="python -m loadtest.fake_callback")
+    parser.add_argument("--port", type=int, default=9002)
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    uvicorn.run(create_app(from_args(args)), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
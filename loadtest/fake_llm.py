@@ -0,0 +1,77 @@
+"""
+Fake OpenAI-compatible LLM server: POST /v1/chat/completions.
+
+Usage:
+  python -m loadtest.fake_llm --port 9001 --latency-ms 400 --distribution lognormal --error-rate 0.02
+Point the app at it:
+  OPENAI_API_KEY=fake OPENAI_BASE_URL=http://127.0.0.1:9001/v1 uvicorn app.main:app
+"""
+import argparse
+import itertools
+import random
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from loadtest.stub_config import Behaviour, add_arguments, from_args
+
+REPLIES = [
+    "Why is my account being blocked? What do I need to do?",
+    "I am worried. Which details do you need from me?",
+    "Is this really from the bank? Can you share your employee ID?",
+    "Okay, where should I send it? Please give me the UPI ID again.",
+    "My app shows an error. Is there a link I should open?",
+]
+
+_ids = itertools.count(1)
+
+
+def create_app(behaviour: Behaviour) -> FastAPI:
+    app = FastAPI(title="Fake LLM")
+    stats = {"requests": 0, "errors": 0}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats["requests"] += 1
+        await behaviour.delay()
+        if behaviour.should_fail():
+            stats["errors"] += 1
+            return JSONResponse(
+                status_code=behaviour.error_status,
+                content={"error": {"message": "injected failure", "type": "server_error"}},
+            )
+        content = random.choice(REPLIES)
+        return {
+            "id": f"chatcmpl-fake-{next(_ids)}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+    @app.get("/stats")
+    def get_stats():
+        return stats
+
+    return app
+
+
+def main(argv=None) -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(prog="python -m loadtest.fake_llm")
+    parser.add_argument("--port", type=int, default=9001)
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    uvicorn.run(create_app(from_args(args)), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Load generator: many concurrent multi-turn scam sessions against /api/honeypot.
+
+Usage:
+  python -m loadtest.loadgen --url http://127.0.0.1:8000 --sessions 500 --turns 8 --concurrency 200 \
+      [--callback-stats http://127.0.0.1:9002/stats] [--api-key KEY]
+
+Each session sends its turns sequentially with growing conversationHistory (like the
+GUVI platform); sessions run concurrently. Reports p50/p99 latency, throughput,
+error counts, and callback delivery stats from the app and/or the fake receiver.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import httpx
+
+SCRIPT = [
+    "Your bank account will be blocked today. Verify immediately.",
+    "Share your UPI ID to avoid suspension.",
+    "Pay the verification fee of Rs 10 to refund.desk@ybl now.",
+    "If payment fails call our officer at 9876543210.",
+    "Complete KYC here: https://sbi-kyc-update.example/verify",
+    "Transfer to account 123456789012, IFSC SBIN0001234, urgent.",
+    "Send the OTP you received to confirm.",
+    "Last warning, your account will be suspended in 10 minutes.",
+]
+
+
+def percentile(sorted_values: List[float], p: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    k = math.ceil(p / 100 * len(sorted_values)) - 1
+    return sorted_values[max(0, min(len(sorted_values) - 1, k))]
+
+
+async def run_session(client: httpx.AsyncClient, url: str, headers: dict, turns: int, run_id: str, n: int,
+                      latencies: List[float], errors: Dict[str, int]) -> None:
+    session_id = f"load-{run_id}-{n}"
+    history: List[dict] = []
+    for turn in range(turns):
+        text = SCRIPT[turn % len(SCRIPT)]
+        message = {"sender": "scammer", "text": text, "timestamp": ""}
+        body = {
+            "sessionId": session_id,
+            "message": message,
+            "conversationHistory": history,
+            "metadata": {"channel": "SMS", "language": "English", "locale": "IN"},
+        }
+        start = time.perf_counter()
+        try:
+            r = await client.post(url, json=body, headers=headers)
+            latencies.append(time.perf_counter() - start)
+            if r.status_code != 200:
+                errors[f"http_{r.status_code}"] = errors.get(f"http_{r.status_code}", 0) + 1
+                return
+            reply = r.json().get("reply", "")
+        except Exception as e:
+            errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+            return
+        history = history + [message, {"sender": "user", "text": reply, "timestamp": ""}]
+
+
+async def run(args, transport: Optional[httpx.AsyncBaseTransport] = None) -> dict:
+    """Run the load and return the report; transport (tests) replaces the network."""
+    base = args.url.rstrip("/")
+    url = base if base.endswith("/api/honeypot") else f"{base}/api/honeypot"
+    headers = {"x-api-key": args.api_key, "Content-Type": "application/json"}
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    run_id = uuid.uuid4().hex[:8]
+    sem = asyncio.Semaphore(args.concurrency)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits, transport=transport) as client:
+        async def bounded(n: int):
+            async with sem:
+                await run_session(client, url, headers, args.turns, run_id, n, latencies, errors)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(bounded(n) for n in range(args.sessions)))
+        elapsed = time.perf_counter() - start
+
+        if args.settle > 0:
+            await asyncio.sleep(args.settle)  # let background callbacks drain
+        callbacks = {}
+        for name, stats_url, hdrs in (
+            ("app", f"{base.rsplit('/api/honeypot', 1)[0]}/api/callbacks/stats", headers),
+            ("receiver", args.callback_stats, {}),
+        ):
+            if not stats_url:
+                continue
+            try:
+                callbacks[name] = (await client.get(stats_url, headers=hdrs)).json()
+            except Exception as e:
+                callbacks[name] = {"error": str(e)}
+
+    lat = sorted(latencies)
+    return {
+        "sessions": args.sessions,
+        "requests": len(lat),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(lat) / elapsed, 1) if elapsed > 0 else None,
+        "latency_ms": {
+            "p50": round(percentile(lat, 50) * 1000, 1) if lat else None,
+            "p99": round(percentile(lat, 99) * 1000, 1) if lat else None,
+            "max": round(lat[-1] * 1000, 1) if lat else None,
+        },
+        "errors": errors,
+        "callbacks": callbacks,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m loadtest.loadgen")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--api-key", default=os.getenv("API_KEY", ""))
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=6)
+    parser.add_argument("--concurrency", type=int, default=100, help="sessions in flight at once")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--callback-stats", default="", help="fake receiver /stats URL")
+    parser.add_argument("--settle", type=float, default=2.0, help="seconds to wait before reading callback stats")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    print(json.dumps(report, indent=2))
+    return 0 if not report["errors"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""
+Shared latency/error knobs for the stand-in servers.
+"""
+import asyncio
+import random
+
+
+class Behaviour:
+    """How a stand-in responds: latency distribution (ms) and failure rate."""
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        distribution: str = "fixed",  # fixed | uniform | exponential | lognormal
+        spread: float = 0.5,  # uniform: ±fraction; lognormal: sigma
+        error_rate: float = 0.0,
+        error_status: int = 500,
+    ):
+        self.latency_ms = latency_ms
+        self.distribution = distribution
+        self.spread = spread
+        self.error_rate = error_rate
+        self.error_status = error_status
+
+    def sample_latency(self) -> float:
+        """Seconds to wait before answering."""
+        m = self.latency_ms
+        if m <= 0:
+            return 0.0
+        if self.distribution == "uniform":
+            ms = random.uniform(m * (1 - self.spread), m * (1 + self.spread))
+        elif self.distribution == "exponential":
+            ms = random.expovariate(1 / m)
+        elif self.distribution == "lognormal":
+            ms = m * random.lognormvariate(0, self.spread)  # m is the median
+        else:
+            ms = m
+        return max(0.0, ms) / 1000
+
+    def should_fail(self) -> bool:
+        return self.error_rate > 0 and random.random() < self.error_rate
+
+    async def delay(self) -> None:
+        seconds = self.sample_latency()
+        if seconds:
+            await asyncio.sleep(seconds)
+
+
+def add_arguments(parser) -> None:
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="fixed/mean/median latency")
+    parser.add_argument("--distribution", choices=["fixed", "uniform", "exponential", "lognormal"], default="fixed")
+    parser.add_argument("--spread", type=float, default=0.5, help="uniform ±fraction or lognormal sigma")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=500)
+
+
+def from_args(args) -> Behaviour:
+    return Behaviour(
+        latency_ms=args.latency_ms,
+        distribution=args.distribution,
+        spread=args.spread,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+    )
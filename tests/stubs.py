@@ -0,0 +1,53 @@
+"""
+Shared test stubs - a fake LLM behind the agent plus the reply cache, template tier and
+callback dispatch overrides most pipeline tests need. Everything is restored on exit.
+
+    with stub_agent("Which branch is this?") as calls:
+        asyncio.run(process_turn(request))
+    assert len(calls) == 1
+"""
+import asyncio
+from contextlib import ExitStack, contextmanager
+from typing import Callable, Iterator, List, Optional, Union
+from unittest import mock
+
+
+@contextmanager
+def stub_agent(
+    reply: Union[str, Callable[[str], Optional[str]], None] = "Okay, what should I do?",
+    delay: float = 0.0,
+    cache=None,
+    templates: bool = True,
+    callbacks: Optional[list] = None,
+    available: bool = True,
+) -> Iterator[List[str]]:
+    """
+    Replace the agent's LLM call with a stub and yield the user messages it receives.
+
+    reply: the stub's answer, or a function of the user message (None = LLM failure).
+    delay: seconds the stub waits before answering.
+    cache: ReplyCache to install; by default caching is off so every miss reaches the stub.
+    templates: False disables the template tier (every turn goes past it).
+    callbacks: if given, dispatcher.submit appends payloads here instead of queueing them.
+    available: False behaves like no API key / an open breaker (the stub is never reached).
+    """
+    from app import agent
+    from app.callback_outbox import dispatcher
+
+    calls: List[str] = []
+
+    async def fake_llm(system_prompt: str, user_message: str) -> Optional[str]:
+        calls.append(user_message)
+        if delay:
+            await asyncio.sleep(delay)
+        return reply(user_message) if callable(reply) else reply
+
+    with ExitStack() as stack:
+        stack.enter_context(mock.patch.object(agent, "_call_llm_async", fake_llm))
+        stack.enter_context(mock.patch.object(agent, "_llm_available", lambda: available))
+        stack.enter_context(mock.patch.object(agent, "reply_cache", cache if cache is not None else agent.ReplyCache(max_entries=0)))
+        if not templates:
+            stack.enter_context(mock.patch.object(agent, "REPLY_TEMPLATE_MIN_CONFIDENCE", 2.0))
+        if callbacks is not None:
+            stack.enter_context(mock.patch.object(dispatcher, "submit", lambda payload: callbacks.append(payload) or 0))
+        yield calls
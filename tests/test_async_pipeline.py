@@ -0,0 +1,100 @@
+"""
+Async pipeline load test — concurrent requests against the in-process ASGI app.
+Run: python -m pytest tests/test_async_pipeline.py -v
+Or:  python tests/test_async_pipeline.py (standalone)
+
+The LLM and callback are stubbed with fixed sleeps, so the wall time shows how many
+requests are in flight at once. The old sync handler was capped by the threadpool
+(40 workers by default); the async handler is not.
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+os.environ.setdefault("API_KEY", "test-key")
+
+LLM_DELAY = 0.2
+N_REQUESTS = 200
+THREADPOOL_WORKERS = 40
+
+
+async def _fire(n: int) -> float:
+    import httpx
+    from app.config import API_KEY
+    from app.main import app
+
+    headers = {"x-api-key": API_KEY, "Content-Type": "application/json"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        async def one(i: int):
+            r = await client.post(
+                "/api/honeypot",
+                json={
+                    "sessionId": f"async-load-{i}",
+                    "message": {"sender": "scammer", "text": "Your account is blocked. Verify now.", "timestamp": ""},
+                    "conversationHistory": [],
+                },
+                headers=headers,
+            )
+            assert r.status_code == 200, r.status_code
+            assert r.json().get("reply")
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(n)))
+        return time.perf_counter() - start
+
+
+def test_concurrent_requests():
+    """Slow LLM calls overlap instead of queueing behind threadpool workers."""
+    from tests.stubs import stub_agent
+
+    # Every request must reach the LLM: no template tier, no reply cache
+    with stub_agent(delay=LLM_DELAY, templates=False) as calls:
+        elapsed = asyncio.run(_fire(N_REQUESTS))
+
+    serial_floor = N_REQUESTS * LLM_DELAY / THREADPOOL_WORKERS
+    concurrency = N_REQUESTS * LLM_DELAY / elapsed
+    print(f"Async load: {N_REQUESTS} requests in {elapsed:.2f}s (~{concurrency:.0f} in flight; "
+          f"threadpool floor {serial_floor:.2f}s)")
+    assert len(calls) == N_REQUESTS, len(calls)
+    assert elapsed < serial_floor, f"expected < {serial_floor:.2f}s, got {elapsed:.2f}s"
+
+
+def test_callback_off_request_path():
+    """Callbacks are queued for the background dispatcher, not awaited in the request."""
+    import httpx
+    from app import main
+    from app.config import API_KEY, MIN_TURNS_BEFORE_CALLBACK
+    from tests.stubs import stub_agent
+
+    async def run():
+        headers = {"x-api-key": API_KEY}
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            body = {
+                "sessionId": "async-callback",
+                "message": {"sender": "scammer", "text": "Share UPI to verify your bank account now.", "timestamp": ""},
+                "conversationHistory": [],
+            }
+            for _ in range(MIN_TURNS_BEFORE_CALLBACK):
+                r = await client.post("/api/honeypot", json=body, headers=headers)
+                assert r.status_code == 200
+
+    payloads = []
+    with stub_agent(callbacks=payloads):
+        asyncio.run(run())
+
+    calls = [payload["sessionId"] for payload in payloads]
+    assert "async-callback" in calls
+    print("Callback queued off request path: OK")
+
+
+if __name__ == "__main__":
+    test_concurrent_requests()
+    test_callback_off_request_path()
+    print("\n=== Async pipeline: All checks PASS ===")
@@ -0,0 +1,90 @@
+"""
+Batch API — process-pool results match per-message calls, in input order.
+Run: python -m pytest tests/test_batch.py -v
+Or:  python tests/test_batch.py (standalone)
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+os.environ.setdefault("API_KEY", "test-key")
+
+CORPUS = [
+    "Your bank account will be blocked today. Verify immediately.",
+    "Hi",
+    "Send to xyz@paytm or abc@ybl",
+    "Call +919876543210 or 9876543210",
+    "Click https://evil.com/verify",
+    "Hello, how are you?",
+    "Account 1234 5678 9012 3456",
+    "",
+]
+
+
+def _corpus(n: int):
+    return [f"{CORPUS[i % len(CORPUS)]} #{i}" if i % 5 else CORPUS[i % len(CORPUS)] for i in range(n)]
+
+
+def test_pool_matches_inline():
+    """Pooled, chunked results equal one-by-one calls, order preserved."""
+    from concurrent.futures import ProcessPoolExecutor
+    from app.batch import detect_scam_batch, extract_intelligence_batch
+    from app.detector import detect_scam
+    from app.extractor import extract_intelligence
+
+    msgs = _corpus(250)
+    expected_detect = [detect_scam(m, []) for m in msgs]
+    expected_extract = [
+        {k: v for k, v in extract_intelligence(m).model_dump().items() if v} for m in msgs
+    ]
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        assert detect_scam_batch(msgs, chunk_size=17, workers=2, executor=pool) == expected_detect
+        assert extract_intelligence_batch(msgs, chunk_size=17, workers=2, executor=pool) == expected_extract
+        streamed = extract_intelligence_batch(iter(msgs), chunk_size=17, workers=2, executor=pool, stream=True)
+        assert not isinstance(streamed, list)
+        assert list(streamed) == expected_extract
+    assert detect_scam_batch(msgs, workers=0) == expected_detect
+    print("Batch pool == inline: OK")
+
+
+def test_batch_endpoint():
+    """POST /api/honeypot/batch returns compact results; stream=true returns NDJSON."""
+    import asyncio
+    import json
+    import httpx
+    from app.config import API_KEY
+    from app.main import app
+
+    msgs = CORPUS
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            headers = {"x-api-key": API_KEY}
+            r = await client.post("/api/honeypot/batch", json={"messages": msgs}, headers=headers)
+            assert r.status_code == 200
+            results = r.json()["results"]
+            assert len(results) == len(msgs)
+            assert results[0]["scamDetected"] is True and results[1]["scamDetected"] is False
+            assert "upiIds" in results[2]["intel"] and results[1]["intel"] == {}
+
+            r = await client.post(
+                "/api/honeypot/batch", json={"messages": msgs, "extract": False, "stream": True}, headers=headers
+            )
+            lines = [json.loads(line) for line in r.text.splitlines()]
+            assert [x["scamDetected"] for x in lines] == [x["scamDetected"] for x in results]
+
+            r = await client.post("/api/honeypot/batch", json={"messages": msgs})
+            assert r.status_code == 401
+
+    asyncio.run(run())
+    print("Batch endpoint: OK")
+
+
+if __name__ == "__main__":
+    test_pool_matches_inline()
+    test_batch_endpoint()
+    print("\n=== Batch: All checks PASS ===")
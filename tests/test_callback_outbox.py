@@ -0,0 +1,216 @@
+"""
+Callback outbox — background delivery against a local stub endpoint.
+Run: python -m pytest tests/test_callback_outbox.py -v
+Or:  python tests/test_callback_outbox.py (standalone)
+"""
+import asyncio
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+os.environ.setdefault("API_KEY", "test-key")
+
+STUB_URL = "http://callback-stub/api/updateHoneyPotFinalResult"
+
+
+def _stub(fail_first: int = 0):
+    """Stub endpoint: fails the first N requests with 503, then returns 200."""
+    import httpx
+
+    received = []
+
+    def handler(request):
+        received.append(request)
+        if len(received) <= fail_first:
+            return httpx.Response(503, text="unavailable")
+        return httpx.Response(200, json={"ok": True})
+
+    return httpx.MockTransport(handler), received
+
+
+def _payload(sid: str) -> dict:
+    from app.callback import build_callback_payload
+    from app.models import ExtractedIntelligence
+
+    return build_callback_payload(sid, True, 10, ExtractedIntelligence(upiIds=["x@upi"]))
+
+
+def test_delivers_with_backoff():
+    """Failed attempts are retried with backoff until the stub accepts."""
+    from app import callback_outbox
+    from app.callback_outbox import CallbackDispatcher
+
+    transport, received = _stub(fail_first=2)
+    original = callback_outbox.backoff_delay
+    callback_outbox.backoff_delay = lambda attempts: 0.01
+    try:
+        with tempfile.TemporaryDirectory() as d:
+            disp = CallbackDispatcher(url=STUB_URL, outbox_path=os.path.join(d, "outbox.db"), transport=transport)
+
+            async def run():
+                await disp.start()
+                disp.submit(_payload("outbox-retry"))
+                for _ in range(200):
+                    if disp.delivered:
+                        break
+                    await asyncio.sleep(0.01)
+                await disp.stop()
+
+            asyncio.run(run())
+            stats = disp.stats()
+            disp.outbox.close()
+    finally:
+        callback_outbox.backoff_delay = original
+
+    assert len(received) == 3
+    assert stats["delivered"] == 1 and stats["failedAttempts"] == 2
+    assert stats["queueDepth"] == 0
+    assert stats["latencySeconds"]["p50"] is not None
+    print("Outbox retry with backoff: OK")
+
+
+def test_survives_restart_and_flushes_on_shutdown():
+    """Rows queued before start are on disk; a fresh dispatcher delivers them."""
+    from app.callback_outbox import CallbackDispatcher
+
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "outbox.db")
+        first = CallbackDispatcher(url=STUB_URL, outbox_path=path)
+        first.submit(_payload("outbox-a"))
+        first.submit(_payload("outbox-b"))
+        assert first.outbox.depth() == 2
+        first.outbox.close()
+
+        transport, received = _stub()
+        second = CallbackDispatcher(url=STUB_URL, outbox_path=path, transport=transport)
+        assert second.outbox.depth() == 2
+
+        async def run():
+            await second.start()
+            await second.stop()
+
+        asyncio.run(run())
+        assert second.outbox.depth() == 0
+        second.outbox.close()
+
+    assert len(received) == 2
+    print("Outbox restart + shutdown flush: OK")
+
+
+def test_drops_after_max_attempts():
+    """Permanently failing endpoint does not grow the outbox forever."""
+    from app.callback_outbox import CallbackDispatcher
+
+    transport, received = _stub(fail_first=100)
+    with tempfile.TemporaryDirectory() as d:
+        disp = CallbackDispatcher(url=STUB_URL, outbox_path=os.path.join(d, "outbox.db"), max_attempts=2, transport=transport)
+        disp.submit(_payload("outbox-drop"))
+
+        async def run():
+            await disp.start()
+            await disp.stop()  # flush = attempt 1
+            await disp.start()
+            await disp.stop()  # flush = attempt 2 -> dropped
+
+        asyncio.run(run())
+        assert disp.outbox.depth() == 0 and disp.dropped == 1
+        disp.outbox.close()
+    print("Outbox max attempts: OK")
+
+
+def test_burst_coalesces_per_session():
+    """Several submits for one session collapse into one delivery of the latest payload."""
+    import json
+    from app.callback_outbox import CallbackDispatcher
+
+    transport, received = _stub()
+    with tempfile.TemporaryDirectory() as d:
+        disp = CallbackDispatcher(url=STUB_URL, outbox_path=os.path.join(d, "outbox.db"), transport=transport)
+        for n in range(5):
+            p = _payload("outbox-burst")
+            p["totalMessagesExchanged"] = n
+            disp.submit(p)
+        disp.submit(_payload("outbox-other"))
+        assert disp.outbox.depth() == 2 and disp.coalesced == 4
+
+        async def run():
+            await disp.start()
+            await disp.stop()
+
+        asyncio.run(run())
+        disp.outbox.close()
+
+    bodies = {b["sessionId"]: b for b in (json.loads(r.content) for r in received)}
+    assert len(received) == 2
+    assert bodies["outbox-burst"]["totalMessagesExchanged"] == 4
+    print("Outbox burst coalescing: OK")
+
+
+def test_workers_sharing_outbox_post_once():
+    """Two dispatchers on one outbox file (two workers): each row is claimed and posted once."""
+    import httpx
+    from app.callback_outbox import CallbackDispatcher
+
+    received = []
+
+    async def handler(request):
+        received.append(request)
+        await asyncio.sleep(0.05)  # keep the first POST in flight while the other worker polls
+        return httpx.Response(200, json={"ok": True})
+
+    transport = httpx.MockTransport(handler)
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "outbox.db")
+        workers = [CallbackDispatcher(url=STUB_URL, outbox_path=path, transport=transport) for _ in range(2)]
+        workers[0].submit(_payload("outbox-shared"))
+
+        async def run():
+            await asyncio.gather(*(w.start() for w in workers))  # both poll the outbox at once
+            await asyncio.sleep(0.2)
+            await asyncio.gather(*(w.stop() for w in workers))
+
+        asyncio.run(run())
+        depth = workers[0].outbox.depth()
+        for w in workers:
+            w.outbox.close()
+
+    assert len(received) == 1, len(received)
+    assert depth == 0 and sum(w.delivered for w in workers) == 1
+    print("Shared outbox, one POST: OK")
+
+
+def test_change_driven_callbacks():
+    """Unchanged intelligence is not re-sent until CALLBACK_MAX_STALENESS passes."""
+    from app.callback import intelligence_fingerprint, should_send_callback
+    from app.config import CALLBACK_MAX_STALENESS, MIN_TURNS_BEFORE_CALLBACK
+    from app.models import ExtractedIntelligence
+    from app.session_store import Session
+
+    s = Session("fingerprint")
+    s.scam_detected = True
+    s.turn_count = MIN_TURNS_BEFORE_CALLBACK
+    s.intelligence = ExtractedIntelligence(upiIds=["a@ybl"])
+    assert should_send_callback(s)
+
+    s.callback_queued_fingerprint = intelligence_fingerprint(s.intelligence)
+    s.callback_queued_at = 1000.0
+    assert not should_send_callback(s, now=1000.0 + 1)
+    assert should_send_callback(s, now=1000.0 + CALLBACK_MAX_STALENESS)
+
+    s.intelligence = ExtractedIntelligence(upiIds=["a@ybl", "b@ybl"])
+    assert should_send_callback(s, now=1000.0 + 1)
+    print("Change-driven callback: OK")
+
+
+if __name__ == "__main__":
+    test_delivers_with_backoff()
+    test_survives_restart_and_flushes_on_shutdown()
+    test_drops_after_max_attempts()
+    test_burst_coalesces_per_session()
+    test_workers_sharing_outbox_post_once()
+    test_change_driven_callbacks()
+    print("\n=== Callback outbox: All checks PASS ===")
@@ -0,0 +1,85 @@
+"""
+Campaign clustering — near-duplicate messages share a cluster, memory stays bounded,
+sessions carry their campaign into agentNotes.
+Run: python -m pytest tests/test_campaigns.py -v
+Or:  python tests/test_campaigns.py (standalone)
+"""
+import asyncio
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+os.environ.setdefault("API_KEY", "test-key")
+
+KYC = "Dear customer, your {bank} account will be blocked today. Update KYC at the link immediately to avoid suspension."
+PRIZE = "Congratulations! You have won a cashback reward of Rs {amount} from our lucky draw, claim it before midnight."
+
+
+def test_near_duplicates_share_a_cluster():
+    from app.campaigns import CampaignClusters
+
+    c = CampaignClusters(max_clusters=100)
+    kyc = {c.assign(KYC.format(bank=bank)) for bank in ("SBI", "HDFC", "ICICI", "Axis")}
+    kyc.add(c.assign("Dear customer your SBI account will be blocked today!! Update KYC at the link immediately to avoid suspension"))
+    prize = {c.assign(PRIZE.format(amount=amount)) for amount in ("4,999", "10000", "25,000")}
+    assert len(kyc) == 1 and len(prize) == 1 and kyc != prize
+    assert c.assign("Share the OTP you just received so we can stop the unauthorized transaction.") not in kyc | prize
+    assert c.assign("ok send") is None  # too short to cluster
+    assert c.size(kyc.pop()) == 5 and c.stats()["created"] == 3
+    print("Near-duplicate clustering: OK")
+
+
+def test_memory_is_bounded():
+    """A stream of unrelated messages never holds more than max_clusters clusters or their buckets."""
+    from app.campaigns import BANDS, CampaignClusters, _KEYS_PER_CLUSTER
+
+    rng = random.Random(5)
+    words = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(6)) for _ in range(5000)]
+    c = CampaignClusters(max_clusters=50)
+    hot = KYC.format(bank="SBI")
+    hot_id = c.assign(hot)
+    for i in range(3000):
+        c.assign(" ".join(rng.choice(words) for _ in range(12)))
+        if i % 20 == 0:
+            assert c.assign(hot) == hot_id  # a hot campaign stays resident
+    stats = c.stats()
+    assert stats["clusters"] <= 50 and stats["buckets"] <= 50 * _KEYS_PER_CLUSTER
+    assert stats["evicted"] >= 3000 - 50 and stats["buckets"] >= BANDS
+    print(f"Bounded memory: OK ({stats})")
+
+
+def test_session_campaign_in_agent_notes():
+    from app import session_store
+    from app.models import HoneypotRequest, Message
+    from app.pipeline import _callback_payload, process_turn
+    from tests.stubs import stub_agent
+
+    async def run():
+        for sid, bank in (("campaign-a", "SBI"), ("campaign-b", "Canara")):
+            await process_turn(HoneypotRequest(
+                sessionId=sid, message=Message(sender="scammer", text=KYC.format(bank=bank), timestamp="")
+            ))
+        # a different later message does not move the session to another campaign
+        await process_turn(HoneypotRequest(
+            sessionId="campaign-a",
+            message=Message(sender="scammer", text="Urgent: share the OTP now or the account stays blocked forever.", timestamp=""),
+        ))
+
+    with stub_agent("Which branch is this?"):
+        asyncio.run(run())
+    a, b = session_store.get_or_create("campaign-a"), session_store.get_or_create("campaign-b")
+    assert a.campaign_id and a.campaign_id == b.campaign_id
+    assert f"Campaign cluster: {a.campaign_id}" in _callback_payload(a)["agentNotes"]
+    assert session_store.Session.from_state("x", a.to_state()).campaign_id == a.campaign_id
+    print("Session campaign: OK")
+
+
+if __name__ == "__main__":
+    test_near_duplicates_share_a_cluster()
+    test_memory_is_bounded()
+    test_session_campaign_in_agent_notes()
+    print("\n=== Campaign clustering: All checks PASS ===")
@@ -0,0 +1,117 @@
+"""
+Stateful detector — per-session ScoreState gives the same verdicts as the stateless path.
+Run: python -m pytest tests/test_detector_state.py -v
+Or:  python tests/test_detector_state.py (standalone)
+"""
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+os.environ.setdefault("API_KEY", "test-key")
+
+TEXTS = [
+    "Hi",
+    "hello",
+    "Random chat",
+    "Please share",
+    "Your bank account will be blocked today. Verify immediately.",
+    "Share your UPI ID to avoid suspension.",
+    "Click the link",
+    "This is the official department",
+    "Call me now",
+    "",
+]
+
+
+def _conversations(n: int, seed: int = 7):
+    from app.models import Message
+
+    rng = random.Random(seed)
+    for _ in range(n):
+        history = []
+        turns = []
+        for _ in range(rng.randint(1, 12)):
+            current = rng.choice(TEXTS)
+            turns.append((list(history), current))
+            history.append(Message(sender="scammer", text=current))
+            history.append(Message(sender="user", text=rng.choice(["ok", "why?", "Share what?"])))
+        yield turns
+
+
+def test_matches_stateless_verdicts():
+    """Same verdict every turn, with and without ScoreState (decay off)."""
+    from app.detector import ScoreState, detect_scam
+
+    checked = 0
+    for turns in _conversations(300):
+        state = ScoreState()
+        for history, current in turns:
+            assert detect_scam(current, history, state=state, decay_mode=False) == detect_scam(
+                current, history, decay_mode=False
+            )
+            checked += 1
+    print(f"Stateful == stateless: OK ({checked} turns)")
+
+
+def test_rewritten_history_rescored():
+    """Dropping earlier history resets the running max."""
+    from app.detector import ScoreState, detect_scam
+    from app.models import Message
+
+    state = ScoreState()
+    strong = [Message(sender="scammer", text="Your bank account is blocked. Verify now.")]
+    assert detect_scam("Please share", strong, state=state, decay_mode=False) is True
+    assert state.max_score > 0
+    assert detect_scam("Please share", [], state=state, decay_mode=False) is False
+    assert state.max_score == 0
+    print("Rewrite resets state: OK")
+
+
+def test_edited_middle_message_rescored():
+    """Editing an earlier (not the last) history message gives the stateless verdict."""
+    from app.detector import ScoreState, detect_scam
+    from app.models import Message
+
+    state = ScoreState()
+    history = [Message(sender="scammer", text="send otp"), Message(sender="user", text="why?")]
+    assert detect_scam("click link", history, state=state, decay_mode=False) is True
+    history[0] = Message(sender="scammer", text="hello")  # last message unchanged
+    assert detect_scam("click link", history, state=state, decay_mode=False) is False
+    assert detect_scam("click link", history, decay_mode=False) is False
+
+    rng = random.Random(11)
+    for turns in _conversations(300, seed=3):
+        state = ScoreState()
+        for history, current in turns:
+            if len(history) > 2 and rng.random() < 0.3:
+                history[rng.randrange(len(history) - 1)] = Message(sender="scammer", text=rng.choice(TEXTS))
+            assert detect_scam(current, history, state=state, decay_mode=False) == detect_scam(
+                current, history, decay_mode=False
+            )
+    print("Mid-history edit resets state: OK")
+
+
+def test_decay_escalation():
+    """Decay mode flags a run of weak signals (history not resent) that the base rule misses."""
+    from app.detector import ScoreState, detect_scam
+
+    base, decay = ScoreState(), ScoreState()
+    weak = ["Please share", "Call me", "Click here", "Confirm please"]
+    base_hits = [detect_scam(t, [], state=base, decay_mode=False) for t in weak]
+    decay_hits = [detect_scam(t, [], state=decay, decay_mode=True) for t in weak]
+    assert not any(base_hits)
+    assert decay_hits[0] is False and any(decay_hits)
+    assert decay.turns == len(weak) and decay.category_hits.get("action") == len(weak)
+    print("Decay escalation: OK")
+
+
+if __name__ == "__main__":
+    test_matches_stateless_verdicts()
+    test_rewritten_history_rescored()
+    test_edited_middle_message_rescored()
+    test_decay_escalation()
+    print("\n=== Detector state: All checks PASS ===")
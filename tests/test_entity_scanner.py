@@ -0,0 +1,90 @@
+"""
+One-pass entity scanner — each span gets exactly one type (link > UPI > phone > bank);
+prefilters skip branches that cannot match without changing the output.
+Run: python -m pytest tests/test_entity_scanner.py -v
+Or:  python tests/test_entity_scanner.py (standalone)
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+os.environ.setdefault("API_KEY", "test-key")
+
+
+def _scan(text):
+    from app.extractor import scan_entities
+    return {field: values for field, values in scan_entities(text).items() if values}
+
+
+def test_each_type():
+    assert _scan("Send to xyz@paytm or abc@ybl") == {"upiIds": ["xyz@paytm", "abc@ybl"]}
+    assert _scan("Click https://evil.com/verify now") == {"phishingLinks": ["https://evil.com/verify"]}
+    assert _scan("Account 1234 5678 9012 3456") == {"bankAccounts": ["1234567890123456"]}
+    assert _scan("Account 123456789012, ref 1234-5678-9012") == {"bankAccounts": ["123456789012"]}
+    assert _scan("Call +919876543210, +91-9876543211, +91 9876543212 or 09876543213") == {
+        "phoneNumbers": ["+919876543210", "+919876543211", "+919876543212", "+919876543213"]
+    }
+    assert _scan("Only 12345678 and 2024") == {}
+    print("Entity types: OK")
+
+
+def test_overlap_rules():
+    """A 10-digit mobile is not also a bank account; nothing inside a URL or UPI ID is re-reported."""
+    assert _scan("Call +919876543210 or 9876543210 today") == {"phoneNumbers": ["+919876543210"]}
+    assert _scan("acct 123456789012 ph 9876543210") == {
+        "bankAccounts": ["123456789012"], "phoneNumbers": ["+919876543210"]
+    }
+    assert _scan("pay 9876543210@ybl") == {"upiIds": ["9876543210@ybl"]}
+    assert _scan("open https://x.example/pay?u=abc@ybl&ph=9876543210") == {
+        "phishingLinks": ["https://x.example/pay?u=abc@ybl&ph=9876543210"]
+    }
+    assert _scan("since 2024 9876543210 is the helpline") == {"phoneNumbers": ["+919876543210"]}
+    assert _scan("ref 12349876543210999") == {"bankAccounts": ["12349876543210999"]}
+    assert _scan("ref 1234987654321099999") == {}  # too long for an account; no phone carved out of it
+    print("Overlap rules: OK")
+
+
+def test_extract_intelligence_uses_scanner():
+    from app.extractor import extract_intelligence
+
+    i = extract_intelligence("URGENT: verify KYC, pay refund.desk@ybl or call 9876543210 at https://kyc.example/x")
+    assert i.upiIds == ["refund.desk@ybl"] and i.phoneNumbers == ["+919876543210"]
+    assert i.phishingLinks == ["https://kyc.example/x"] and i.bankAccounts == []
+    assert "urgent" in i.suspiciousKeywords
+    print("extract_intelligence: OK")
+
+
+def test_prefilters_do_not_change_output():
+    """Gated scan == full ENTITY_PATTERN scan, on fixed cases and random fragment mixes."""
+    import random
+    from app import extractor
+
+    def ungated(text):
+        found = {field: {} for field in extractor._ENTITY_FIELDS.values()}
+        extractor._scan(extractor.ENTITY_PATTERN, text, found)
+        return {field: list(values) for field, values in found.items()}
+
+    fragments = [
+        "Your account is blocked.", "pay refund.desk@ybl", "mail me at a.b@gmail.com", "@", "user@",
+        "https://kyc.example/v?id=9876543210", "HTTP://upper.example", "http", "+91 9876543210",
+        "+91-98765", "09876543210", "9876543210", "1234 5678 9012 3456", "1234-5678", "123456789012",
+        "2024", "Rs 4,999", "₹5000", "९८७६५४३२१०", "१२३४ ५६७८ ९०१२", "OTP 482913", "१२३४", "\n", "  ",
+    ]
+    rng = random.Random(7)
+    cases = fragments + [
+        rng.choice(("", " ")).join(rng.choice(fragments) for _ in range(rng.randint(1, 6))) for _ in range(3000)
+    ]
+    for text in cases:
+        assert extractor.scan_entities(text) == ungated(text), text
+    print(f"Prefilters identical on {len(cases)} texts: OK")
+
+
+if __name__ == "__main__":
+    test_each_type()
+    test_overlap_rules()
+    test_extract_intelligence_uses_scanner()
+    test_prefilters_do_not_change_output()
+    print("\n=== Entity scanner: All checks PASS ===")
@@ -0,0 +1,91 @@
+"""
+Incremental extraction — only unseen history messages are re-extracted per turn.
+Run: python -m pytest tests/test_incremental_extraction.py -v
+Or:  python tests/test_incremental_extraction.py (standalone)
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+os.environ.setdefault("API_KEY", "test-key")
+
+SCRIPT = [
+    "Your bank account will be blocked today. Verify immediately.",
+    "Share your UPI ID to avoid suspension.",
+    "Pay the fee to refund@ybl now.",
+    "Or call our officer at 9876543210.",
+    "Verify here: https://sbi-kyc.example/verify",
+    "Account number 123456789012 for transfer.",
+]
+
+
+def _conversation(turns: int):
+    from app.models import Message
+
+    history = []
+    for i in range(turns):
+        history.append(Message(sender="scammer", text=SCRIPT[i % len(SCRIPT)]))
+        history.append(Message(sender="user", text="Okay, what next?"))
+    return history
+
+
+def test_only_new_messages_processed():
+    """Each turn hands back just the two messages appended since last turn."""
+    from app.session_store import take_unprocessed_history
+
+    sid = "incr-delta"
+    assert take_unprocessed_history(sid, []) == []
+    for turn in range(1, 8):
+        history = _conversation(turn)
+        new = take_unprocessed_history(sid, history)
+        assert new == history[-2:], f"turn {turn}: got {len(new)} messages"
+    print("Incremental delta: OK")
+
+
+def test_rewrite_falls_back_to_full_rescan():
+    """Edited or truncated history is detected and rescanned in full."""
+    from app.models import Message
+    from app.session_store import take_unprocessed_history
+
+    sid = "incr-rewrite"
+    history = _conversation(4)
+    take_unprocessed_history(sid, history)
+
+    edited = list(history)
+    edited[0] = Message(sender="scammer", text="Completely different opener")
+    assert take_unprocessed_history(sid, edited) == edited
+
+    truncated = edited[:3]
+    assert take_unprocessed_history(sid, truncated) == truncated
+    assert take_unprocessed_history(sid, truncated) == []
+    print("Rewrite -> full rescan: OK")
+
+
+def test_same_intelligence_as_full_scan():
+    """Merged per-turn deltas cover everything a full rescan finds."""
+    from app.extractor import extract_from_conversation
+    from app.session_store import get_or_create, take_unprocessed_history, update_intelligence
+
+    sid = "incr-equiv"
+    history = []
+    for turn in range(len(SCRIPT)):
+        current = SCRIPT[turn]
+        new = take_unprocessed_history(sid, history)
+        update_intelligence(sid, extract_from_conversation(new, current))
+        history = _conversation(turn + 1)
+
+    got = get_or_create(sid).intelligence
+    full = extract_from_conversation(_conversation(len(SCRIPT) - 1), SCRIPT[-1])
+    for field in ("bankAccounts", "upiIds", "phishingLinks", "phoneNumbers", "suspiciousKeywords"):
+        assert set(getattr(full, field)) <= set(getattr(got, field)), field
+    print("Incremental == full scan: OK")
+
+
+if __name__ == "__main__":
+    test_only_new_messages_processed()
+    test_rewrite_falls_back_to_full_rescan()
+    test_same_intelligence_as_full_scan()
+    print("\n=== Incremental extraction: All checks PASS ===")
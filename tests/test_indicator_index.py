@@ -0,0 +1,115 @@
+"""
+Cross-session indicator index — normalization, incremental updates, eviction, top-N.
+Run: python -m pytest tests/test_indicator_index.py -v
+Or:  python tests/test_indicator_index.py (standalone)
+"""
+import asyncio
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+os.environ.setdefault("API_KEY", "test-key")
+
+
+def test_normalize():
+    from app.indicator_index import normalize
+
+    assert normalize("upi", " Refund.Desk@YBL ") == "refund.desk@ybl"
+    assert normalize("phone", "+91 98765-43210") == normalize("phone", "09876543210") == "+919876543210"
+    assert normalize("phone", "12345") is None and normalize("bank", "1234 5678 9012") == "123456789012"
+    assert normalize("url", "HTTPS://WWW.Evil.example/verify/.") == "https://evil.example/verify"
+    assert normalize("domain", "https://www.Evil.example:8443/x?id=1") == "evil.example"
+    assert normalize("domain", "not a url") is None
+    print("Normalize: OK")
+
+
+def test_top_n_levels_match_brute_force():
+    """Count levels stay consistent through random adds/removes; top(n) matches a full sort."""
+    from app.indicator_index import _Postings
+
+    rng = random.Random(3)
+    p, truth = _Postings(), {}
+    for _ in range(5000):
+        value, sid = f"v{rng.randrange(40)}", f"s{rng.randrange(60)}"
+        if rng.random() < 0.65:
+            p.add(value, sid)
+            truth.setdefault(value, set()).add(sid)
+        else:
+            p.remove(value, sid)
+            truth.get(value, set()).discard(sid)
+        if rng.random() < 0.02:
+            counts = sorted((len(s) for s in truth.values() if s), reverse=True)
+            assert [c for c, _ in p.top(10)] == counts[:10]
+            assert all(len(p.sessions[v]) == c for c, v in p.top(10))
+    assert {v: len(s) for v, s in truth.items() if s} == {v: len(ids) for v, ids in p.sessions.items()}
+    print("Top-N levels: OK")
+
+
+def test_indexed_on_update_and_removed_on_eviction():
+    from app import session_store
+    from app.indicator_index import index
+    from app.models import ExtractedIntelligence
+    from app.session_store import SessionStore
+
+    store = SessionStore(max_sessions=2)
+    store.add_eviction_hook(session_store._unindex_evicted)
+    previous = session_store.set_backend(store)
+    try:
+        shared = ExtractedIntelligence(upiIds=["idx.shared@ybl"], phishingLinks=["https://idx-kyc.example/a"])
+        session_store.update_intelligence("idx-1", shared)
+        session_store.update_intelligence("idx-1", shared)  # nothing new -> nothing re-indexed
+        session_store.update_intelligence("idx-2", ExtractedIntelligence(upiIds=["IDX.shared@ybl"], phoneNumbers=["+919812345670"]))
+        (match,) = index.lookup("idx.shared@ybl", "upi")
+        assert match["sessionCount"] == 2 and match["sessionIds"] == ["idx-2", "idx-1"]
+        assert index.lookup("idx-kyc.example")[0]["type"] == "domain"
+        assert index.lookup("98123 45670")[0]["sessionIds"] == ["idx-2"]  # phone (also tried as bank, no match)
+
+        session_store.update_intelligence("idx-3", ExtractedIntelligence(bankAccounts=["123400009999"]))  # evicts idx-1
+        assert index.lookup("idx.shared@ybl", "upi")[0]["sessionIds"] == ["idx-2"]
+        assert index.lookup("https://idx-kyc.example/a", "url") == []
+    finally:
+        session_store.set_backend(previous)
+    print("Incremental index + eviction: OK")
+
+
+def test_endpoints():
+    import httpx
+    from app.config import API_KEY
+    from app.indicator_index import index
+    from app.main import app
+
+    for sid in ("ep-1", "ep-2", "ep-3"):
+        index.add(sid, "phoneNumbers", ["+919000000001"])
+    index.add("ep-1", "upiIds", ["ep.top@ybl"])
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            headers = {"x-api-key": API_KEY}
+            lookup = await client.get("/api/indicators/lookup", params={"value": "9000000001", "limit": 2}, headers=headers)
+            top = await client.get("/api/indicators/top", params={"n": 3, "type": "phone"}, headers=headers)
+            bad = await client.get("/api/indicators/top", params={"type": "email"}, headers=headers)
+            unauth = await client.get("/api/indicators/top")
+            return lookup, top, bad, unauth
+
+    lookup, top, bad, unauth = asyncio.run(scenario())
+    assert lookup.status_code == 200
+    (match,) = lookup.json()["matches"]
+    assert match["sessionCount"] == 3 and match["sessionIds"] == ["ep-3", "ep-2"]
+    body = top.json()
+    assert body["indicators"][0] == {"type": "phone", "value": "+919000000001", "sessionCount": 3}
+    assert body["indexed"]["phone"] >= 1
+    assert bad.status_code == 422 and unauth.status_code == 401
+    print("Indicator endpoints: OK")
+
+
+if __name__ == "__main__":
+    test_normalize()
+    test_top_n_levels_match_brute_force()
+    test_indexed_on_update_and_removed_on_eviction()
+    test_endpoints()
+    print("\n=== Indicator index: All checks PASS ===")
@@ -0,0 +1,116 @@
+"""
+Keyword matcher — both strategies (keyword scans, trie regex) agree with per-keyword `in` checks.
+Run: python -m pytest tests/test_keyword_matcher.py -v
+Or:  python tests/test_keyword_matcher.py (standalone)
+"""
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+os.environ.setdefault("API_KEY", "test-key")
+
+
+def _naive(text: str, keywords):
+    t = text.lower()
+    return {kw for kw in keywords if kw in t}
+
+
+def test_matches_substring_semantics():
+    """Shared MATCHER (and its regex variant) find exactly the keywords `kw in text.lower()` finds."""
+    from app.keywords import MATCHER, KeywordMatcher
+
+    keywords = {kw for kws in MATCHER.groups.values() for kw in kws}
+    vocab = sorted(keywords) + [" ", "x", "d", "ed", "s", "K", "NOW", "Verify Now"]
+    regex = KeywordMatcher(MATCHER.groups, strategy="regex")
+    rng = random.Random(3)
+    for _ in range(5000):
+        text = "".join(rng.choice(vocab) for _ in range(rng.randint(0, 10)))
+        expected = _naive(text, keywords)
+        for m in (MATCHER, regex):
+            assert m.find(text) == expected, (m.strategy, text)
+            assert m.match(text) == regex.match(text) and m.categories(text) == regex.categories(text), text
+            assert m.categories(text, ("urgency", "action")) == regex.categories(text) & {"urgency", "action"}
+
+    # Overlapping and nested keywords
+    for m in (MATCHER, regex):
+        assert {"reserve bank", "bank"} <= m.find("Reserve Bank of India")
+        assert {"verify now", "verify", "now"} <= m.find("VERIFY NOW")
+    print("Matcher == substring checks: OK")
+
+
+def test_strategy_by_keyword_count():
+    """Small keyword sets use plain scans; large ones the trie regex."""
+    from app.keywords import MATCHER, SCAN_MAX_KEYWORDS, KeywordMatcher
+
+    assert MATCHER.strategy == "scan"
+    big = KeywordMatcher({"g": [f"kw{i}" for i in range(SCAN_MAX_KEYWORDS + 1)]})
+    assert big.strategy == "regex" and big.find("xx kw17 kw400") == {"kw1", "kw17", "kw4", "kw40", "kw400"}
+    print("Strategy by keyword count: OK")
+
+
+def test_random_keyword_sets():
+    """Overlap handling holds for arbitrary (dense, overlapping) keyword sets."""
+    from app.keywords import KeywordMatcher
+
+    rng = random.Random(5)
+    for _ in range(3000):
+        kws = ["".join(rng.choice("ab") for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(1, 6))]
+        text = "".join(rng.choice("ab ") for _ in range(rng.randint(0, 15)))
+        for strategy in ("scan", "regex"):
+            m = KeywordMatcher({"g": kws}, strategy=strategy)
+            assert m.find(text) == _naive(text, kws), (strategy, kws, text)
+    print("Random keyword sets: OK")
+
+
+def test_word_boundary_mode():
+    """word_boundary=True only matches whole words/phrases."""
+    from app.keywords import KeywordMatcher
+
+    for strategy in ("scan", "regex"):
+        m = KeywordMatcher({"g": ["bank", "reserve bank", "now"]}, word_boundary=True, strategy=strategy)
+        assert m.find("the reserve bank knows now") == {"reserve bank", "bank", "now"}
+        assert m.find("banking, snow") == set()
+        assert m.find("snow now") == {"now"}
+    print("Word boundary mode: OK")
+
+
+def test_detector_and_extractor_unchanged():
+    """Detector categories and extractor keyword order match the old loops."""
+    from app.detector import _score_message
+    from app.extractor import _extract_suspicious_keywords
+    from app.keywords import (
+        ACTION_KEYWORDS, AUTHORITY_KEYWORDS, FINANCIAL_KEYWORDS, SUSPICIOUS_KEYWORDS, URGENCY_KEYWORDS,
+    )
+
+    def old_score(text):
+        t = text.lower().strip()
+        score = 0
+        for kws, w in ((URGENCY_KEYWORDS, 2), (FINANCIAL_KEYWORDS, 2), (AUTHORITY_KEYWORDS, 1), (ACTION_KEYWORDS, 1)):
+            if any(kw in t for kw in kws):
+                score += w
+        return score
+
+    for text in [
+        "Your bank account will be blocked today. Verify immediately.",
+        "Share your UPI ID to avoid suspension.",
+        "Income tax department official notice",
+        "Random chat",
+        "I know nothing",
+    ]:
+        assert _score_message(text) == old_score(text), text
+        t = text.lower()
+        assert _extract_suspicious_keywords(text) == [kw for kw in SUSPICIOUS_KEYWORDS if kw in t], text
+    print("Detector/extractor parity: OK")
+
+
+if __name__ == "__main__":
+    test_matches_substring_semantics()
+    test_strategy_by_keyword_count()
+    test_random_keyword_sets()
+    test_word_boundary_mode()
+    test_detector_and_extractor_unchanged()
+    print("\n=== Keyword matcher: All checks PASS ===")
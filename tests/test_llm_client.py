@@ -0,0 +1,153 @@
+"""
+Shared LLM client — pooled client reuse, concurrency cap, circuit breaker.
+Run: python -m pytest tests/test_llm_client.py -v
+Or:  python tests/test_llm_client.py (standalone)
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+os.environ.setdefault("API_KEY", "test-key")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _completion(content):
+    return {
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "test",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+def test_breaker_states():
+    """Opens on bad rate, short-circuits, probes once after cooldown, closes or reopens."""
+    from app.llm_client import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+    clock = FakeClock()
+    b = CircuitBreaker(window=4, min_calls=4, error_rate=0.5, slow_seconds=1.0, cooldown=30, clock=clock)
+    for ok, secs in ((True, 0.1), (False, 0.1), (True, 0.1), (True, 5.0)):  # one error + one slow call
+        assert b.allow()
+        b.record(ok, secs)
+    assert b.state == OPEN and not b.allow() and b.stats()["shortCircuited"] == 1
+    clock.now += 31
+    assert b.allow() and b.state == HALF_OPEN
+    assert not b.allow()  # only one probe at a time
+    b.record(False, 0.1)
+    assert b.state == OPEN and b.opens == 2
+    clock.now += 31
+    assert b.allow()
+    b.record(True, 0.1)
+    assert b.state == CLOSED and b.allow()
+    print("Breaker states: OK")
+
+
+def test_pooled_client_limit_and_breaker():
+    """One client per loop, at most max_concurrency in flight; failures trip the breaker."""
+    import httpx
+    from app import llm_client
+    from app.llm_client import OPEN, CircuitBreaker, LLMClient
+
+    state = {"active": 0, "peak": 0, "requests": 0, "fail": False}
+
+    async def handler(request):
+        state["requests"] += 1
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(0.01)
+        state["active"] -= 1
+        if state["fail"]:
+            return httpx.Response(500, json={"error": {"message": "down"}})
+        return httpx.Response(200, json=_completion('"Which bank is this?"'))
+
+    client = LLMClient(
+        max_concurrency=2,
+        breaker=CircuitBreaker(window=4, min_calls=4, error_rate=0.5, cooldown=60),
+        transport=httpx.MockTransport(handler),
+    )
+
+    async def scenario():
+        replies = await asyncio.gather(*(client.complete("sys", f"msg {i}") for i in range(6)))
+        first_client = client._async_client
+        await client.complete("sys", "again")
+        assert client._async_client is first_client
+        state["fail"] = True
+        failed = [await client.complete("sys", "x") for _ in range(6)]
+        await client.aclose()
+        return replies, failed
+
+    original_key = llm_client.OPENAI_API_KEY
+    llm_client.OPENAI_API_KEY = "test"
+    try:
+        replies, failed = asyncio.run(scenario())
+    finally:
+        llm_client.OPENAI_API_KEY = original_key
+    assert replies == ["Which bank is this?"] * 6
+    assert state["peak"] == 2
+    assert failed == [None] * 6
+    # window of 4 held [ok, ok, fail, fail] -> 50% -> open; the other 4 calls never left
+    assert state["requests"] == 7 + 2
+    stats = client.stats()
+    assert stats["breaker"]["state"] == OPEN and stats["breaker"]["shortCircuited"] == 4
+    assert stats["calls"] == 9 and stats["failures"] == 2 and stats["inFlight"] == 0
+    print("Pooled client, limit and breaker: OK")
+
+
+def test_probe_cancelled_while_queued():
+    """A half-open probe cancelled while waiting for a slot does not wedge the breaker."""
+    import httpx
+    from app import llm_client
+    from app.llm_client import HALF_OPEN, CircuitBreaker, LLMClient
+
+    gate = asyncio.Event()
+
+    async def handler(request):
+        await gate.wait()
+        return httpx.Response(200, json=_completion("ok"))
+
+    client = LLMClient(
+        max_concurrency=1, breaker=CircuitBreaker(cooldown=0), transport=httpx.MockTransport(handler)
+    )
+
+    async def scenario():
+        busy = asyncio.ensure_future(client.complete("sys", "holds the only slot"))
+        await asyncio.sleep(0.01)
+        client.breaker._open()
+        probe = asyncio.ensure_future(client.complete("sys", "probe"))
+        await asyncio.sleep(0.01)
+        assert client.breaker.state == HALF_OPEN and not client.breaker.allow()
+        probe.cancel()
+        await asyncio.gather(probe, return_exceptions=True)
+        allowed = client.breaker.allow()  # the next call may probe
+        gate.set()
+        await busy
+        await client.aclose()
+        return allowed
+
+    original_key = llm_client.OPENAI_API_KEY
+    llm_client.OPENAI_API_KEY = "test"
+    try:
+        assert asyncio.run(scenario())
+    finally:
+        llm_client.OPENAI_API_KEY = original_key
+    print("Cancelled probe released: OK")
+
+
+if __name__ == "__main__":
+    test_breaker_states()
+    test_pooled_client_limit_and_breaker()
+    test_probe_cancelled_while_queued()
+    print("\n=== LLM client: All checks PASS ===")
@@ -0,0 +1,122 @@
+"""
+Load-test stand-ins — fake LLM and callback receiver behaviour, load generator report.
+Run: python -m pytest tests/test_loadtest.py -v
+Or:  python tests/test_loadtest.py (standalone)
+"""
+import asyncio
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+os.environ.setdefault("API_KEY", "test-key")
+
+N_REQUESTS = 200
+
+
+def test_fake_llm_latency_and_error_rate():
+    """Every request waits the configured latency; about error_rate of them fail with error_status."""
+    import httpx
+    from loadtest.fake_llm import REPLIES, create_app
+    from loadtest.stub_config import Behaviour
+
+    app = create_app(Behaviour(latency_ms=20, error_rate=0.3, error_status=503))
+    body = {"model": "fake", "messages": [{"role": "user", "content": "hi"}]}
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://fake-llm") as client:
+            async def one():
+                start = time.perf_counter()
+                r = await client.post("/v1/chat/completions", json=body)
+                return r, time.perf_counter() - start
+
+            results = await asyncio.gather(*(one() for _ in range(N_REQUESTS)))
+            return results, (await client.get("/stats")).json()
+
+    random.seed(7)
+    results, stats = asyncio.run(run())
+    failed = [r for r, _ in results if r.status_code != 200]
+    assert min(elapsed for _, elapsed in results) >= 0.02
+    assert {r.status_code for r in failed} == {503}
+    assert 0.2 < len(failed) / N_REQUESTS < 0.4, len(failed)
+    assert stats == {"requests": N_REQUESTS, "errors": len(failed)}
+    ok = next(r for r, _ in results if r.status_code == 200).json()
+    assert ok["choices"][0]["message"]["content"] in REPLIES
+    print(f"Fake LLM: OK ({len(failed)}/{N_REQUESTS} injected failures)")
+
+
+def test_latency_distributions():
+    """Sampled latencies stay in range for uniform and centre on latency_ms for lognormal."""
+    from loadtest.stub_config import Behaviour
+
+    random.seed(7)
+    uniform = [Behaviour(100, "uniform", spread=0.5).sample_latency() for _ in range(1000)]
+    assert 0.05 <= min(uniform) and max(uniform) <= 0.15
+    lognormal = sorted(Behaviour(100, "lognormal", spread=0.5).sample_latency() for _ in range(1001))
+    assert 0.09 < lognormal[500] < 0.11  # latency_ms is the median
+    assert Behaviour(0, "exponential").sample_latency() == 0.0
+    print("Latency distributions: OK")
+
+
+def test_fake_callback_validates_and_counts():
+    """Valid payloads are accepted and counted per session; incomplete ones get 400."""
+    import httpx
+    from app.callback import build_callback_payload
+    from app.models import ExtractedIntelligence
+    from loadtest.fake_callback import create_app
+    from loadtest.stub_config import Behaviour
+
+    payload = build_callback_payload("load-cb", True, 10, ExtractedIntelligence(upiIds=["x@ybl"]))
+
+    async def run(behaviour, bodies):
+        transport = httpx.ASGITransport(app=create_app(behaviour))
+        async with httpx.AsyncClient(transport=transport, base_url="http://fake-callback") as client:
+            codes = [(await client.post("/api/updateHoneyPotFinalResult", json=b)).status_code for b in bodies]
+            return codes, (await client.get("/stats")).json()
+
+    codes, stats = asyncio.run(run(Behaviour(), [payload, payload, {"sessionId": "load-cb"}]))
+    assert codes == [200, 200, 400]
+    assert (stats["received"], stats["accepted"], stats["invalid"], stats["rejected"]) == (3, 2, 1, 0)
+    assert stats["sessions"] == 1 and stats["maxPerSession"] == 2
+
+    codes, stats = asyncio.run(run(Behaviour(error_rate=1.0, error_status=502), [payload]))
+    assert codes == [502] and stats["rejected"] == 1 and stats["accepted"] == 0
+    print("Fake callback receiver: OK")
+
+
+def test_loadgen_report():
+    """The load generator drives the app in-process and reports latency, throughput and callbacks."""
+    import httpx
+    from app.config import API_KEY
+    from app.main import app
+    from loadtest.loadgen import run
+    from tests.stubs import stub_agent
+
+    args = SimpleNamespace(
+        url="http://app", api_key=API_KEY, sessions=4, turns=3, concurrency=2,
+        timeout=10.0, callback_stats="", settle=0.0,
+    )
+    with stub_agent(callbacks=[]):
+        report = asyncio.run(run(args, transport=httpx.ASGITransport(app=app)))
+
+    assert set(report) == {"sessions", "requests", "elapsed_s", "throughput_rps", "latency_ms", "errors", "callbacks"}
+    assert report["sessions"] == 4 and report["requests"] == 12 and report["errors"] == {}
+    assert report["throughput_rps"] > 0
+    assert set(report["latency_ms"]) == {"p50", "p99", "max"}
+    assert report["latency_ms"]["p50"] <= report["latency_ms"]["p99"] <= report["latency_ms"]["max"]
+    assert "queueDepth" in report["callbacks"]["app"]
+    print(f"Load generator report: OK ({report['throughput_rps']} req/s)")
+
+
+if __name__ == "__main__":
+    test_fake_llm_latency_and_error_rate()
+    test_latency_distributions()
+    test_fake_callback_validates_and_counts()
+    test_loadgen_report()
+    print("\n=== Load test tools: All checks PASS ===")
@@ -0,0 +1,100 @@
+"""
+Prometheus metrics — histogram buckets, text format, per-turn recording and GET /metrics.
+Run: python -m pytest tests/test_metrics.py -v
+Or:  python tests/test_metrics.py (standalone)
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+os.environ.setdefault("API_KEY", "test-key")
+
+
+def test_histogram_render():
+    """Buckets are cumulative in the output, +Inf equals _count, boundaries are inclusive."""
+    from app.metrics import Counter, Histogram
+
+    h = Histogram("t_seconds", "Test.", "stage", buckets=(0.1, 1))
+    for v in (0.05, 0.1, 0.5, 3):
+        h.observe("detect", v)
+    c = Counter("t_total", "Test.", "verdict")
+    c.inc("scam")
+    c.inc("scam")
+    lines = []
+    h.render(lines)
+    c.render(lines)
+    assert "# TYPE t_seconds histogram" in lines
+    assert 't_seconds_bucket{stage="detect",le="0.1"} 2' in lines
+    assert 't_seconds_bucket{stage="detect",le="1"} 3' in lines
+    assert 't_seconds_bucket{stage="detect",le="+Inf"} 4' in lines
+    assert 't_seconds_count{stage="detect"} 4' in lines
+    assert 't_seconds_sum{stage="detect"} 3.65' in lines
+    assert 't_total{verdict="scam"} 2' in lines and h.count("detect") == 4
+    print("Histogram render: OK")
+
+
+def test_metrics_endpoint_after_turns():
+    """A scam and a non-scam turn show up in /metrics with stage, source and verdict labels."""
+    import httpx
+    from app import metrics
+    from app.config import API_KEY
+    from app.main import app
+    from tests.stubs import stub_agent
+
+    before = dict(metrics.VERDICTS.values)
+    llm_before = metrics.REPLY_SECONDS.count("llm") + metrics.REPLY_SECONDS.count("template")
+
+    async def scenario():
+        headers = {"x-api-key": API_KEY}
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            for sid, text in (("metrics-1", "Your account is blocked. Verify now."), ("metrics-2", "See you at lunch")):
+                r = await client.post(
+                    "/api/honeypot",
+                    json={"sessionId": sid, "message": {"sender": "scammer", "text": text, "timestamp": ""}},
+                    headers=headers,
+                )
+                assert r.status_code == 200
+            return await client.get("/metrics")
+
+    with stub_agent("Which branch is this?"):
+        r = asyncio.run(scenario())
+
+    assert r.status_code == 200 and r.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = r.text
+    for stage in ("auth", "session", "detect", "extract", "callback", "total"):
+        assert f'honeypot_stage_seconds_count{{stage="{stage}"}}' in body, stage
+    assert metrics.VERDICTS.values["scam"] == before.get("scam", 0) + 1
+    assert metrics.VERDICTS.values["not_scam"] == before.get("not_scam", 0) + 1
+    assert metrics.REPLY_SECONDS.count("llm") + metrics.REPLY_SECONDS.count("template") == llm_before + 1
+    assert 'honeypot_callbacks_total{outcome="delivered"}' in body
+    assert "honeypot_active_sessions " in body and "honeypot_llm_breaker_open 0" in body
+    print("GET /metrics: OK")
+
+
+def test_render_does_not_open_outbox():
+    """Rendering metrics before any callback was queued does not create the outbox file."""
+    import tempfile
+    from app import callback_outbox, metrics
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "outbox.db")
+        original = callback_outbox.dispatcher
+        callback_outbox.dispatcher = callback_outbox.CallbackDispatcher(outbox_path=path)
+        try:
+            body = metrics.render()
+        finally:
+            callback_outbox.dispatcher = original
+        assert "honeypot_callback_queue_depth 0" in body and not os.path.exists(path)
+    print("Idle outbox not opened: OK")
+
+
+if __name__ == "__main__":
+    test_histogram_render()
+    test_metrics_endpoint_after_turns()
+    test_render_does_not_open_outbox()
+    print("\n=== Metrics: All checks PASS ===")
@@ -0,0 +1,100 @@
+"""
+Prompt window — bounded verbatim history, incremental summary, entities always included.
+Run: python -m pytest tests/test_prompt_window.py -v
+Or:  python tests/test_prompt_window.py (standalone)
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+os.environ.setdefault("API_KEY", "test-key")
+
+
+def _conversation(n_turns):
+    from app.models import Message
+
+    history = []
+    for i in range(n_turns):
+        history.append(Message(sender="scammer", text=f"Step {i}: your account needs verification. Act fast now.", timestamp=""))
+        history.append(Message(sender="user", text=f"Okay, what should I do for step {i}?", timestamp=""))
+    return history
+
+
+def test_window_is_bounded_and_incremental():
+    """Prompt size stays flat as the conversation grows; each message is folded exactly once."""
+    from app.agent import _build_user_message
+    from app.models import ExtractedIntelligence
+    from app.prompt_window import ConversationSummary, estimate_tokens, window
+
+    folded_batches = []
+    original_fold = ConversationSummary.fold
+
+    def counting_fold(self, messages, *args, **kwargs):
+        folded_batches.append(len(messages))
+        return original_fold(self, messages, *args, **kwargs)
+
+    ConversationSummary.fold = counting_fold
+    intel = ExtractedIntelligence(upiIds=["refund.desk@ybl"])
+    full = _conversation(45)
+    summary, sizes = None, []
+    try:
+        for turn in range(1, 46):
+            history = full[: 2 * turn]
+            summary, recent, context = window(summary, history, intel, token_budget=120, recent_messages=6)
+            sizes.append(estimate_tokens(_build_user_message("Send it now.", recent, context)))
+    finally:
+        ConversationSummary.fold = original_fold
+
+    assert len(recent) <= 6 and recent[-1] is full[-1]
+    assert summary.folded == len(full) - len(recent) == sum(folded_batches)
+    assert max(folded_batches) <= 6  # only what just left the window, never a full rescan
+    assert summary.notes[0].startswith("Step 0") and len(summary.notes) <= 6
+    assert "refund.desk@ybl" in context and "90 messages" not in context
+    assert max(sizes[10:]) - min(sizes[10:]) < 15, sizes
+    print(f"Bounded window: OK (prompt ~{sizes[-1]} tokens at turn 45)")
+
+
+def test_window_rebuilds_after_rewrite():
+    from app.models import Message
+    from app.prompt_window import window
+
+    full = _conversation(10)
+    summary, _, _ = window(None, full, recent_messages=4)
+    assert summary.folded == 16
+    summary, recent, context = window(summary, full[:6], recent_messages=4)
+    assert summary.folded == 2 and len(recent) == 4 and "2 messages" in context
+    # same length, earlier message edited: the old notes must not survive
+    edited = [Message(sender=m.sender, text=m.text.replace("Step 0", "Step zero"), timestamp="") for m in full]
+    summary, _, context = window(summary, edited[:6], recent_messages=4)
+    assert summary.folded == 2 and "Step zero" in context and "Step 0:" not in context
+    print("Rewrite rebuild: OK")
+
+
+def test_pipeline_sends_bounded_prompt():
+    """A 40-turn session reaches the LLM with the window + summary, not the whole history."""
+    from app.models import HoneypotRequest, Message
+    from app.pipeline import process_turn
+    from tests.stubs import stub_agent
+
+    with stub_agent("What do you mean?") as prompts:
+        history = _conversation(40)
+        req = HoneypotRequest(
+            sessionId="window-long",
+            message=Message(sender="scammer", text="Urgent: the officer needs your details immediately.", timestamp=""),
+            conversationHistory=history,
+        )
+        asyncio.run(process_turn(req))
+    assert prompts and "Earlier in the conversation" in prompts[-1]
+    assert "Step 39" in prompts[-1] and "Step 20:" not in prompts[-1]
+    print("Pipeline window: OK")
+
+
+if __name__ == "__main__":
+    test_window_is_bounded_and_incremental()
+    test_window_rebuilds_after_rewrite()
+    test_pipeline_sends_bounded_prompt()
+    print("\n=== Prompt window: All checks PASS ===")
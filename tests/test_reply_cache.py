@@ -0,0 +1,88 @@
+"""
+Reply cache — LRU + TTL, variant collection, key normalization and stats.
+Run: python -m pytest tests/test_reply_cache.py -v
+Or:  python tests/test_reply_cache.py (standalone)
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+os.environ.setdefault("API_KEY", "test-key")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_key_normalization():
+    """Case/whitespace don't matter; prompt variant and recent history do."""
+    from app.agent import ReplyCache
+    from app.models import Message
+
+    cache = ReplyCache(history_messages=2)
+    history = [Message(sender="scammer", text=f"msg {i}", timestamp="") for i in range(5)]
+    k = cache.key("prompt", history, "Your account  will be BLOCKED.")
+    assert k == cache.key("prompt", history, "your account will be blocked.")
+    assert k == cache.key("prompt", [Message(sender="user", text="old", timestamp="")] + history, "your account will be blocked.")
+    assert k != cache.key("prompt\nKeep replies very short (SMS style).", history, "your account will be blocked.")
+    assert k != cache.key("prompt", history[:-1], "your account will be blocked.")
+    # per-session context (summary, details already shared) is part of the prompt, so of the key
+    assert k == cache.key("prompt", history, "your account will be blocked.", "")
+    assert k != cache.key("prompt", history, "your account will be blocked.", "Details they have shared so far - UPI IDs: a@ybl")
+    print("Key normalization: OK")
+
+
+def test_variants_lru_ttl():
+    """Hits start once `variants` replies were collected; LRU bound and TTL apply."""
+    from app.agent import ReplyCache
+
+    clock = FakeClock()
+    cache = ReplyCache(max_entries=2, ttl_seconds=60, variants=2, clock=clock)
+    assert cache.get(b"a") is None
+    cache.put(b"a", "one", 0.5)
+    assert cache.get(b"a") is None  # still collecting variants
+    cache.put(b"a", "two", 1.5)
+    assert {cache.get(b"a") for _ in range(50)} == {"one", "two"}
+    st = cache.stats()
+    assert st["hits"] == 50 and st["misses"] == 2 and abs(st["savedLlmSeconds"] - 50.0) < 1e-6
+
+    for key in (b"b", b"c"):
+        cache.put(key, "x", 0.1)
+        cache.put(key, "x", 0.1)  # identical replies still count towards filling
+    assert cache.get(b"a") is None and cache.stats()["evictions"] == 1
+    assert cache.get(b"c") == "x"
+    clock.now += 61
+    assert cache.get(b"c") is None
+    print("Variants, LRU and TTL: OK")
+
+
+def test_generate_reply_uses_cache():
+    """Repeated script lines reach the LLM only until the entry is filled."""
+    from app import agent
+    from tests.stubs import stub_agent
+
+    cache = agent.ReplyCache(variants=2)
+    with stub_agent(lambda user_message: f"reply {len(calls)}", cache=cache) as calls:
+        replies = [
+            asyncio.run(agent.generate_reply_async("Your bank account will be blocked today.", []))
+            for _ in range(10)
+        ]
+    assert len(calls) == 2
+    assert set(replies) == {"reply 1", "reply 2"}
+    assert cache.stats()["hits"] == 8
+    print("generate_reply cache: OK")
+
+
+if __name__ == "__main__":
+    test_key_normalization()
+    test_variants_lru_ttl()
+    test_generate_reply_uses_cache()
+    print("\n=== Reply cache: All checks PASS ===")
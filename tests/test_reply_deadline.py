@@ -0,0 +1,102 @@
+"""
+Reply latency budget — contextual fallback past the deadline, late LLM reply still cached.
+Run: python -m pytest tests/test_reply_deadline.py -v
+Or:  python tests/test_reply_deadline.py (standalone)
+"""
+import asyncio
+import os
+import sys
+import time
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+os.environ.setdefault("API_KEY", "test-key")
+
+
+def test_budget_per_channel():
+    """SMS is tighter than Email; unknown channels use the default."""
+    from app.agent import reply_budget
+    from app.config import REPLY_BUDGET_SECONDS
+    from app.models import Metadata
+
+    assert reply_budget(Metadata(channel="SMS")) < reply_budget(Metadata(channel="Email"))
+    assert reply_budget(Metadata(channel="Pager")) == REPLY_BUDGET_SECONDS
+    assert reply_budget(None) == REPLY_BUDGET_SECONDS
+    print("Budget per channel: OK")
+
+
+def test_deadline_fallback_and_late_reply():
+    """A slow LLM misses the SMS budget: fallback now, its reply lands in the cache later."""
+    from app import agent
+    from app.models import Metadata
+    from tests.stubs import stub_agent
+
+    async def scenario():
+        sms, email = Metadata(channel="SMS"), Metadata(channel="Email")
+        start = time.perf_counter()
+        fast = await agent.generate_reply_async("Share the OTP now", [], sms)
+        fast_elapsed = time.perf_counter() - start
+        await asyncio.gather(*agent._late_calls)
+        cached = await agent.generate_reply_async("Share the OTP now", [], sms)
+        slow = await agent.generate_reply_async("Your account is blocked", [], email)
+        return fast, fast_elapsed, cached, slow
+
+    before = dict(agent._deadline_stats)
+    with stub_agent("Okay, which account should I verify?", delay=0.2, cache=agent.ReplyCache(variants=1)), \
+            mock.patch.dict(agent.REPLY_BUDGET_BY_CHANNEL, {"SMS": 0.05, "EMAIL": 2.0}), \
+            mock.patch.dict(agent._deadline_stats):
+        fast, fast_elapsed, cached, slow = asyncio.run(scenario())
+        deadline = agent.stats()["deadline"]
+
+    assert fast == "I haven't received any code yet. Can you send it again?"
+    assert fast_elapsed < 0.15
+    assert cached == "Okay, which account should I verify?"
+    assert slow == "Okay, which account should I verify?"
+    assert deadline["overBudget"] == before["overBudget"] + 1
+    assert deadline["lateReplies"] == before["lateReplies"] + 1
+    print("Deadline fallback + late reply: OK")
+
+
+def test_contextual_fallback_matches_context():
+    from app.agent import FALLBACK_REPLY_SCAM, _contextual_fallback
+
+    assert "UPI" in _contextual_fallback("Pay Rs 10 to refund@ybl")
+    assert "link" in _contextual_fallback("Complete KYC at https://x.example/kyc")
+    assert _contextual_fallback("Your account will be blocked") == FALLBACK_REPLY_SCAM
+    print("Contextual fallback: OK")
+
+
+def test_unavailable_llm_skips_cache_and_deadline():
+    """No API key or an open breaker: straight to the fallback, no cache miss, no budget count."""
+    from app import agent, llm_client
+    from app.llm_client import CircuitBreaker
+
+    def run():
+        return asyncio.run(agent.generate_reply_async("Share the OTP now", [], None))
+
+    cache = agent.ReplyCache()
+    breaker = CircuitBreaker(cooldown=60)
+    breaker._open()
+    before = dict(agent._deadline_stats)
+    with mock.patch.object(agent, "reply_cache", cache), mock.patch.object(agent, "_call_llm_async") as call:
+        with mock.patch.object(llm_client, "OPENAI_API_KEY", ""):
+            no_key = run()
+        with mock.patch.object(llm_client, "OPENAI_API_KEY", "test"), mock.patch.object(agent.llm, "breaker", breaker):
+            breaker_open = run()
+    assert no_key == breaker_open == "I haven't received any code yet. Can you send it again?"
+    assert not call.called
+    assert cache.stats()["misses"] == 0
+    assert agent._deadline_stats == before
+    assert breaker.state == "open" and breaker.short_circuited == 0
+    print("Unavailable LLM skips cache and deadline: OK")
+
+
+if __name__ == "__main__":
+    test_budget_per_channel()
+    test_deadline_fallback_and_late_reply()
+    test_contextual_fallback_matches_context()
+    test_unavailable_llm_skips_cache_and_deadline()
+    print("\n=== Reply deadline: All checks PASS ===")
@@ -0,0 +1,135 @@
+"""
+Tiered replies — stage/entity templates before the cache and the LLM, with tier counts.
+Run: python -m pytest tests/test_reply_templates.py -v
+Or:  python tests/test_reply_templates.py (standalone)
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+os.environ.setdefault("API_KEY", "test-key")
+
+FORBIDDEN = ("scam", "honeypot", "bot", "detection", "fraud", "suspicious")
+
+
+def test_template_rules():
+    """New entity types win (link > UPI > bank > phone); intents and stage gate the rest."""
+    from app.reply_templates import ENTITY_REPLIES, INTENT_RULES, template_reply
+
+    replies = dict(ENTITY_REPLIES)
+    reply, conf = template_reply("pay here", 3, ["phoneNumbers", "upiIds"])
+    assert reply in replies["upiIds"] and conf >= 0.9
+    assert template_reply("Share the OTP", 4)[0] in INTENT_RULES[0][1]
+    assert template_reply("Your account is blocked", 0)[0] in INTENT_RULES[2][1]
+    assert template_reply("Your account is blocked", 3) is None  # opening rule only
+    assert template_reply("ok", 7)[1] < 0.8  # late-stage stalling is low confidence
+    assert template_reply("hello there", 2) is None
+    assert template_reply("pay here", 3, known_entity_types=["upiIds"]) is None  # already have one
+    otp, _ = template_reply("Share the OTP", 4)
+    again, conf = template_reply("Share the OTP", 5, last_reply=otp)
+    assert again != otp and again in INTENT_RULES[0][1] and conf < 0.8  # no repeat; LLM answers
+    every = [r for _, rs in ENTITY_REPLIES for r in rs] + [r for rule in INTENT_RULES for r in rule[1]]
+    assert not any(word in r.lower() for r in every for word in FORBIDDEN)
+    print("Template rules: OK")
+
+
+def test_tiers_in_generate_reply():
+    """Confident templates skip the LLM; others go to the LLM; failures fall back to the template."""
+    from app import agent
+    from tests.stubs import stub_agent
+
+    def run(text, turn, new=()):
+        return asyncio.run(agent.generate_reply_async(text, [], None, turn, new))
+
+    agent.reset_stats()
+    with stub_agent(lambda user_message: None if "fail" in user_message else "llm reply") as calls:
+        assert run("Send to this UPI", 2, ["upiIds"]) != "llm reply"
+        assert run("Tell me about your family", 2) == "llm reply"
+        assert run("Tell me more", None) == "llm reply"  # no session context: no template tier
+        late = run("fail now", 8)  # LLM fails -> low-confidence late-stage template
+        tiers = agent.stats()["tiers"]
+    agent.reset_stats()
+    assert len(calls) == 3
+    assert late != "llm reply" and late
+    assert (tiers["template"], tiers["llm"], tiers["fallback"]) == (1, 2, 1)
+    assert tiers["fractions"]["llm"] == 0.5
+    print("Reply tiers: OK")
+
+
+def test_session_templates_do_not_repeat():
+    """Over a session, templates skip entities already shared and never repeat back to back."""
+    from app import session_store
+    from app.models import HoneypotRequest, Message
+    from app.pipeline import process_turn
+    from tests.stubs import stub_agent
+
+    turns = [
+        "Your account is blocked. Pay the fee to sbi.kyc@ybl now.",
+        "Pay the fee now.",
+        "Why are you not paying? Send the money.",
+        "Pay immediately or the account is closed.",
+        "Share the OTP.",
+        "Share the OTP now!",
+        "OTP please.",
+    ]
+
+    async def run():
+        replies = []
+        for text in turns:
+            replies.append(await process_turn(HoneypotRequest(
+                sessionId="templates-no-repeat", message=Message(sender="scammer", text=text, timestamp="")
+            )))
+        return replies
+
+    with stub_agent("llm reply", callbacks=[]):  # callbacks are not under test
+        replies = asyncio.run(run())
+    templated = [r for r in replies if r != "llm reply"]
+    assert templated and not any("UPI ID" in r for r in replies[1:])
+    assert all(a != b or a == "llm reply" for a, b in zip(replies, replies[1:])), replies
+    assert session_store.get_or_create("templates-no-repeat").last_reply == replies[-1]
+    print("Session templates do not repeat: OK")
+
+
+def test_session_fallbacks_without_llm():
+    """With no LLM, fallbacks skip entities already shared and never repeat the previous reply."""
+    from app import session_store
+    from app.models import HoneypotRequest, Message
+    from app.pipeline import process_turn
+    from tests.stubs import stub_agent
+
+    turns = [
+        "Your account is blocked. Transfer Rs 10 to refund@ybl to verify.",
+        "Transfer it now.",
+        "Did you transfer? Use the same UPI.",
+        "Transfer immediately, I am waiting.",
+        "Why is the transfer not done?",
+        "Transfer now or lose your account.",
+    ]
+
+    async def run():
+        replies = []
+        for text in turns:
+            replies.append(await process_turn(HoneypotRequest(
+                sessionId="fallbacks-no-llm", message=Message(sender="scammer", text=text, timestamp="")
+            )))
+        return replies
+
+    with stub_agent(callbacks=[], available=False) as calls:
+        replies = asyncio.run(run())
+    assert not calls
+    assert not any("UPI ID" in r for r in replies[1:]), replies
+    assert all(a != b for a, b in zip(replies, replies[1:])), replies
+    assert session_store.get_or_create("fallbacks-no-llm").last_reply == replies[-1]
+    print("Session fallbacks without LLM: OK")
+
+
+if __name__ == "__main__":
+    test_template_rules()
+    test_tiers_in_generate_reply()
+    test_session_templates_do_not_repeat()
+    test_session_fallbacks_without_llm()
+    print("\n=== Reply templates: All checks PASS ===")
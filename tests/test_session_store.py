@@ -0,0 +1,190 @@
+"""
+Session store — LRU + idle TTL + byte budget, eviction hooks, counters and lock striping.
+Run: python -m pytest tests/test_session_store.py -v
+Or:  python tests/test_session_store.py (standalone)
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+os.environ.setdefault("API_KEY", "test-key")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_eviction():
+    """Past max_sessions, the least recently used session goes first."""
+    from app.session_store import SessionStore
+
+    store = SessionStore(max_sessions=3, ttl_seconds=0, max_bytes=0)
+    evicted = []
+    store.add_eviction_hook(lambda s, reason: evicted.append((s.session_id, reason)))
+    for sid in ("a", "b", "c"):
+        store.get_or_create(sid)
+    store.get_or_create("a")  # a is now most recent
+    store.get_or_create("d")
+    assert evicted == [("b", "count")]
+    assert "a" in store and "b" not in store and len(store) == 3
+    st = store.stats()
+    assert st["hits"] == 1 and st["misses"] == 4 and st["evictions"]["count"] == 1
+    print("LRU eviction: OK")
+
+
+def test_idle_ttl():
+    """Idle sessions expire on access and on sweep."""
+    from app.session_store import SessionStore
+
+    clock = FakeClock()
+    store = SessionStore(max_sessions=0, ttl_seconds=60, max_bytes=0, clock=clock)
+    evicted = []
+    store.add_eviction_hook(lambda s, reason: evicted.append((s.session_id, reason)))
+    first = store.get_or_create("old")
+    first.turn_count = 3
+    clock.now += 30
+    store.get_or_create("young")
+    clock.now += 45  # old idle 75s, young idle 45s
+    assert store.get_or_create("old").turn_count == 0  # expired -> fresh session
+    assert ("old", "ttl") in evicted
+    clock.now += 61
+    assert store.sweep() == 2 and len(store) == 0
+    print("Idle TTL: OK")
+
+
+def test_byte_budget():
+    """Growing intelligence counts against max_bytes; oldest sessions are evicted."""
+    from app.models import ExtractedIntelligence
+    from app.session_store import SessionStore
+
+    store = SessionStore(max_sessions=0, ttl_seconds=0, max_bytes=10_000)
+    for i in range(3):
+        store.get_or_create(f"s{i}")
+    big = store.get_or_create("s2")
+    big.intel.add(ExtractedIntelligence(phishingLinks=[f"https://x{i}.example/" + "p" * 40 for i in range(60)]))
+    store.resize(big)
+    assert store.total_bytes <= 10_000 or len(store) == 1
+    assert "s2" in store and store.stats()["evictions"]["bytes"] >= 1
+    print("Byte budget: OK")
+
+
+def test_concurrent_updates_one_session():
+    """Many threads hammering one session lose no turns or intelligence."""
+    import threading
+    from app.models import ExtractedIntelligence
+    from app.session_store import SessionStore, StripedSessionStore
+
+    threads_n, per_thread = 16, 100
+    old_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # force frequent thread switches
+    try:
+        for store in (StripedSessionStore(stripes=8), SessionStore()):
+            start = threading.Barrier(threads_n)
+
+            def hammer(t):
+                start.wait()
+                for i in range(per_thread):
+                    store.increment_turn("hot")
+                    store.update_intelligence("hot", ExtractedIntelligence(upiIds=[f"u{t}.{i}@ybl"]))
+                    store.update("hot", lambda s: setattr(s, "history_processed", s.history_processed + 1))
+
+            workers = [threading.Thread(target=hammer, args=(t,)) for t in range(threads_n)]
+            for w in workers:
+                w.start()
+            for w in workers:
+                w.join()
+            session = store.get_or_create("hot")
+            assert session.turn_count == threads_n * per_thread
+            assert session.history_processed == threads_n * per_thread
+            assert len(session.intelligence.upiIds) == threads_n * per_thread
+    finally:
+        sys.setswitchinterval(old_interval)
+    print("Concurrent updates, one session: OK")
+
+
+def test_stripes_are_independent():
+    """Stripes have their own locks; a held session lock does not block other stripes."""
+    import threading
+    from app.session_store import StripedSessionStore
+
+    store = StripedSessionStore(stripes=4, max_sessions=8, ttl_seconds=0, max_bytes=0)
+    ids = [f"s{i}" for i in range(64)]
+    other = next(sid for sid in ids if store.lock_for(sid) is not store.lock_for("s0"))
+    done = threading.Event()
+    with store.lock_for("s0"):
+        t = threading.Thread(target=lambda: (store.increment_turn(other), done.set()))
+        t.start()
+        assert done.wait(2), "update on another stripe was blocked"
+    t.join()
+    for sid in ids:
+        store.get_or_create(sid)
+    st = store.stats()
+    assert st["stripes"] == 4 and st["sessions"] <= 8 and st["evictions"]["count"] >= 56
+    print("Independent stripes: OK")
+
+
+def test_compact_intelligence():
+    """Ordered-set intelligence matches the list merge, fingerprint and payload; sessions use slots."""
+    from app.callback import intelligence_fingerprint
+    from app.models import ExtractedIntelligence
+    from app.session_store import CompactIntelligence, Session
+
+    a = ExtractedIntelligence(upiIds=["b@ybl", "a@ybl"], phoneNumbers=["9876543210"])
+    b = ExtractedIntelligence(upiIds=["a@ybl", "c@ybl"], suspiciousKeywords=["urgent"])
+    intel = CompactIntelligence()
+    assert intel.add(a) == 3 and intel.add(b) == 2 and intel.add(b) == 0
+    merged = ExtractedIntelligence(
+        upiIds=["b@ybl", "a@ybl", "c@ybl"], phoneNumbers=["9876543210"], suspiciousKeywords=["urgent"]
+    )
+    assert intel.to_model() == merged and len(intel) == 5
+    assert intelligence_fingerprint(intel) == intelligence_fingerprint(merged)
+    assert CompactIntelligence.from_dict(intel.to_dict()).to_model() == merged
+
+    session = Session("slots")
+    assert not hasattr(session, "__dict__")
+    session.intelligence = merged
+    assert session.intelligence == merged and session.intel.nbytes > 0
+    print("Compact intelligence: OK")
+
+
+def test_eviction_flushes_pending_callback():
+    """Evicting a session with unsent intelligence queues a final callback."""
+    from app.callback_outbox import dispatcher
+    from app.config import MIN_TURNS_BEFORE_CALLBACK
+    from app.models import ExtractedIntelligence
+    from app.pipeline import flush_evicted_session
+    from app.session_store import Session
+
+    sent = []
+    original = dispatcher.submit
+    dispatcher.submit = lambda payload: sent.append(payload) or 1
+    try:
+        s = Session("evict-pending")
+        s.scam_detected = True
+        s.turn_count = MIN_TURNS_BEFORE_CALLBACK
+        s.intelligence = ExtractedIntelligence(upiIds=["a@ybl"])
+        flush_evicted_session(s, "ttl")
+        quiet = Session("evict-quiet")
+        flush_evicted_session(quiet, "ttl")
+    finally:
+        dispatcher.submit = original
+    assert [p["sessionId"] for p in sent] == ["evict-pending"]
+    print("Eviction flush hook: OK")
+
+
+if __name__ == "__main__":
+    test_lru_eviction()
+    test_idle_ttl()
+    test_byte_budget()
+    test_concurrent_updates_one_session()
+    test_stripes_are_independent()
+    test_compact_intelligence()
+    test_eviction_flushes_pending_callback()
+    print("\n=== Session store: All checks PASS ===")
@@ -0,0 +1,91 @@
+"""
+Per-request tracing — Server-Timing on request, sampled cProfile dumps, slow-request stacks.
+Run: python -m pytest tests/test_tracing.py -v
+Or:  python tests/test_tracing.py (standalone)
+"""
+import asyncio
+import os
+import pstats
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+os.environ.setdefault("API_KEY", "test-key")
+
+LLM_DELAY = 0.15
+
+
+def _post_turns(requests):
+    """POST (sessionId, extra headers) pairs through the ASGI app with a slow stub LLM."""
+    import httpx
+    from app.config import API_KEY
+    from app.main import app
+    from tests.stubs import stub_agent
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            responses = []
+            for sid, extra in requests:
+                responses.append(await client.post(
+                    "/api/honeypot",
+                    json={
+                        "sessionId": sid,
+                        "message": {"sender": "scammer", "text": "Officer here, share the code and the details immediately.", "timestamp": ""},
+                    },
+                    headers={"x-api-key": API_KEY, **extra},
+                ))
+            return responses
+
+    with stub_agent("Which branch is this?", delay=LLM_DELAY):
+        return asyncio.run(scenario())
+
+
+def test_server_timing_opt_in():
+    """No header and no tracing state by default; x-debug-trace: 1 adds Server-Timing."""
+    from app import tracing
+
+    assert tracing.begin(None) is None
+    plain, traced = _post_turns([("trace-plain", {}), ("trace-debug", {tracing.DEBUG_HEADER: "1"})])
+    assert plain.status_code == traced.status_code == 200
+    assert "server-timing" not in plain.headers
+    header = traced.headers["server-timing"]
+    stages = [part.split(";")[0] for part in header.split(", ")]
+    assert stages[0] == "auth" and stages[-1] == "total" and "detect" in stages and "reply" in stages
+    assert all(";dur=" in part for part in header.split(", "))
+    print(f"Server-Timing: OK ({header})")
+
+
+def test_sampled_profile_and_slow_stack():
+    """Sampled requests leave a loadable .prof; requests over the threshold leave their await stack."""
+    from app import tracing
+
+    out = tempfile.mkdtemp()
+    saved = tracing.PROFILE_SAMPLE_RATE, tracing.PROFILE_SLOW_SECONDS, tracing.PROFILE_DIR
+    tracing.PROFILE_SAMPLE_RATE, tracing.PROFILE_SLOW_SECONDS, tracing.PROFILE_DIR = 1.0, LLM_DELAY / 3, out
+    try:
+        (r,) = _post_turns([("trace/../slow", {})])
+    finally:
+        tracing.PROFILE_SAMPLE_RATE, tracing.PROFILE_SLOW_SECONDS, tracing.PROFILE_DIR = saved
+    assert r.status_code == 200 and "server-timing" not in r.headers
+    files = sorted(os.listdir(out))
+    prof = [f for f in files if f.endswith(".prof")]
+    slow = [f for f in files if f.endswith(".slow.txt")]
+    assert len(prof) == 1 and len(slow) == 1 and all("/" not in f and ".._" in f for f in files)
+    stats = pstats.Stats(os.path.join(out, prof[0]))
+    assert any(func[2] == "process_turn" for func in stats.stats)
+    with open(os.path.join(out, slow[0]), encoding="utf-8") as f:
+        dump = f.read()
+    # the LLM call runs in its own (shielded) task, so the request's stack ends at the deadline wait
+    assert "timings:" in dump and "process_turn" in dump and "generate_reply_async" in dump
+    assert not tracing._profiling
+    print("Profile + slow stack: OK")
+
+
+if __name__ == "__main__":
+    test_server_timing_opt_in()
+    test_sampled_profile_and_slow_stack()
+    print("\n=== Tracing: All checks PASS ===")